@@ -10,6 +10,19 @@ SUPABASE_JWT_SECRET = settings.SUPABASE_JWT
 # Supabase access tokens typically use aud="authenticated"
 EXPECTED_AUD = os.getenv("SUPABASE_JWT_AUD", "authenticated")
 
+def _decode_token(token: str) -> dict:
+    return jwt.decode(
+        token,
+        SUPABASE_JWT_SECRET,
+        algorithms=["HS256"],
+        audience=EXPECTED_AUD,
+        options={"require": ["sub", "aud", "exp"]},
+    )
+
+def decode_user_id(token: str) -> str:
+    """Subject of a verified access token; raises ``jwt.PyJWTError`` otherwise."""
+    return _decode_token(token)["sub"]
+
 def get_current_user_id(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
 ) -> str:
@@ -24,13 +37,7 @@ def get_current_user_id(
             print("JWT header:", header)
         except Exception:
             pass
-        payload = jwt.decode(
-            token,
-            SUPABASE_JWT_SECRET,
-            algorithms=["HS256"],
-            audience=EXPECTED_AUD,
-            options={"require": ["sub", "aud", "exp"]},
-        )
+        payload = _decode_token(token)
         print(
             "JWT payload:",
             {k: payload[k] for k in ("sub", "aud", "exp", "iss") if k in payload},
@@ -0,0 +1,185 @@
+"""``Idempotency-Key`` support for the endpoints that move money.
+
+Clients retry these POSTs on flaky networks. With an ``Idempotency-Key``
+header, the first request runs and its response (status, headers, body) is
+stored; a retry with the same key and the same method/path/query/body gets
+that response back from ``idempotency_key`` without the endpoint running
+again, with ``Idempotent-Replayed: true``. A duplicate arriving while the
+first request is still running waits for it. Keys are scoped to the
+authenticated user.
+
+5xx responses and exceptions are not stored: the key is released and the next
+retry runs the request again.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+
+import jwt
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.v1.auth import decode_user_id
+from app.db.session import async_session
+from app.services.idempotency import IdempotencyStore, idempotency_store
+
+IDEMPOTENT_ROUTES = (
+    ("POST", re.compile(r"^/api/v1/wallet/me/ledger/debit$")),
+    ("POST", re.compile(r"^/api/v1/wallet/topups$")),
+    ("POST", re.compile(r"^/api/v1/wallet/me/holds$")),
+    ("POST", re.compile(r"^/api/v1/wallet/me/holds/[^/]+/capture$")),
+    ("POST", re.compile(r"^/api/v1/purchases/?$")),
+    ("POST", re.compile(r"^/api/v1/pools/[^/]+/tickets(/batch)?$")),
+    ("POST", re.compile(r"^/api/v1/pools/[^/]+/checkout$")),
+)
+
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint(scope: Scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope["query_string"]):
+        digest.update(part)
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _user_scope(headers: Headers) -> str | None:
+    authorization = headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_user_id(token)
+    except jwt.PyJWTError:
+        return None
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+class IdempotencyMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        store: IdempotencyStore = idempotency_store,
+        session_factory=async_session,
+        routes=IDEMPOTENT_ROUTES,
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.session_factory = session_factory
+        self.routes = routes
+
+    def _applies(self, scope: Scope) -> bool:
+        return any(
+            scope["method"] == method and pattern.match(scope["path"])
+            for method, pattern in self.routes
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        user = _user_scope(headers) if key is not None else None
+        if user is None:
+            # No key, or no valid token: the endpoint handles (or rejects) it as usual
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"},
+                status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        fingerprint = _fingerprint(scope, body)
+        try:
+            record = await self.store.begin(self.session_factory, user, key, fingerprint)
+        except HTTPException as exc:
+            await JSONResponse({"detail": exc.detail}, status_code=exc.status_code)(
+                scope, receive, send
+            )
+            return
+        if record is not None:
+            replay = Response(content=record.response_body, status_code=record.response_status)
+            replay.raw_headers = [
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in record.response_headers
+            ] + [(b"idempotent-replayed", b"true")]
+            await replay(scope, receive, send)
+            return
+
+        await self._run_and_store(scope, receive, send, user, key, fingerprint, body)
+
+    async def _run_and_store(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        user: str,
+        key: str,
+        fingerprint: str,
+        body: bytes,
+    ) -> None:
+        body_sent = False
+
+        async def replay_body() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status_code = 500
+        response_headers: list[tuple[str, str]] = []
+        chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code, response_headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await asyncio.shield(self.store.release(self.session_factory, user, key, fingerprint))
+            raise
+        if status_code >= 500:
+            await self.store.release(self.session_factory, user, key, fingerprint)
+            return
+        await self.store.complete(
+            self.session_factory,
+            user,
+            key,
+            fingerprint,
+            status_code=status_code,
+            headers=response_headers,
+            body=b"".join(chunks),
+        )
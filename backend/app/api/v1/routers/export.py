@@ -0,0 +1,71 @@
+import hmac
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.services.export import (
+    EXPORT_DATASETS,
+    ExportFormat,
+    build_export_query,
+    stream_export,
+)
+
+router = APIRouter()
+
+_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.JSON: "application/json",
+}
+
+
+def _check_token(token: Optional[str]) -> None:
+    if settings.EXPORT_API_TOKEN is None:
+        raise HTTPException(status_code=500, detail="Exports are not configured")
+    expected = settings.EXPORT_API_TOKEN.get_secret_value()
+    if token is None or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid export token")
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str,
+    created_from: datetime,
+    created_to: datetime,
+    format: ExportFormat = ExportFormat.CSV,
+    gzip: bool = False,
+    after: Optional[str] = Query(None, description="Key of the last row received, comma-separated"),
+    archived: bool = False,
+    x_export_token: Optional[str] = Header(None),
+):
+    _check_token(x_export_token)
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail="Unknown export dataset")
+    # Validated before the first byte is sent: errors still get a status code
+    stmt = build_export_query(
+        EXPORT_DATASETS[dataset],
+        created_from=created_from,
+        created_to=created_to,
+        after=after,
+        archived=archived,
+    )
+    filename = f"{dataset}_{created_from:%Y%m%d}_{created_to:%Y%m%d}.{format.value}"
+    media_type = _MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        stream_export(
+            async_session,
+            stmt,
+            export_format=format,
+            compress=gzip,
+            batch_size=settings.EXPORT_BATCH_ROWS,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.deps import get_db_dep
+from app.schemas.metrics import (
+    CacheStats,
+    HoldSweepStats,
+    TopupWebhookStats,
+    TournamentLeaderboardStats,
+    TournamentPipelineStats,
+    TournamentSchedulerStats,
+    WalletReconciliationReport,
+)
+from app.services.cache import CACHES
+from app.services.topup_webhook import topup_event_processor
+from app.services.tournament_leaderboard import tournament_leaderboards
+from app.services.tournament_pipeline import tournament_pipeline
+from app.services.tournament_scheduler import tournament_scheduler
+from app.services.wallet_hold import hold_sweeper
+from app.services.wallet_reconciliation import list_drifted_wallets, list_reconciliation_runs
+
+router = APIRouter()
+
+@router.get("/cache", response_model=list[CacheStats])
+async def read_cache_stats():
+    return [cache.snapshot_stats() for cache in CACHES]
+
+@router.get("/wallet-reconciliation", response_model=WalletReconciliationReport)
+async def read_wallet_reconciliation(
+    db: AsyncSession = Depends(get_db_dep),
+    runs: int = Query(10, ge=1, le=100),
+    drifted: int = Query(100, ge=0, le=1000),
+):
+    return WalletReconciliationReport.model_validate(
+        {
+            "runs": await list_reconciliation_runs(db, runs),
+            "drifted": await list_drifted_wallets(db, drifted) if drifted else [],
+        },
+        from_attributes=True,
+    )
+
+@router.get("/wallet-holds", response_model=HoldSweepStats)
+async def read_hold_sweep_stats():
+    return hold_sweeper.snapshot_stats()
+
+@router.get("/topup-webhooks", response_model=TopupWebhookStats)
+async def read_topup_webhook_stats(db: AsyncSession = Depends(get_db_dep)):
+    return await topup_event_processor.snapshot_stats(db)
+
+@router.get("/tournament-scheduler", response_model=TournamentSchedulerStats)
+async def read_tournament_scheduler_stats():
+    # Per worker: only the leader has a heap and lags to report
+    return tournament_scheduler.snapshot_stats()
+
+@router.get("/tournament-pipeline", response_model=TournamentPipelineStats)
+async def read_tournament_pipeline_stats():
+    return tournament_pipeline.snapshot_stats()
+
+@router.get("/tournament-leaderboards", response_model=TournamentLeaderboardStats)
+async def read_tournament_leaderboard_stats():
+    # Per worker: each one holds its own indexes and buffer
+    return tournament_leaderboards.snapshot_stats()
@@ -1,23 +1,57 @@
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.schemas.pool import Pool, PoolCreate, LikeStatus
-from app.schemas.ticket import Ticket, TicketPurchaseRequest
+from app.schemas.pool import (
+    LikedPools,
+    Pool,
+    PoolCardPage,
+    PoolCatalogSort,
+    PoolCreate,
+    PoolLikeStatus,
+    PoolPage,
+    LikeStatus,
+    TrendingPage,
+    TrendingPool,
+    TrendingRank,
+)
+from app.schemas.ticket import (
+    Ticket,
+    TicketBatch,
+    TicketBatchPurchaseRequest,
+    TicketCheckout,
+    TicketPurchaseRequest,
+)
 from app.services.pool import (
     create_pool,
     get_pool,
+    read_pool,
     update_pool,
     delete_pool,
     get_all_pool,
+    get_pools_by_ids,
     get_pools_by_user,
+    list_pool_catalog,
 )
 from app.services.pool_like import (
     like_pool as svc_like_pool,
     unlike_pool as svc_unlike_pool,
     get_like_status as svc_get_like_status,
+    get_like_statuses,
+    get_likes_version,
+    list_liked_pool_ids,
+)
+from app.services.pool_card import list_pool_cards
+from app.services.ticket import (
+    checkout_ticket,
+    purchase_ticket_for_pool,
+    purchase_tickets_batch,
 )
-from app.services.ticket import purchase_ticket_for_pool
+from app.services.admission import admission_controller
+from app.services.trending import trending_engine
+from app.services.wallet_settlement import cancel_pool
+from app.schemas.wallet import WalletSettlementReport
 from app.api.v1.deps import get_db_dep
 from app.api.v1.auth import get_current_user_id
 
@@ -27,11 +61,135 @@ router = APIRouter()
 async def create(item: PoolCreate, db: AsyncSession = Depends(get_db_dep)):
     return await create_pool(db, item)
 
-@router.get("/all_pools", response_model=list[Pool])
+@router.get("/all_pools", response_model=list[Pool], deprecated=True)
 async def read_all(db: AsyncSession = Depends(get_db_dep)):
+    # Full table scan: use /catalog for paginated listings
     pools = await get_all_pool(db)
     return pools
 
+@router.get("/catalog", response_model=PoolPage)
+async def read_catalog(
+    db: AsyncSession = Depends(get_db_dep),
+    sort: PoolCatalogSort = Query(PoolCatalogSort.NEWEST),
+    state: Optional[str] = Query(None),
+    min_price_cents: Optional[int] = Query(None, ge=0),
+    max_price_cents: Optional[int] = Query(None, ge=0),
+    min_fill: Optional[float] = Query(None, ge=0, le=1),
+    max_fill: Optional[float] = Query(None, ge=0, le=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+):
+    pools, next_cursor = await list_pool_catalog(
+        db,
+        sort=sort,
+        state=state,
+        min_price_cents=min_price_cents,
+        max_price_cents=max_price_cents,
+        min_fill=min_fill,
+        max_fill=max_fill,
+        limit=limit,
+        cursor=cursor,
+    )
+    return PoolPage(items=pools, next_cursor=next_cursor)
+
+@router.get("/cards", response_model=PoolCardPage)
+async def read_cards(
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+    sort: PoolCatalogSort = Query(PoolCatalogSort.NEWEST),
+    state: Optional[str] = Query(None),
+    min_price_cents: Optional[int] = Query(None, ge=0),
+    max_price_cents: Optional[int] = Query(None, ge=0),
+    min_fill: Optional[float] = Query(None, ge=0, le=1),
+    max_fill: Optional[float] = Query(None, ge=0, le=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+):
+    try:
+        user_uuid = UUID(user_sub)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user identifier")
+
+    cards, next_cursor = await list_pool_cards(
+        db,
+        user_uuid,
+        sort=sort,
+        state=state,
+        min_price_cents=min_price_cents,
+        max_price_cents=max_price_cents,
+        min_fill=min_fill,
+        max_fill=max_fill,
+        limit=limit,
+        cursor=cursor,
+    )
+    return PoolCardPage(items=cards, next_cursor=next_cursor)
+
+@router.get("/trending", response_model=TrendingPage)
+async def read_trending(
+    db: AsyncSession = Depends(get_db_dep),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    ranked = trending_engine.top(offset, limit)
+    pools = await get_pools_by_ids(db, [pool_id for _, pool_id, _ in ranked])
+    by_id = {pool.pool_id: pool for pool in pools}
+    return TrendingPage(
+        items=[
+            TrendingPool.model_validate(
+                {"rank": rank, "score": score, "pool": by_id[pool_id]},
+                from_attributes=True,
+            )
+            for rank, pool_id, score in ranked
+            if pool_id in by_id
+        ],
+        total=len(trending_engine.index),
+    )
+
+@router.get("/likes", response_model=list[PoolLikeStatus])
+async def read_likes_bulk(
+    ids: list[UUID] = Query(..., max_length=100),
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+):
+    try:
+        user_uuid = UUID(user_sub)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user identifier")
+
+    statuses = await get_like_statuses(db, ids, user_uuid)
+    return [
+        PoolLikeStatus(pool_id=pool_id, likes=likes, liked_by_me=liked)
+        for pool_id, likes, liked in statuses
+    ]
+
+@router.get("/likes/mine", response_model=LikedPools)
+async def read_my_liked_pools(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+):
+    """Every pool liked by the caller, versioned for client-side caching.
+
+    Send the last ETag as If-None-Match to get 304 while nothing changed;
+    like/unlike responses carry the new ``likes_version`` so clients can
+    apply their own toggles locally and keep the cached set current.
+    """
+    try:
+        user_uuid = UUID(user_sub)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user identifier")
+
+    version = await get_likes_version(db, user_uuid)
+    if version is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if request.headers.get("if-none-match") == f'"likes-{version}"':
+        return Response(status_code=304, headers={"ETag": f'"likes-{version}"'})
+
+    version, pool_ids = await list_liked_pool_ids(db, user_uuid)
+    response.headers["ETag"] = f'"likes-{version}"'
+    return LikedPools(version=version, pool_ids=pool_ids)
+
 @router.get("/my", response_model=list[Pool])
 async def read_my(
     db: AsyncSession = Depends(get_db_dep),
@@ -42,11 +200,27 @@ async def read_my(
 
 @router.get("/{pool_id}", response_model=Pool)
 async def read(pool_id: str, db: AsyncSession = Depends(get_db_dep)):
-    pool = await get_pool(db, pool_id)
+    try:
+        pool_uuid = UUID(pool_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pool id")
+    pool = await read_pool(db, pool_uuid)
     if not pool:
         raise HTTPException(status_code=404, detail="Pool not found")
     return pool
 
+@router.get("/{pool_id}/trending", response_model=TrendingRank)
+async def read_trending_rank(pool_id: str):
+    try:
+        pool_uuid = UUID(pool_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pool id")
+    ranked = trending_engine.rank_of(pool_uuid)
+    if ranked is None:
+        raise HTTPException(status_code=404, detail="Pool is not ranked")
+    rank, score = ranked
+    return TrendingRank(pool_id=pool_uuid, rank=rank, score=score)
+
 @router.get("/{pool_id}/likes", response_model=LikeStatus)
 async def read_likes(
     pool_id: str,
@@ -80,8 +254,8 @@ async def like(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid user identifier")
 
-    likes, liked = await svc_like_pool(db, pool_uuid, user_uuid)
-    return LikeStatus(likes=likes, liked_by_me=liked)
+    likes, liked, version = await svc_like_pool(db, pool_uuid, user_uuid)
+    return LikeStatus(likes=likes, liked_by_me=liked, likes_version=version)
 
 @router.delete("/{pool_id}/like", response_model=LikeStatus, status_code=200)
 async def unlike(
@@ -98,8 +272,8 @@ async def unlike(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid user identifier")
 
-    likes, liked = await svc_unlike_pool(db, pool_uuid, user_uuid)
-    return LikeStatus(likes=likes, liked_by_me=liked)
+    likes, liked, version = await svc_unlike_pool(db, pool_uuid, user_uuid)
+    return LikeStatus(likes=likes, liked_by_me=liked, likes_version=version)
 
 @router.put("/{pool_id}", response_model=Pool)
 async def update(pool_id: str, item: PoolCreate, db: AsyncSession = Depends(get_db_dep)):
@@ -115,6 +289,24 @@ async def delete(pool_id: str, db: AsyncSession = Depends(get_db_dep)):
         raise HTTPException(status_code=404, detail="Pool not found")
     await delete_pool(db, pool)
 
+@router.post("/{pool_id}/cancel", response_model=WalletSettlementReport)
+async def cancel(
+    pool_id: str,
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+):
+    """Cancel the caller's pool and refund every buyer; safe to retry."""
+    try:
+        pool_uuid = UUID(pool_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pool id")
+    try:
+        user_uuid = UUID(user_sub)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user identifier")
+
+    return await cancel_pool(db, pool_uuid, owner_id=user_uuid)
+
 @router.post("/{pool_id}/tickets", response_model=Ticket, status_code=201)
 async def purchase_ticket(
     pool_id: str,
@@ -131,5 +323,60 @@ async def purchase_ticket(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid user identifier")
 
-    ticket, _ = await purchase_ticket_for_pool(db, pool_uuid, user_uuid, payload.purchase_id)
+    async with admission_controller.admit(db, pool_uuid, user_uuid):
+        ticket, _ = await purchase_ticket_for_pool(db, pool_uuid, user_uuid, payload.purchase_id)
     return ticket
+
+@router.post("/{pool_id}/tickets/batch", response_model=TicketBatch, status_code=201)
+async def purchase_ticket_batch(
+    pool_id: str,
+    payload: TicketBatchPurchaseRequest,
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+):
+    try:
+        pool_uuid = UUID(pool_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pool id")
+    try:
+        user_uuid = UUID(user_sub)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user identifier")
+
+    async with admission_controller.admit(db, pool_uuid, user_uuid):
+        purchase, entry, tickets, wallet = await purchase_tickets_batch(
+            db, pool_uuid, user_uuid, payload.quantity
+        )
+    return TicketBatch(
+        purchase_id=purchase.purchase_id,
+        wallet_entry_id=entry.entry_id,
+        requested=payload.quantity,
+        issued=len(tickets),
+        first_ticket_num=tickets[0].ticket_num,
+        last_ticket_num=tickets[-1].ticket_num,
+        amount_cents=purchase.amount_cents,
+        balance_cents=wallet.balance_cents,
+        tickets=tickets,
+    )
+
+@router.post("/{pool_id}/checkout", response_model=TicketCheckout, status_code=201)
+async def checkout(
+    pool_id: str,
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+):
+    try:
+        pool_uuid = UUID(pool_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pool id")
+    try:
+        user_uuid = UUID(user_sub)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user identifier")
+
+    async with admission_controller.admit(db, pool_uuid, user_uuid):
+        ticket, purchase, wallet = await checkout_ticket(db, pool_uuid, user_uuid)
+    return TicketCheckout.model_validate(
+        {"ticket": ticket, "purchase": purchase, "balance": wallet},
+        from_attributes=True,
+    )
@@ -11,6 +11,7 @@ from app.schemas.prize_image import (
 from app.services.prize import (
     create_prize,
     get_prize,
+    read_prize,
     update_prize,
     delete_prize,
     get_all_prize,
@@ -51,7 +52,11 @@ async def read_my(
 
 @router.get("/{prize_id}", response_model=Prize)
 async def read(prize_id: str, db: AsyncSession = Depends(get_db_dep)):
-    prize = await get_prize(db, prize_id)
+    try:
+        pid = UUID(prize_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid prize id")
+    prize = await read_prize(db, pid)
     if not prize:
         raise HTTPException(status_code=404, detail="Prize not found")
     return prize
@@ -1,15 +1,28 @@
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.auth import get_current_user_id
 from app.api.v1.deps import get_db_dep
-from app.schemas.purchase import Purchase, PurchaseCreate, PurchaseUpdate
+from app.core.config import settings
+from app.db.session import async_session
+from app.schemas.purchase import (
+    Purchase,
+    PurchaseCreate,
+    PurchasePage,
+    PurchaseStatus,
+    PurchaseType,
+    PurchaseUpdate,
+)
+from app.services.export import ExportFormat, stream_export
 from app.services.purchase import (
+    all_purchases_stmt,
     create_purchase,
     get_purchase,
-    get_all_purchases,
     get_user_purchases,
+    list_user_purchases,
     update_purchase,
     delete_purchase,
 )
@@ -29,10 +42,55 @@ async def create(
     return await create_purchase(db, user_id, item)
 
 @router.get("/all", response_model=list[Purchase])
-async def read_all(db: AsyncSession = Depends(get_db_dep)):
-    return await get_all_purchases(db)
+async def read_all(
+    purchase_status: Optional[PurchaseStatus] = Query(None, alias="status"),
+    purchase_type: Optional[PurchaseType] = Query(None, alias="type"),
+    pool_id: Optional[UUID] = Query(None),
+):
+    # Streamed as one JSON array, EXPORT_BATCH_ROWS rows at a time, instead of
+    # loading the whole table: memory stays flat however many purchases exist
+    return StreamingResponse(
+        stream_export(
+            async_session,
+            all_purchases_stmt(
+                purchase_status=purchase_status,
+                purchase_type=purchase_type,
+                pool_id=pool_id,
+            ),
+            export_format=ExportFormat.JSON,
+            batch_size=settings.EXPORT_BATCH_ROWS,
+        ),
+        media_type="application/json",
+    )
+
+@router.get("/history", response_model=PurchasePage)
+async def read_history(
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+    purchase_status: Optional[PurchaseStatus] = Query(None, alias="status"),
+    purchase_type: Optional[PurchaseType] = Query(None, alias="type"),
+    pool_id: Optional[UUID] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+):
+    try:
+        user_id = UUID(user_sub)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user identifier")
+    items, next_cursor = await list_user_purchases(
+        db,
+        user_id,
+        purchase_status=purchase_status,
+        purchase_type=purchase_type,
+        pool_id=pool_id,
+        limit=limit,
+        cursor=cursor,
+    )
+    return PurchasePage.model_validate(
+        {"items": items, "next_cursor": next_cursor}, from_attributes=True
+    )
 
-@router.get("/my", response_model=list[Purchase])
+@router.get("/my", response_model=list[Purchase], deprecated=True)
 async def read_my(
     db: AsyncSession = Depends(get_db_dep),
     user_sub: str = Depends(get_current_user_id),
@@ -41,6 +99,7 @@ async def read_my(
         user_id = UUID(user_sub)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid user identifier")
+    # Every purchase of the user: use /history for paginated listings
     return await get_user_purchases(db, user_id)
 
 @router.get("/{purchase_id}", response_model=Purchase)
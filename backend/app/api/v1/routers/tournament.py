@@ -0,0 +1,54 @@
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.schemas.tournament import LeaderboardEntry, LeaderboardPage, LeaderboardRank
+from app.services.tournament_leaderboard import tournament_leaderboards
+from app.api.v1.auth import get_current_user_id
+
+router = APIRouter()
+
+@router.get("/{tournament_id}/phases/{phase_id}/leaderboard", response_model=LeaderboardPage)
+async def read_leaderboard(
+    tournament_id: UUID,
+    phase_id: UUID,
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    ranked = tournament_leaderboards.top(tournament_id, phase_id, offset, limit)
+    if ranked is None:
+        raise HTTPException(status_code=404, detail="Phase is not active")
+    return LeaderboardPage(
+        items=[
+            LeaderboardEntry(
+                rank=rank, player_id=player_id, best_score=score, best_time_seconds=time_seconds
+            )
+            for rank, player_id, score, time_seconds in ranked
+        ],
+        total=tournament_leaderboards.size(tournament_id, phase_id),
+    )
+
+@router.get("/{tournament_id}/phases/{phase_id}/leaderboard/me", response_model=LeaderboardRank)
+async def read_my_rank(
+    tournament_id: UUID,
+    phase_id: UUID,
+    user_sub: str = Depends(get_current_user_id),
+):
+    try:
+        user_uuid = UUID(user_sub)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user identifier")
+
+    total = tournament_leaderboards.size(tournament_id, phase_id)
+    if total is None:
+        raise HTTPException(status_code=404, detail="Phase is not active")
+    ranked = tournament_leaderboards.rank_of(tournament_id, phase_id, user_uuid)
+    if ranked is None:
+        raise HTTPException(status_code=404, detail="Not a participant of this phase")
+    rank, score, time_seconds = ranked
+    return LeaderboardRank(
+        rank=rank,
+        player_id=user_uuid,
+        best_score=score,
+        best_time_seconds=time_seconds,
+        total=total,
+    )
@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
@@ -9,6 +11,9 @@ from app.models.wallet import WalletLedgerReason as WalletLedgerReasonModel
 from app.schemas.wallet import (
     WalletAccount,
     WalletDebitCreate,
+    WalletHold,
+    WalletHoldCapture,
+    WalletHoldCreate,
     WalletLedgerEntry,
     WalletLedgerList,
     WalletTopupComplete,
@@ -25,6 +30,12 @@ from app.services.wallet import (
     list_topup_requests,
     list_wallet_ledger,
 )
+from app.services.wallet_hold import (
+    capture_hold,
+    list_active_holds,
+    release_hold,
+    reserve_hold,
+)
 
 router = APIRouter()
 
@@ -51,12 +62,32 @@ async def read_my_ledger(
     db: AsyncSession = Depends(get_db_dep),
     user_sub: str = Depends(get_current_user_id),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    archived: bool = Query(False),
 ):
     user_id = _parse_user_id(user_sub)
     wallet = await get_or_create_wallet(db, user_id)
-    items, total = await list_wallet_ledger(db, wallet.wallet_id, limit=limit, offset=offset)
-    return WalletLedgerList(items=list(items), total=total)
+    items, next_cursor = await list_wallet_ledger(
+        db,
+        wallet.wallet_id,
+        limit=limit,
+        cursor=cursor,
+        created_from=created_from,
+        created_to=created_to,
+        archived=archived,
+    )
+    return WalletLedgerList.model_validate(
+        {
+            "items": items,
+            "total": wallet.ledger_entries,
+            "total_debit_cents": wallet.ledger_debit_cents,
+            "total_credit_cents": wallet.ledger_credit_cents,
+            "next_cursor": next_cursor,
+        },
+        from_attributes=True,
+    )
 
 
 @router.post("/me/ledger/debit", response_model=WalletLedgerEntry, status_code=status.HTTP_201_CREATED)
@@ -131,3 +162,59 @@ async def complete_topup(
         provider_txn_id=payload.provider_txn_id,
     )
     return WalletTopupWithEntry(topup=updated_topup, ledger_entry=ledger_entry)
+
+
+@router.get("/me/holds", response_model=list[WalletHold])
+async def list_my_holds(
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+):
+    user_id = _parse_user_id(user_sub)
+    wallet = await get_or_create_wallet(db, user_id)
+    holds = await list_active_holds(db, wallet.wallet_id)
+    return holds
+
+
+@router.post("/me/holds", response_model=WalletHold, status_code=status.HTTP_201_CREATED)
+async def create_hold(
+    payload: WalletHoldCreate,
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+):
+    user_id = _parse_user_id(user_sub)
+    wallet = await get_or_create_wallet(db, user_id)
+    hold = await reserve_hold(
+        db,
+        wallet,
+        amount_cents=payload.amount_cents,
+        ttl_seconds=payload.ttl_seconds,
+        ref_purchase_id=payload.ref_purchase_id,
+        ref_pool_id=payload.ref_pool_id,
+    )
+    return hold
+
+
+@router.post("/me/holds/{hold_id}/capture", response_model=WalletHoldCapture)
+async def capture_my_hold(
+    hold_id: UUID,
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+):
+    user_id = _parse_user_id(user_sub)
+    wallet = await get_or_create_wallet(db, user_id)
+    hold, entry = await capture_hold(db, wallet, hold_id)
+    return WalletHoldCapture.model_validate(
+        {"hold": hold, "ledger_entry": entry}, from_attributes=True
+    )
+
+
+@router.post("/me/holds/{hold_id}/release", response_model=WalletHold)
+async def release_my_hold(
+    hold_id: UUID,
+    db: AsyncSession = Depends(get_db_dep),
+    user_sub: str = Depends(get_current_user_id),
+):
+    user_id = _parse_user_id(user_sub)
+    wallet = await get_or_create_wallet(db, user_id)
+    hold = await release_hold(db, wallet, hold_id)
+    return hold
@@ -0,0 +1,51 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.deps import get_db_dep
+from app.core.config import settings
+from app.schemas.wallet import TopupWebhookAck, TopupWebhookBatch
+from app.services.topup_webhook import (
+    ingest_topup_events,
+    topup_event_processor,
+    verify_signature,
+)
+
+router = APIRouter()
+
+
+@router.post(
+    "/topups/{provider}",
+    response_model=TopupWebhookAck,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def receive_topup_events(
+    provider: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db_dep),
+    x_tickup_timestamp: Optional[str] = Header(None),
+    x_tickup_signature: Optional[str] = Header(None),
+):
+    # Stored and acknowledged only: the event processor applies them in batches
+    if settings.TOPUP_WEBHOOK_SECRET is None:
+        raise HTTPException(status_code=500, detail="Top-up webhooks are not configured")
+    body = await request.body()
+    verify_signature(
+        settings.TOPUP_WEBHOOK_SECRET.get_secret_value(),
+        x_tickup_timestamp,
+        x_tickup_signature,
+        body,
+        tolerance_seconds=settings.TOPUP_WEBHOOK_TOLERANCE_SECONDS,
+    )
+    try:
+        batch = TopupWebhookBatch.model_validate_json(body)
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=422,
+            detail=exc.errors(include_url=False, include_context=False, include_input=False),
+        )
+    received, duplicates = await ingest_topup_events(db, provider, batch.events)
+    topup_event_processor.record_ingested(received, duplicates)
+    return TopupWebhookAck(received=received, duplicates=duplicates)
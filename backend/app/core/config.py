@@ -33,4 +33,92 @@ class Settings(BaseSettings):
         default=None, env="SUPABASE_SERVICE_ROLE_KEY"
     )
 
+    # Flash-sale admission queue in front of ticket purchases.
+    # "memory" keeps the queue per process, "postgres" shares it across workers.
+    ADMISSION_BACKEND: str = "memory"
+    ADMISSION_MAX_IN_FLIGHT: int = 32
+    ADMISSION_TTL_SECONDS: int = 30
+
+    # In-process read-through cache (app/services/cache.py).
+    # Pools change on every sale/like, prizes and their images almost never.
+    CACHE_POOL_TTL_SECONDS: float = 5
+    CACHE_PRIZE_TTL_SECONDS: float = 300
+    CACHE_MAX_ENTRIES: int = 10_000
+
+    # raffle_pool.likes is updated in batches from per-pool buffered deltas
+    LIKES_FLUSH_INTERVAL_SECONDS: float = 1.0
+
+    # Trending ranking (app/services/trending.py). Changing the half-life
+    # requires `python -m scripts.rebuild_trending`.
+    TRENDING_HALF_LIFE_HOURS: float = 6
+    TRENDING_LIKE_WEIGHT: float = 1.0
+    TRENDING_TICKET_WEIGHT: float = 3.0
+    TRENDING_REFRESH_SECONDS: float = 2.0
+    TRENDING_FULL_RELOAD_SECONDS: float = 300
+
+    # Wallet reconciliation (app/services/wallet_reconciliation.py): a run
+    # starts every INTERVAL, checks BATCH wallets per transaction and only
+    # checkpoints ledger entries older than SETTLE seconds.
+    WALLET_RECONCILE_INTERVAL_SECONDS: float = 3600
+    WALLET_RECONCILE_BATCH: int = 1000
+    WALLET_RECONCILE_SETTLE_SECONDS: float = 60
+
+    # Wallet holds (app/services/wallet_hold.py): default lifetime of a hold
+    # and the sweeper releasing expired ones, BATCH holds per transaction.
+    WALLET_HOLD_TTL_SECONDS: float = 900
+    WALLET_HOLD_SWEEP_SECONDS: float = 5
+    WALLET_HOLD_SWEEP_BATCH: int = 5000
+
+    # Ledger partitions (app/services/wallet_ledger_partitions.py): monthly
+    # partitions exist AHEAD months in advance; months older than
+    # ARCHIVE_AFTER are moved to wallet_ledger_archive (0 keeps everything
+    # live). Checked every MAINTENANCE seconds.
+    WALLET_LEDGER_PARTITIONS_AHEAD: int = 3
+    WALLET_LEDGER_ARCHIVE_AFTER_MONTHS: int = 0
+    WALLET_LEDGER_MAINTENANCE_SECONDS: float = 3600
+
+    # Top-up webhooks (app/services/topup_webhook.py): requests are signed
+    # with SECRET (HMAC-SHA256 of "<timestamp>.<body>") and refused when the
+    # timestamp is older than TOLERANCE. WORKERS tasks apply stored events,
+    # BATCH per transaction, polling every POLL seconds when idle.
+    TOPUP_WEBHOOK_SECRET: SecretStr | None = Field(default=None, env="TOPUP_WEBHOOK_SECRET")
+    TOPUP_WEBHOOK_TOLERANCE_SECONDS: int = 300
+    TOPUP_WEBHOOK_WORKERS: int = 4
+    TOPUP_WEBHOOK_BATCH: int = 500
+    TOPUP_WEBHOOK_POLL_SECONDS: float = 1.0
+
+    # Accounting exports (app/services/export.py): callers send TOKEN in
+    # X-Export-Token; rows are fetched and streamed BATCH at a time.
+    EXPORT_API_TOKEN: SecretStr | None = Field(default=None, env="EXPORT_API_TOKEN")
+    EXPORT_BATCH_ROWS: int = 5000
+
+    # Idempotency-Key replay store (app/api/v1/idempotency.py): responses are
+    # kept for TTL; duplicates wait up to WAIT for the first request, which
+    # owns the key for at most LOCK seconds; expired keys are purged every
+    # PURGE seconds, BATCH rows per transaction.
+    IDEMPOTENCY_TTL_SECONDS: float = 86_400
+    IDEMPOTENCY_LOCK_SECONDS: float = 60
+    IDEMPOTENCY_WAIT_SECONDS: float = 10
+    IDEMPOTENCY_PURGE_SECONDS: float = 300
+    IDEMPOTENCY_PURGE_BATCH: int = 5000
+
+    # Tournament scheduler (app/services/tournament_scheduler.py): the leader
+    # reloads every deadline from the database each RESYNC seconds; workers
+    # that are not leading try to take over every RETRY seconds.
+    TOURNAMENT_SCHEDULER_RESYNC_SECONDS: float = 900
+    TOURNAMENT_SCHEDULER_RETRY_SECONDS: float = 5
+
+    # Tournament pipeline (app/services/tournament_pipeline.py): up to
+    # CONCURRENCY tournaments processed at once, a failed one retried after
+    # RETRY seconds (doubled each time) for at most MAX_ATTEMPTS attempts.
+    TOURNAMENT_PIPELINE_CONCURRENCY: int = 4
+    TOURNAMENT_PIPELINE_MAX_ATTEMPTS: int = 3
+    TOURNAMENT_PIPELINE_RETRY_SECONDS: float = 1
+
+    # Live phase leaderboards (app/services/tournament_leaderboard.py): each
+    # worker writes its buffered results and reads the others' every REFRESH
+    # seconds, and reloads every active phase each FULL_RELOAD seconds.
+    TOURNAMENT_LEADERBOARD_REFRESH_SECONDS: float = 1.0
+    TOURNAMENT_LEADERBOARD_FULL_RELOAD_SECONDS: float = 300
+
 settings = Settings()
@@ -0,0 +1,45 @@
+"""Opaque cursors for keyset (seek) pagination.
+
+A cursor is the url-safe base64 of the JSON list of the sort-key values of
+the last row of a page; services decode it back and seek past that row.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Sequence
+from uuid import UUID
+
+from fastapi import HTTPException
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Unsupported cursor value: {value!r}")
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values), default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    """Decode a cursor holding exactly ``size`` values, or raise a 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def parse_cursor_values(values: Sequence[Any], *parsers) -> tuple[Any, ...]:
+    """Apply one parser per decoded value (e.g. ``datetime.fromisoformat``, ``UUID``)."""
+    try:
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,39 @@
+"""resync raffle_pool.tickets_sold with issued tickets
+
+Ticket issuance now claims seats through the ``tickets_sold`` counter, which
+the previous count(*)-based path never incremented.
+
+Revision ID: 0001_resync_pool_tickets_sold
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0001_resync_pool_tickets_sold"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        UPDATE raffle_pool AS p
+           SET tickets_sold = (
+                SELECT count(*) FROM ticket AS t WHERE t.pool_id = p.pool_id
+           )
+        """
+    )
+    op.execute(
+        """
+        UPDATE raffle_pool
+           SET state = 'FULL'
+         WHERE state = 'OPEN'
+           AND tickets_sold >= tickets_required
+        """
+    )
+
+
+def downgrade() -> None:
+    # Data-only resync: nothing to undo.
+    pass
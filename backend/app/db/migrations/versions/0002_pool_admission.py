@@ -0,0 +1,48 @@
+"""pool_admission waiting room table
+
+Revision ID: 0002_pool_admission
+Revises: 0001_resync_pool_tickets_sold
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0002_pool_admission"
+down_revision = "0001_resync_pool_tickets_sold"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pool_admission",
+        sa.Column("entry_id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "pool_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("raffle_pool.pool_id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("app_user.user_id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("status", sa.String(), nullable=False, server_default="WAITING"),
+        sa.Column("enqueued_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("admitted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("pool_id", "user_id", name="uq_pool_admission_pool_user"),
+    )
+    op.create_index(
+        "ix_pool_admission_pool_status_entry",
+        "pool_admission",
+        ["pool_id", "status", "entry_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_pool_admission_pool_status_entry", table_name="pool_admission")
+    op.drop_table("pool_admission")
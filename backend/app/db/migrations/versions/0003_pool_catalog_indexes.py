@@ -0,0 +1,55 @@
+"""keyset indexes for the pool catalog sorts
+
+Revision ID: 0003_pool_catalog_indexes
+Revises: 0002_pool_admission
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_pool_catalog_indexes"
+down_revision = "0002_pool_admission"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # raffle_pool is hot during sales: build without blocking writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_raffle_pool_created_at_pool_id",
+            "raffle_pool",
+            ["created_at", "pool_id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_raffle_pool_likes_pool_id",
+            "raffle_pool",
+            ["likes", "pool_id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_raffle_pool_fill_ratio_pool_id",
+            "raffle_pool",
+            [sa.text("(tickets_sold::float8 / NULLIF(tickets_required, 0)::float8)"), "pool_id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_raffle_pool_fill_ratio_pool_id",
+            table_name="raffle_pool",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_raffle_pool_likes_pool_id",
+            table_name="raffle_pool",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_raffle_pool_created_at_pool_id",
+            table_name="raffle_pool",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,38 @@
+"""user-side like lookups: pool_like(user_id, pool_id) index and likes_version
+
+Revision ID: 0004_pool_like_user_index
+Revises: 0003_pool_catalog_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_pool_like_user_index"
+down_revision = "0003_pool_catalog_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Constant default: metadata-only change, no table rewrite
+    op.add_column(
+        "app_user",
+        sa.Column("likes_version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_pool_like_user_id_pool_id",
+            "pool_like",
+            ["user_id", "pool_id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_pool_like_user_id_pool_id",
+            table_name="pool_like",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("app_user", "likes_version")
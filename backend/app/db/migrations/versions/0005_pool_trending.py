@@ -0,0 +1,44 @@
+"""pool_trending: incrementally maintained time-decayed pool scores
+
+Revision ID: 0005_pool_trending
+Revises: 0004_pool_like_user_index
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005_pool_trending"
+down_revision = "0004_pool_like_user_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pool_trending",
+        sa.Column(
+            "pool_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("raffle_pool.pool_id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("score_log", sa.Float(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index(
+        "ix_pool_trending_score_log_pool_id", "pool_trending", ["score_log", "pool_id"]
+    )
+    op.create_index("ix_pool_trending_updated_at", "pool_trending", ["updated_at"])
+    # Backfill from history: poetry run python -m scripts.rebuild_trending
+
+
+def downgrade() -> None:
+    op.drop_index("ix_pool_trending_updated_at", table_name="pool_trending")
+    op.drop_index("ix_pool_trending_score_log_pool_id", table_name="pool_trending")
+    op.drop_table("pool_trending")
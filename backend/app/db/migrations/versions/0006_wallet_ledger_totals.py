@@ -0,0 +1,79 @@
+"""wallet ledger: running totals on wallet_account, (created_at, entry_id) seek index
+
+Revision ID: 0006_wallet_ledger_totals
+Revises: 0005_pool_trending
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_wallet_ledger_totals"
+down_revision = "0005_pool_trending"
+branch_labels = None
+depends_on = None
+
+_TOTALS = ("ledger_entries", "ledger_debit_cents", "ledger_credit_cents")
+
+
+def upgrade() -> None:
+    for name in _TOTALS:
+        op.add_column(
+            "wallet_account",
+            sa.Column(name, sa.BigInteger(), nullable=False, server_default="0"),
+        )
+    # Backfill; from here on the totals move with every ledger write
+    op.execute(
+        """
+        UPDATE wallet_account w
+        SET ledger_entries = t.entries,
+            ledger_debit_cents = t.debit_cents,
+            ledger_credit_cents = t.credit_cents
+        FROM (
+            SELECT wallet_id,
+                   count(*) AS entries,
+                   coalesce(sum(amount_cents) FILTER (WHERE direction = 'DEBIT'), 0) AS debit_cents,
+                   coalesce(sum(amount_cents) FILTER (WHERE direction = 'CREDIT'), 0) AS credit_cents
+            FROM wallet_ledger
+            GROUP BY wallet_id
+        ) t
+        WHERE w.wallet_id = t.wallet_id
+        """
+    )
+    with op.get_context().autocommit_block():
+        # entry_id breaks created_at ties, so the seek order is total
+        op.create_index(
+            "ix_wallet_ledger_wallet_created_at_new",
+            "wallet_ledger",
+            ["wallet_id", "created_at", "entry_id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_wallet_ledger_wallet_created_at",
+            table_name="wallet_ledger",
+            postgresql_concurrently=True,
+        )
+    op.execute(
+        "ALTER INDEX ix_wallet_ledger_wallet_created_at_new "
+        "RENAME TO ix_wallet_ledger_wallet_created_at"
+    )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_wallet_ledger_wallet_created_at_old",
+            "wallet_ledger",
+            ["wallet_id", "created_at"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_wallet_ledger_wallet_created_at",
+            table_name="wallet_ledger",
+            postgresql_concurrently=True,
+        )
+    op.execute(
+        "ALTER INDEX ix_wallet_ledger_wallet_created_at_old "
+        "RENAME TO ix_wallet_ledger_wallet_created_at"
+    )
+    for name in reversed(_TOTALS):
+        op.drop_column("wallet_account", name)
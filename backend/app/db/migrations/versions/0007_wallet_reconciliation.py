@@ -0,0 +1,75 @@
+"""wallet reconciliation: per-wallet balance checkpoints and resumable runs
+
+Revision ID: 0007_wallet_reconciliation
+Revises: 0006_wallet_ledger_totals
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0007_wallet_reconciliation"
+down_revision = "0006_wallet_ledger_totals"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "wallet_balance_checkpoint",
+        sa.Column(
+            "wallet_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("wallet_account.wallet_id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("settled_before", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("posted_cents", sa.BigInteger(), nullable=False),
+        sa.Column("posted_entries", sa.BigInteger(), nullable=False),
+        sa.Column("drift_cents", sa.BigInteger(), nullable=False),
+        sa.Column("run_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column(
+            "checked_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index(
+        "ix_wallet_balance_checkpoint_drift",
+        "wallet_balance_checkpoint",
+        ["wallet_id"],
+        postgresql_where=sa.text("drift_cents <> 0"),
+    )
+    op.create_table(
+        "wallet_reconciliation_run",
+        sa.Column("run_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("settled_before", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("cursor_wallet_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("wallets_checked", sa.BigInteger(), nullable=False),
+        sa.Column("entries_summed", sa.BigInteger(), nullable=False),
+        sa.Column("drifted_wallets", sa.BigInteger(), nullable=False),
+        sa.Column("drift_cents_abs", sa.BigInteger(), nullable=False),
+        sa.Column("active_seconds", sa.Float(), nullable=False),
+        sa.Column(
+            "started_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "uq_wallet_reconciliation_run_open",
+        "wallet_reconciliation_run",
+        ["status"],
+        unique=True,
+        postgresql_where=sa.text("finished_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("wallet_reconciliation_run")
+    op.drop_table("wallet_balance_checkpoint")
@@ -0,0 +1,68 @@
+"""wallet holds: held_cents on wallet_account, partial indexes on ACTIVE holds
+
+Revision ID: 0008_wallet_holds
+Revises: 0007_wallet_reconciliation
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_wallet_holds"
+down_revision = "0007_wallet_reconciliation"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "wallet_account",
+        sa.Column("held_cents", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # Holds created before this revision were never applied to a balance
+    op.execute(
+        """
+        UPDATE wallet_account w
+        SET held_cents = h.held
+        FROM (
+            SELECT wallet_id, sum(amount_cents) AS held
+            FROM wallet_hold
+            WHERE status = 'ACTIVE'
+            GROUP BY wallet_id
+        ) h
+        WHERE w.wallet_id = h.wallet_id
+        """
+    )
+    op.create_check_constraint(
+        "ck_wallet_account_held_non_negative", "wallet_account", "held_cents >= 0"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_wallet_hold_active_expires_at",
+            "wallet_hold",
+            ["expires_at"],
+            postgresql_where=sa.text("status = 'ACTIVE'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_wallet_hold_active_wallet_id",
+            "wallet_hold",
+            ["wallet_id"],
+            postgresql_where=sa.text("status = 'ACTIVE'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_wallet_hold_active_wallet_id",
+            table_name="wallet_hold",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_wallet_hold_active_expires_at",
+            table_name="wallet_hold",
+            postgresql_concurrently=True,
+        )
+    op.drop_constraint("ck_wallet_account_held_non_negative", "wallet_account", type_="check")
+    op.drop_column("wallet_account", "held_cents")
@@ -0,0 +1,67 @@
+"""wallet settlement: idempotency rows for bulk pool credits, ledger index on ref_pool_id
+
+Revision ID: 0009_wallet_settlement
+Revises: 0008_wallet_holds
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0009_wallet_settlement"
+down_revision = "0008_wallet_holds"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "wallet_settlement",
+        sa.Column(
+            "pool_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("raffle_pool.pool_id"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "wallet_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("wallet_account.wallet_id"),
+            primary_key=True,
+        ),
+        sa.Column("reason", sa.String(), primary_key=True),
+        sa.Column("amount_cents", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.CheckConstraint("amount_cents > 0", name="ck_wallet_settlement_amount_positive"),
+    )
+    # Refunds issued before this revision have no settlement row: claim them
+    # so cancelling such a pool again does not pay twice
+    op.execute(
+        """
+        INSERT INTO wallet_settlement (pool_id, wallet_id, reason, amount_cents)
+        SELECT ref_pool_id, wallet_id, reason, sum(amount_cents)
+        FROM wallet_ledger
+        WHERE ref_pool_id IS NOT NULL
+          AND direction = 'CREDIT'
+          AND reason IN ('REFUND', 'PRIZE_PAYOUT')
+        GROUP BY ref_pool_id, wallet_id, reason
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_wallet_ledger_ref_pool_id",
+            "wallet_ledger",
+            ["ref_pool_id"],
+            postgresql_where=sa.text("ref_pool_id IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_wallet_ledger_ref_pool_id",
+            table_name="wallet_ledger",
+            postgresql_concurrently=True,
+        )
+    op.drop_table("wallet_settlement")
@@ -0,0 +1,46 @@
+"""wallet topup events: raw provider webhooks queued for the event processor
+
+Revision ID: 0011_wallet_topup_events
+Revises: 0010_idempotency_keys
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0011_wallet_topup_events"
+down_revision = "0010_idempotency_keys"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "wallet_topup_event",
+        sa.Column("event_id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("provider", sa.String(), nullable=False),
+        sa.Column("provider_event_id", sa.String(), nullable=False),
+        sa.Column("event_type", sa.String(), nullable=False),
+        sa.Column("topup_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("provider_txn_id", sa.String(), nullable=False),
+        sa.Column("amount_cents", sa.Integer(), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="RECEIVED"),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("received_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint(
+            "provider", "provider_event_id", name="uq_wallet_topup_event_provider_event"
+        ),
+    )
+    op.create_index(
+        "ix_wallet_topup_event_received",
+        "wallet_topup_event",
+        ["event_id"],
+        postgresql_where=sa.text("status = 'RECEIVED'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wallet_topup_event_received", table_name="wallet_topup_event")
+    op.drop_table("wallet_topup_event")
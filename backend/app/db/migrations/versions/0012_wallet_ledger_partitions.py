@@ -0,0 +1,228 @@
+"""wallet ledger: monthly range partitions, archive table, referenced-entry registry
+
+Revision ID: 0012_wallet_ledger_partitions
+Revises: 0011_wallet_topup_events
+Create Date: 2026-10-18
+
+Rebuilds ``wallet_ledger`` as a table partitioned by month on ``created_at``
+(rows are copied; run it in a maintenance window on large ledgers). The
+primary key becomes ``(entry_id, created_at)``; ``purchase.wallet_entry_id``
+and ``ticket.wallet_entry_id`` now reference ``wallet_ledger_ref``, backfilled
+with every entry they point to.
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0012_wallet_ledger_partitions"
+down_revision = "0011_wallet_topup_events"
+branch_labels = None
+depends_on = None
+
+_MONTHS_AHEAD = 3
+_COLUMNS = (
+    "entry_id, wallet_id, direction, amount_cents, reason, status, "
+    "ref_purchase_id, ref_pool_id, ref_ticket_id, ref_external_txn, created_at"
+)
+_REFERENCING = ("purchase", "ticket")
+
+
+def _month(moment: datetime, months: int = 0) -> datetime:
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _drop_foreign_keys_to(table: str) -> None:
+    op.execute(
+        f"""
+        DO $$
+        DECLARE fk record;
+        BEGIN
+            FOR fk IN
+                SELECT conrelid::regclass AS source, conname FROM pg_constraint
+                WHERE contype = 'f' AND confrelid = '{table}'::regclass
+            LOOP
+                EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', fk.source, fk.conname);
+            END LOOP;
+        END $$
+        """
+    )
+
+
+def _ledger_columns(live: bool) -> list[sa.Column]:
+    """Ledger columns; the archive has no defaults and no foreign keys of its own."""
+
+    def fk(target: str) -> tuple:
+        return (sa.ForeignKey(target),) if live else ()
+
+    def default(value):
+        return value if live else None
+
+    return [
+        sa.Column(
+            "entry_id",
+            sa.BigInteger(),
+            nullable=False,
+            server_default=default(sa.text("nextval('wallet_ledger_entry_id_seq')")),
+        ),
+        sa.Column("wallet_id", postgresql.UUID(as_uuid=True), *fk("wallet_account.wallet_id"), nullable=False),
+        sa.Column("direction", sa.String(), nullable=False),
+        sa.Column("amount_cents", sa.Integer(), nullable=False),
+        sa.Column("reason", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("ref_purchase_id", postgresql.UUID(as_uuid=True), *fk("purchase.purchase_id"), nullable=True),
+        sa.Column("ref_pool_id", postgresql.UUID(as_uuid=True), *fk("raffle_pool.pool_id"), nullable=True),
+        sa.Column("ref_ticket_id", sa.BigInteger(), *fk("ticket.ticket_id"), nullable=True),
+        sa.Column("ref_external_txn", sa.String(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=default(sa.func.now()),
+        ),
+    ]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    _drop_foreign_keys_to("wallet_ledger")
+    op.execute("ALTER TABLE wallet_ledger RENAME TO wallet_ledger_unpartitioned")
+    op.execute("ALTER INDEX wallet_ledger_pkey RENAME TO wallet_ledger_unpartitioned_pkey")
+    op.execute(
+        "ALTER INDEX ix_wallet_ledger_wallet_created_at "
+        "RENAME TO ix_wallet_ledger_unpartitioned_wallet_created_at"
+    )
+    op.execute(
+        "ALTER INDEX ix_wallet_ledger_ref_pool_id RENAME TO ix_wallet_ledger_unpartitioned_ref_pool_id"
+    )
+
+    op.create_table(
+        "wallet_ledger",
+        *_ledger_columns(live=True),
+        sa.PrimaryKeyConstraint("entry_id", "created_at", name="pk_wallet_ledger"),
+        sa.CheckConstraint("amount_cents > 0", name="ck_wallet_ledger_amount_positive"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.execute("ALTER SEQUENCE wallet_ledger_entry_id_seq OWNED BY wallet_ledger.entry_id")
+    op.execute("CREATE TABLE wallet_ledger_default PARTITION OF wallet_ledger DEFAULT")
+
+    now = bind.execute(sa.text("SELECT now()")).scalar_one()
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM wallet_ledger_unpartitioned")).scalar()
+    month, last = _month(oldest or now), _month(now, _MONTHS_AHEAD)
+    while month <= last:
+        upper = _month(month, 1)
+        op.execute(
+            f"CREATE TABLE wallet_ledger_p{month:%Y%m} PARTITION OF wallet_ledger "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+    op.execute(
+        f"INSERT INTO wallet_ledger ({_COLUMNS}) "
+        f"SELECT {_COLUMNS.replace('created_at', 'coalesce(created_at, now())')} "
+        "FROM wallet_ledger_unpartitioned"
+    )
+    op.drop_table("wallet_ledger_unpartitioned")
+    # Built after the copy; created on the parent, they cascade to every partition
+    op.create_index(
+        "ix_wallet_ledger_wallet_created_at",
+        "wallet_ledger",
+        ["wallet_id", "created_at", "entry_id"],
+    )
+    op.create_index(
+        "ix_wallet_ledger_ref_pool_id",
+        "wallet_ledger",
+        ["ref_pool_id"],
+        postgresql_where=sa.text("ref_pool_id IS NOT NULL"),
+    )
+
+    op.create_table(
+        "wallet_ledger_archive",
+        *_ledger_columns(live=False),
+        sa.PrimaryKeyConstraint("entry_id", "created_at", name="pk_wallet_ledger_archive"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        "ix_wallet_ledger_archive_wallet_created_at",
+        "wallet_ledger_archive",
+        ["wallet_id", "created_at", "entry_id"],
+    )
+
+    op.create_table(
+        "wallet_ledger_ref",
+        sa.Column("entry_id", sa.BigInteger(), primary_key=True, autoincrement=False),
+        sa.Column(
+            "wallet_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("wallet_account.wallet_id"),
+            nullable=False,
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.execute(
+        """
+        INSERT INTO wallet_ledger_ref (entry_id, wallet_id, created_at)
+        SELECT l.entry_id, l.wallet_id, l.created_at
+        FROM wallet_ledger l
+        WHERE l.entry_id IN (
+            SELECT wallet_entry_id FROM purchase WHERE wallet_entry_id IS NOT NULL
+            UNION
+            SELECT wallet_entry_id FROM ticket WHERE wallet_entry_id IS NOT NULL
+        )
+        """
+    )
+    for table in _REFERENCING:
+        op.create_foreign_key(
+            f"{table}_wallet_entry_id_fkey",
+            table,
+            "wallet_ledger_ref",
+            ["wallet_entry_id"],
+            ["entry_id"],
+        )
+
+
+def downgrade() -> None:
+    for table in _REFERENCING:
+        op.drop_constraint(f"{table}_wallet_entry_id_fkey", table, type_="foreignkey")
+    op.drop_table("wallet_ledger_ref")
+
+    op.create_table(
+        "wallet_ledger_unpartitioned",
+        *_ledger_columns(live=True),
+        sa.PrimaryKeyConstraint("entry_id", name="wallet_ledger_unpartitioned_pkey"),
+        sa.CheckConstraint("amount_cents > 0", name="ck_wallet_ledger_amount_positive"),
+    )
+    op.execute(
+        f"INSERT INTO wallet_ledger_unpartitioned ({_COLUMNS}) "
+        f"SELECT {_COLUMNS} FROM wallet_ledger "
+        f"UNION ALL SELECT {_COLUMNS} FROM wallet_ledger_archive"
+    )
+    op.execute(
+        "ALTER SEQUENCE wallet_ledger_entry_id_seq OWNED BY wallet_ledger_unpartitioned.entry_id"
+    )
+    # Partitions go with their parents
+    op.execute("DROP TABLE wallet_ledger_archive CASCADE")
+    op.execute("DROP TABLE wallet_ledger CASCADE")
+    op.execute("ALTER TABLE wallet_ledger_unpartitioned RENAME TO wallet_ledger")
+    op.execute("ALTER INDEX wallet_ledger_unpartitioned_pkey RENAME TO wallet_ledger_pkey")
+    op.create_index(
+        "ix_wallet_ledger_wallet_created_at",
+        "wallet_ledger",
+        ["wallet_id", "created_at", "entry_id"],
+    )
+    op.create_index(
+        "ix_wallet_ledger_ref_pool_id",
+        "wallet_ledger",
+        ["ref_pool_id"],
+        postgresql_where=sa.text("ref_pool_id IS NOT NULL"),
+    )
+    for table in _REFERENCING:
+        op.create_foreign_key(
+            f"{table}_wallet_entry_id_fkey",
+            table,
+            "wallet_ledger",
+            ["wallet_entry_id"],
+            ["entry_id"],
+        )
@@ -0,0 +1,31 @@
+"""purchase exports: purchase(created_at, purchase_id) index
+
+Revision ID: 0013_purchase_created_at_index
+Revises: 0012_wallet_ledger_partitions
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0013_purchase_created_at_index"
+down_revision = "0012_wallet_ledger_partitions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_purchase_created_at",
+            "purchase",
+            ["created_at", "purchase_id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_purchase_created_at",
+            table_name="purchase",
+            postgresql_concurrently=True,
+        )
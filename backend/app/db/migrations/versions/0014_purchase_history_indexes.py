@@ -0,0 +1,42 @@
+"""purchase history: purchase(user_id, created_at, purchase_id) and purchase(pool_id) indexes
+
+Revision ID: 0014_purchase_history_indexes
+Revises: 0013_purchase_created_at_index
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0014_purchase_history_indexes"
+down_revision = "0013_purchase_created_at_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_purchase_user_created_at",
+            "purchase",
+            ["user_id", "created_at", "purchase_id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_purchase_pool_id",
+            "purchase",
+            ["pool_id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_purchase_pool_id",
+            table_name="purchase",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_purchase_user_created_at",
+            table_name="purchase",
+            postgresql_concurrently=True,
+        )
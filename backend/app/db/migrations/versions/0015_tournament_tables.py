@@ -0,0 +1,124 @@
+"""tournaments: tournaments, phases and participants, scheduler indexes
+
+Revision ID: 0015_tournament_tables
+Revises: 0014_purchase_history_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0015_tournament_tables"
+down_revision = "0014_purchase_history_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tournaments",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "pool_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("raffle_pool.pool_id"),
+            nullable=False,
+            unique=True,
+        ),
+        sa.Column("title", sa.String(length=200), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("total_phases", sa.Integer(), nullable=False),
+        sa.Column("current_phase", sa.Integer(), nullable=True),
+        sa.Column("scheduled_start_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_tournaments_ready_start",
+        "tournaments",
+        ["scheduled_start_at"],
+        postgresql_where=sa.text("status = 'ready'"),
+    )
+    op.create_table(
+        "tournament_phases",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "tournament_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("tournaments.id"),
+            nullable=False,
+        ),
+        sa.Column("phase_number", sa.Integer(), nullable=False),
+        sa.Column("game_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("level_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("title", sa.String(length=100), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("duration_hours", sa.Integer(), nullable=True),
+        sa.Column("elimination_rule", sa.JSON(), nullable=True),
+        sa.Column("min_score", sa.Integer(), nullable=True),
+        sa.Column("max_time_seconds", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("deadline_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("participants_count", sa.Integer(), nullable=True),
+        sa.Column("qualified_count", sa.Integer(), nullable=True),
+    )
+    op.create_index(
+        "ix_tournament_phases_active_deadline",
+        "tournament_phases",
+        ["deadline_at"],
+        postgresql_where=sa.text("status = 'active'"),
+    )
+    op.create_table(
+        "tournament_participants",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "tournament_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("tournaments.id"),
+            nullable=False,
+        ),
+        sa.Column(
+            "phase_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("tournament_phases.id"),
+            nullable=False,
+        ),
+        sa.Column(
+            "player_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("app_user.user_id"),
+            nullable=False,
+        ),
+        sa.Column("qualified", sa.Boolean(), nullable=False),
+        sa.Column("best_score", sa.Integer(), nullable=True),
+        sa.Column("best_time_seconds", sa.Integer(), nullable=True),
+        sa.Column("sessions_count", sa.Integer(), nullable=False),
+        sa.Column("last_played_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("eliminated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("qualified_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint(
+            "phase_id", "player_id", name="uq_tournament_participant_phase_player"
+        ),
+    )
+    op.create_index(
+        "ix_tournament_participants_phase_rank",
+        "tournament_participants",
+        [
+            "phase_id",
+            sa.text("best_score DESC NULLS LAST"),
+            sa.text("best_time_seconds ASC NULLS LAST"),
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_tournament_participants_phase_rank", table_name="tournament_participants"
+    )
+    op.drop_table("tournament_participants")
+    op.drop_index("ix_tournament_phases_active_deadline", table_name="tournament_phases")
+    op.drop_table("tournament_phases")
+    op.drop_index("ix_tournaments_ready_start", table_name="tournaments")
+    op.drop_table("tournaments")
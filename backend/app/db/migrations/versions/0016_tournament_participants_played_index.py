@@ -0,0 +1,31 @@
+"""live leaderboards: tournament_participants(phase_id, last_played_at) index
+
+Revision ID: 0016_tournament_participants_played_index
+Revises: 0015_tournament_tables
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0016_tournament_participants_played_index"
+down_revision = "0015_tournament_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tournament_participants_phase_played",
+            "tournament_participants",
+            ["phase_id", "last_played_at"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tournament_participants_phase_played",
+            table_name="tournament_participants",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,30 @@
+"""pool refunds: wallet_ledger_archive(ref_pool_id) partial index
+
+Revision ID: 0017_wallet_ledger_archive_pool_index
+Revises: 0016_tournament_participants_played_index
+Create Date: 2026-10-18
+
+Refunds also sum the ticket debits of archived months. Months archived so far
+keep the ``ref_pool_id`` index they had under ``wallet_ledger``: the new
+partitioned index attaches them instead of building new ones (no
+``CONCURRENTLY`` on a partitioned table; the archive takes no writes).
+"""
+from alembic import op
+
+revision = "0017_wallet_ledger_archive_pool_index"
+down_revision = "0016_tournament_participants_played_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_wallet_ledger_archive_ref_pool_id",
+        "wallet_ledger_archive",
+        ["ref_pool_id"],
+        postgresql_where="ref_pool_id IS NOT NULL",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wallet_ledger_archive_ref_pool_id", table_name="wallet_ledger_archive")
@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from app.api.v1.routers.pool import router as pool_router
 from app.api.v1.routers.prize import router as prize_router
@@ -5,10 +8,67 @@ from app.api.v1.routers.ticket import router as ticket_router
 from app.api.v1.routers.purchase import router as purchase_router
 from app.api.v1.routers.wallet import router as wallet_router
 from app.api.v1.routers.user import router as user_router
+from app.api.v1.routers.metrics import router as metrics_router
+from app.api.v1.routers.webhook import router as webhook_router
+from app.api.v1.routers.export import router as export_router
+from app.api.v1.routers.tournament import router as tournament_router
+from app.api.v1.idempotency import IdempotencyMiddleware
 from app.core.config import settings
+from app.db.session import async_session, engine
+from app.services.idempotency import idempotency_store
+from app.services.pool_like import like_counter
+from app.services.topup_webhook import topup_event_processor
+from app.services.tournament_leaderboard import tournament_leaderboards
+from app.services.tournament_scheduler import tournament_scheduler
+from app.services.trending import trending_engine
+from app.services.wallet_hold import hold_sweeper
+from app.services.wallet_ledger_partitions import ledger_partitioner
+from app.services.wallet_reconciliation import wallet_reconciler
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background jobs live for the whole process; each is flushed/cancelled on shutdown
+    tasks = [
+        asyncio.create_task(
+            like_counter.run(async_session, settings.LIKES_FLUSH_INTERVAL_SECONDS)
+        ),
+        asyncio.create_task(
+            trending_engine.run(
+                async_session,
+                interval_seconds=settings.TRENDING_REFRESH_SECONDS,
+                full_reload_seconds=settings.TRENDING_FULL_RELOAD_SECONDS,
+            )
+        ),
+        asyncio.create_task(ledger_partitioner.run(async_session)),
+        asyncio.create_task(wallet_reconciler.run(async_session)),
+        asyncio.create_task(hold_sweeper.run(async_session)),
+        asyncio.create_task(topup_event_processor.run(async_session)),
+        asyncio.create_task(tournament_scheduler.run(async_session, engine)),
+        asyncio.create_task(
+            tournament_leaderboards.run(
+                async_session,
+                interval_seconds=settings.TOURNAMENT_LEADERBOARD_REFRESH_SECONDS,
+                full_reload_seconds=settings.TOURNAMENT_LEADERBOARD_FULL_RELOAD_SECONDS,
+            )
+        ),
+        asyncio.create_task(
+            idempotency_store.run(async_session, settings.IDEMPOTENCY_PURGE_SECONDS)
+        ),
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await like_counter.flush(async_session)
+        await trending_engine.flush(async_session)
+        await tournament_leaderboards.flush(async_session)
+
+
+app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, lifespan=lifespan)
 
 # metti qui gli origin del tuo frontend web
 ALLOWED_ORIGINS = [
@@ -16,6 +76,9 @@ ALLOWED_ORIGINS = [
     "http://192.168.1.23:8080",    
 ]
 
+# Added before CORS so that CORS stays the outermost layer
+app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -30,3 +93,7 @@ app.include_router(ticket_router, prefix="/api/v1/tickets", tags=["Tickets"])
 app.include_router(user_router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(purchase_router, prefix="/api/v1/purchases", tags=["Purchases"])
 app.include_router(wallet_router, prefix="/api/v1/wallet", tags=["Wallet"])
+app.include_router(webhook_router, prefix="/api/v1/webhooks", tags=["Webhooks"])
+app.include_router(export_router, prefix="/api/v1/exports", tags=["Exports"])
+app.include_router(tournament_router, prefix="/api/v1/tournaments", tags=["Tournaments"])
+app.include_router(metrics_router, prefix="/api/v1/metrics", tags=["Metrics"])
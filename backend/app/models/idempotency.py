@@ -0,0 +1,37 @@
+from enum import Enum
+
+from sqlalchemy import Column, DateTime, Index, Integer, LargeBinary, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db.base import Base
+
+
+class IdempotencyStatus(str, Enum):
+    IN_PROGRESS = "IN_PROGRESS"
+    COMPLETED = "COMPLETED"
+
+
+class IdempotencyKey(Base):
+    """A client ``Idempotency-Key`` and the response its first request produced.
+
+    While the first request runs the row is IN_PROGRESS and ``locked_until``
+    bounds how long duplicates wait for it; past it, with no response stored,
+    the outcome is unknown and duplicates are refused. Once COMPLETED, retries
+    with the same fingerprint get the stored response until ``expires_at``.
+    """
+
+    __tablename__ = "idempotency_key"
+    __table_args__ = (Index("ix_idempotency_key_expires_at", "expires_at"),)
+
+    # Authenticated subject: keys are only unique per user
+    scope = Column(String, primary_key=True)
+    key = Column(String(255), primary_key=True)
+    # sha256 of method, path, query string and body
+    fingerprint = Column(String(64), nullable=False)
+    status = Column(String, nullable=False, default=IdempotencyStatus.IN_PROGRESS.value)
+    response_status = Column(Integer, nullable=True)
+    response_headers = Column(JSONB, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 
@@ -14,3 +14,16 @@ class RafflePool(Base):
     likes = Column(Integer, default=0)
     state = Column(String, default="OPEN")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Keyset pagination indexes for the pool catalog sorts (newest, most liked,
+    # closest to full). The fill-ratio expression must stay identical to
+    # POOL_FILL_RATIO in app/services/pool.py for the planner to use it.
+    __table_args__ = (
+        Index("ix_raffle_pool_created_at_pool_id", "created_at", "pool_id"),
+        Index("ix_raffle_pool_likes_pool_id", "likes", "pool_id"),
+        Index(
+            "ix_raffle_pool_fill_ratio_pool_id",
+            text("(tickets_sold::float8 / NULLIF(tickets_required, 0)::float8)"),
+            "pool_id",
+        ),
+    )
@@ -0,0 +1,46 @@
+from enum import Enum
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    String,
+    DateTime,
+    ForeignKey,
+    UniqueConstraint,
+    Index,
+    func,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class PoolAdmissionStatus(str, Enum):
+    WAITING = "WAITING"
+    ADMITTED = "ADMITTED"
+
+
+class PoolAdmission(Base):
+    """Shared waiting-room entry used by the Postgres admission backend."""
+
+    __tablename__ = "pool_admission"
+    __table_args__ = (
+        UniqueConstraint("pool_id", "user_id", name="uq_pool_admission_pool_user"),
+        Index("ix_pool_admission_pool_status_entry", "pool_id", "status", "entry_id"),
+    )
+
+    # Monotonic id doubles as the FIFO order of the queue
+    entry_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    pool_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("raffle_pool.pool_id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("app_user.user_id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    status = Column(String, nullable=False, default=PoolAdmissionStatus.WAITING.value)
+    enqueued_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    admitted_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.db.base import Base
@@ -23,5 +23,7 @@ class PoolLike(Base):
 
     __table_args__ = (
         UniqueConstraint("pool_id", "user_id", name="uq_pool_like_pool_user"),
+        # The PK leads with pool_id; this serves "pools liked by a user"
+        Index("ix_pool_like_user_id_pool_id", "user_id", "pool_id"),
     )
 
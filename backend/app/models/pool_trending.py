@@ -0,0 +1,28 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class PoolTrending(Base):
+    """Time-decayed activity score of a pool (see app/services/trending.py).
+
+    ``score_log`` is the base-2 log of the forward-decayed score: every event
+    adds ``weight * 2 ** ((t - epoch) / half_life)``, so the ordering never
+    needs recomputing as time passes and the current score is
+    ``2 ** (score_log - (now - epoch) / half_life)``.
+    """
+
+    __tablename__ = "pool_trending"
+    __table_args__ = (
+        Index("ix_pool_trending_score_log_pool_id", "score_log", "pool_id"),
+        Index("ix_pool_trending_updated_at", "updated_at"),
+    )
+
+    pool_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("raffle_pool.pool_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    score_log = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -9,6 +9,7 @@ from sqlalchemy import (
     func,
     CheckConstraint,
     BigInteger,
+    Index,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
@@ -28,12 +29,17 @@ class Purchase(Base):
     __table_args__ = (
         CheckConstraint("type IN ('ENTRY','BOOST','RETRY')", name="ck_purchase_type"),
         CheckConstraint("status IN ('PENDING','CONFIRMED','FAILED')", name="ck_purchase_status"),
+        # Date-range exports read purchases in (created_at, purchase_id) order
+        Index("ix_purchase_created_at", "created_at", "purchase_id"),
+        # Per-user history pages, newest first
+        Index("ix_purchase_user_created_at", "user_id", "created_at", "purchase_id"),
+        Index("ix_purchase_pool_id", "pool_id"),
     )
 
     purchase_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("app_user.user_id"), nullable=False)
     pool_id = Column(UUID(as_uuid=True), ForeignKey("raffle_pool.pool_id"), nullable=False)
-    wallet_entry_id = Column(BigInteger, ForeignKey("wallet_ledger.entry_id"), nullable=True)
+    wallet_entry_id = Column(BigInteger, ForeignKey("wallet_ledger_ref.entry_id"), nullable=True)
     wallet_hold_id = Column(UUID(as_uuid=True), ForeignKey("wallet_hold.hold_id"), nullable=True)
     type = Column(String, nullable=False, default=PurchaseType.ENTRY.value)
     amount_cents = Column(Integer, nullable=False)
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from enum import Enum
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Boolean, Text, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -27,10 +27,19 @@ class Tournament(Base):
     completed_at = Column(DateTime(timezone=True))
 
     # Relationships
-    pool = relationship("RafflePool", back_populates="tournament")
+    pool = relationship("RafflePool")
     phases = relationship("TournamentPhase", back_populates="tournament", cascade="all, delete-orphan")
     participants = relationship("TournamentParticipant", back_populates="tournament")
 
+    __table_args__ = (
+        # Upcoming starts, read by the tournament scheduler
+        Index(
+            "ix_tournaments_ready_start",
+            "scheduled_start_at",
+            postgresql_where=text("status = 'ready'"),
+        ),
+    )
+
     def is_ready_to_start(self) -> bool:
         return (
             self.status == TournamentStatus.READY and
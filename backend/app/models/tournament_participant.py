@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+import uuid
+from app.db.base import Base
+
+class TournamentParticipant(Base):
+    __tablename__ = "tournament_participants"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tournament_id = Column(UUID(as_uuid=True), ForeignKey("tournaments.id"), nullable=False)
+    phase_id = Column(UUID(as_uuid=True), ForeignKey("tournament_phases.id"), nullable=False)
+    player_id = Column(UUID(as_uuid=True), ForeignKey("app_user.user_id"), nullable=False)
+    qualified = Column(Boolean, nullable=False, default=False)
+    best_score = Column(Integer)
+    best_time_seconds = Column(Integer)
+    sessions_count = Column(Integer, nullable=False, default=0)
+    last_played_at = Column(DateTime(timezone=True))
+    eliminated_at = Column(DateTime(timezone=True))
+    qualified_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    tournament = relationship("Tournament", back_populates="participants")
+    phase = relationship("TournamentPhase", back_populates="participants")
+
+    __table_args__ = (
+        UniqueConstraint("phase_id", "player_id", name="uq_tournament_participant_phase_player"),
+        # Phase leaderboard order: the elimination ranking reads it without a sort
+        Index(
+            "ix_tournament_participants_phase_rank",
+            "phase_id",
+            best_score.desc().nulls_last(),
+            best_time_seconds.asc().nulls_last(),
+        ),
+        # Leaderboard refresh: rows played since the last one
+        Index("ix_tournament_participants_phase_played", "phase_id", "last_played_at"),
+    )
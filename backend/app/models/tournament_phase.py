@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from enum import Enum
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Boolean, Text, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -18,8 +18,9 @@ class TournamentPhase(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tournament_id = Column(UUID(as_uuid=True), ForeignKey("tournaments.id"), nullable=False)
     phase_number = Column(Integer, nullable=False)
-    game_id = Column(UUID(as_uuid=True), ForeignKey("games.id"), nullable=False)
-    level_id = Column(UUID(as_uuid=True), ForeignKey("levels.id"))
+    # Games and levels are served by the game catalog, not stored in this schema
+    game_id = Column(UUID(as_uuid=True), nullable=False)
+    level_id = Column(UUID(as_uuid=True))
     title = Column(String(100), nullable=False)
     description = Column(Text)
     duration_hours = Column(Integer, default=72)  # 3 days default
@@ -35,7 +36,15 @@ class TournamentPhase(Base):
     # Relationships
     tournament = relationship("Tournament", back_populates="phases")
     participants = relationship("TournamentParticipant", back_populates="phase")
-    sessions = relationship("TournamentSession", back_populates="phase")
+
+    __table_args__ = (
+        # Upcoming deadlines, read by the tournament scheduler
+        Index(
+            "ix_tournament_phases_active_deadline",
+            "deadline_at",
+            postgresql_where=text("status = 'active'"),
+        ),
+    )
 
     def is_expired(self) -> bool:
         return self.deadline_at and datetime.utcnow() > self.deadline_at
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, func
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 
@@ -12,3 +12,5 @@ class User(Base):
     avatar_character = Column(String(64))
     avatar_asset = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every effective like/unlike; ETag of the user's liked-pool set
+    likes_version = Column(BigInteger, nullable=False, server_default="0")
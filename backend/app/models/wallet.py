@@ -1,6 +1,7 @@
 import uuid
 from enum import Enum
 from sqlalchemy import (
+    DDL,
     Column,
     BigInteger,
     Integer,
@@ -11,8 +12,10 @@ from sqlalchemy import (
     CheckConstraint,
     UniqueConstraint,
     Index,
+    PrimaryKeyConstraint,
+    event,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from app.db.base import Base
 
 
@@ -66,24 +69,52 @@ class WalletAccount(Base):
     __tablename__ = "wallet_account"
     __table_args__ = (
         UniqueConstraint("user_id", name="uq_wallet_account_user"),
+        CheckConstraint("held_cents >= 0", name="ck_wallet_account_held_non_negative"),
     )
 
     wallet_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("app_user.user_id"), nullable=False)
     balance_cents = Column(Integer, nullable=False, default=0)
+    # Sum of ACTIVE holds; spendable funds are balance_cents - held_cents
+    held_cents = Column(Integer, nullable=False, default=0, server_default="0")
     currency = Column(String(3), nullable=False, default="EUR")
     status = Column(String, nullable=False, default=WalletStatus.ACTIVE.value)
+    # Running ledger totals, maintained by the statement that appends each entry
+    ledger_entries = Column(BigInteger, nullable=False, default=0, server_default="0")
+    ledger_debit_cents = Column(BigInteger, nullable=False, default=0, server_default="0")
+    ledger_credit_cents = Column(BigInteger, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    @property
+    def available_cents(self) -> int:
+        return self.balance_cents - (self.held_cents or 0)
+
 
 class WalletLedgerEntry(Base):
+    """Append-only ledger, range-partitioned by month on ``created_at``.
+
+    Monthly partitions (``wallet_ledger_pYYYYMM``) are created ahead of time and
+    cold ones moved to ``wallet_ledger_archive`` by
+    app/services/wallet_ledger_partitions.py; rows outside every monthly
+    partition land in ``wallet_ledger_default``.
+    """
+
     __tablename__ = "wallet_ledger"
     __table_args__ = (
+        # The partition key must be part of every unique constraint
+        PrimaryKeyConstraint("entry_id", "created_at", name="pk_wallet_ledger"),
         CheckConstraint("amount_cents > 0", name="ck_wallet_ledger_amount_positive"),
-        Index("ix_wallet_ledger_wallet_created_at", "wallet_id", "created_at"),
+        Index("ix_wallet_ledger_wallet_created_at", "wallet_id", "created_at", "entry_id"),
+        # Pool settlements sum the pool's ticket debits; most entries have no pool
+        Index(
+            "ix_wallet_ledger_ref_pool_id",
+            "ref_pool_id",
+            postgresql_where="ref_pool_id IS NOT NULL",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
-    entry_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    entry_id = Column(BigInteger, autoincrement=True, nullable=False)
     wallet_id = Column(UUID(as_uuid=True), ForeignKey("wallet_account.wallet_id"), nullable=False)
     direction = Column(String, nullable=False)
     amount_cents = Column(Integer, nullable=False)
@@ -93,7 +124,67 @@ class WalletLedgerEntry(Base):
     ref_pool_id = Column(UUID(as_uuid=True), ForeignKey("raffle_pool.pool_id"), nullable=True)
     ref_ticket_id = Column(BigInteger, ForeignKey("ticket.ticket_id"), nullable=True)
     ref_external_txn = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __mapper_args__ = {"primary_key": [entry_id]}
+
+
+# Catch-all partition, so that a database built from the models accepts writes
+# before the partition maintainer has created the monthly partitions
+event.listen(
+    WalletLedgerEntry.__table__,
+    "after_create",
+    DDL("CREATE TABLE wallet_ledger_default PARTITION OF wallet_ledger DEFAULT"),
+)
+
+
+class WalletLedgerArchiveEntry(Base):
+    """Cold ledger months, detached from ``wallet_ledger`` and attached here as-is."""
+
+    __tablename__ = "wallet_ledger_archive"
+    __table_args__ = (
+        PrimaryKeyConstraint("entry_id", "created_at", name="pk_wallet_ledger_archive"),
+        Index(
+            "ix_wallet_ledger_archive_wallet_created_at", "wallet_id", "created_at", "entry_id"
+        ),
+        # Refunds of pools whose ticket debits reach back into archived months
+        Index(
+            "ix_wallet_ledger_archive_ref_pool_id",
+            "ref_pool_id",
+            postgresql_where="ref_pool_id IS NOT NULL",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    entry_id = Column(BigInteger, nullable=False)
+    wallet_id = Column(UUID(as_uuid=True), nullable=False)
+    direction = Column(String, nullable=False)
+    amount_cents = Column(Integer, nullable=False)
+    reason = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    ref_purchase_id = Column(UUID(as_uuid=True), nullable=True)
+    ref_pool_id = Column(UUID(as_uuid=True), nullable=True)
+    ref_ticket_id = Column(BigInteger, nullable=True)
+    ref_external_txn = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    __mapper_args__ = {"primary_key": [entry_id]}
+
+
+class WalletLedgerRef(Base):
+    """Ledger entries referenced by other tables (``purchase``, ``ticket``).
+
+    A foreign key cannot target ``wallet_ledger.entry_id`` alone once the ledger
+    is partitioned, and would pin its partitions in place. Referencing rows
+    point here instead; entries are registered when first referenced and keep
+    their row when their month is archived.
+    """
+
+    __tablename__ = "wallet_ledger_ref"
+
+    entry_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    wallet_id = Column(UUID(as_uuid=True), ForeignKey("wallet_account.wallet_id"), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
 
 
 class WalletTopupRequest(Base):
@@ -113,6 +204,44 @@ class WalletTopupRequest(Base):
     completed_at = Column(DateTime(timezone=True), nullable=True)
 
 
+class WalletTopupEventStatus(str, Enum):
+    RECEIVED = "RECEIVED"
+    APPLIED = "APPLIED"
+    IGNORED = "IGNORED"
+    FAILED = "FAILED"
+
+
+class WalletTopupEvent(Base):
+    """Raw top-up webhook from a payment provider, stored before it is applied."""
+
+    __tablename__ = "wallet_topup_event"
+    __table_args__ = (
+        # Providers redeliver webhooks: the same event is stored once
+        UniqueConstraint(
+            "provider", "provider_event_id", name="uq_wallet_topup_event_provider_event"
+        ),
+        # Work queue of the event processor; applied events leave the index
+        Index(
+            "ix_wallet_topup_event_received",
+            "event_id",
+            postgresql_where="status = 'RECEIVED'",
+        ),
+    )
+
+    event_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    provider = Column(String, nullable=False)
+    provider_event_id = Column(String, nullable=False)
+    event_type = Column(String, nullable=False)
+    topup_id = Column(UUID(as_uuid=True), nullable=False)
+    provider_txn_id = Column(String, nullable=False)
+    amount_cents = Column(Integer, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    status = Column(String, nullable=False, default=WalletTopupEventStatus.RECEIVED.value)
+    error = Column(String, nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+
 class WalletWithdrawalRequest(Base):
     __tablename__ = "wallet_withdrawal_request"
     __table_args__ = (
@@ -134,6 +263,17 @@ class WalletHold(Base):
     __tablename__ = "wallet_hold"
     __table_args__ = (
         CheckConstraint("amount_cents > 0", name="ck_wallet_hold_amount_positive"),
+        # Only ACTIVE holds are swept or listed; settled ones stay out of the index
+        Index(
+            "ix_wallet_hold_active_expires_at",
+            "expires_at",
+            postgresql_where="status = 'ACTIVE'",
+        ),
+        Index(
+            "ix_wallet_hold_active_wallet_id",
+            "wallet_id",
+            postgresql_where="status = 'ACTIVE'",
+        ),
     )
 
     hold_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -146,3 +286,20 @@ class WalletHold(Base):
     expires_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class WalletSettlement(Base):
+    """One credit per (pool, wallet, reason): replaying a settlement is a no-op."""
+
+    __tablename__ = "wallet_settlement"
+    __table_args__ = (
+        CheckConstraint("amount_cents > 0", name="ck_wallet_settlement_amount_positive"),
+    )
+
+    pool_id = Column(UUID(as_uuid=True), ForeignKey("raffle_pool.pool_id"), primary_key=True)
+    wallet_id = Column(
+        UUID(as_uuid=True), ForeignKey("wallet_account.wallet_id"), primary_key=True
+    )
+    reason = Column(String, primary_key=True)
+    amount_cents = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,75 @@
+import uuid
+from enum import Enum
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, ForeignKey, Index, String, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class WalletReconciliationStatus(str, Enum):
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+
+
+class WalletBalanceCheckpoint(Base):
+    """Signed sum of a wallet's POSTED ledger entries created before ``settled_before``.
+
+    A reconciliation run only sums the entries created since the previous
+    checkpoint and compares checkpoint + newer entries with ``balance_cents``.
+    """
+
+    __tablename__ = "wallet_balance_checkpoint"
+    __table_args__ = (
+        Index(
+            "ix_wallet_balance_checkpoint_drift",
+            "wallet_id",
+            postgresql_where="drift_cents <> 0",
+        ),
+    )
+
+    wallet_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("wallet_account.wallet_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    settled_before = Column(DateTime(timezone=True), nullable=False)
+    posted_cents = Column(BigInteger, nullable=False)
+    posted_entries = Column(BigInteger, nullable=False)
+    # balance_cents - signed sum of every POSTED entry, as of the last check
+    drift_cents = Column(BigInteger, nullable=False)
+    run_id = Column(UUID(as_uuid=True), nullable=True)
+    checked_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class WalletReconciliationRun(Base):
+    """Progress of one pass over all wallets; resumed from ``cursor_wallet_id``."""
+
+    __tablename__ = "wallet_reconciliation_run"
+    __table_args__ = (
+        # At most one open run, even if several workers decide to start one
+        Index(
+            "uq_wallet_reconciliation_run_open",
+            "status",
+            unique=True,
+            postgresql_where="finished_at IS NULL",
+        ),
+    )
+
+    run_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = Column(String, nullable=False, default=WalletReconciliationStatus.RUNNING.value)
+    settled_before = Column(DateTime(timezone=True), nullable=False)
+    cursor_wallet_id = Column(UUID(as_uuid=True), nullable=True)
+    wallets_checked = Column(BigInteger, nullable=False, default=0)
+    entries_summed = Column(BigInteger, nullable=False, default=0)
+    drifted_wallets = Column(BigInteger, nullable=False, default=0)
+    drift_cents_abs = Column(BigInteger, nullable=False, default=0)
+    # Time spent inside batches, so throughput is not skewed by interruptions
+    active_seconds = Column(Float, nullable=False, default=0.0)
+    started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def wallets_per_sec(self) -> float:
+        return self.wallets_checked / self.active_seconds if self.active_seconds else 0.0
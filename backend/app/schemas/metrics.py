@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class CacheStats(BaseModel):
+    name: str
+    size: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    stale_fills: int
+    hit_ratio: float
+
+
+class WalletReconciliationRun(BaseModel):
+    run_id: UUID
+    status: str
+    settled_before: datetime
+    wallets_checked: int
+    entries_summed: int
+    drifted_wallets: int
+    drift_cents_abs: int
+    active_seconds: float
+    wallets_per_sec: float
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WalletDrift(BaseModel):
+    wallet_id: UUID
+    drift_cents: int
+    checked_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WalletReconciliationReport(BaseModel):
+    runs: list[WalletReconciliationRun]
+    drifted: list[WalletDrift]
+
+
+class HoldSweepStats(BaseModel):
+    sweeps: int
+    batches: int
+    batch_size: int
+    holds_released: int
+    last_released: int
+    last_sweep_at: Optional[datetime] = None
+    last_sweep_ms: float
+    p50_sweep_ms: float
+    p99_sweep_ms: float
+
+
+class TopupWebhookStats(BaseModel):
+    workers: int
+    batch_size: int
+    received: int
+    duplicates: int
+    batches: int
+    applied: int
+    ignored: int
+    failed: int
+    backlog: int
+    oldest_pending_seconds: float
+    events_per_sec: float
+    last_batch_at: Optional[datetime] = None
+    last_batch_size: int
+    last_batch_ms: float
+    lag_p50_ms: float
+    lag_p99_ms: float
+
+
+class TournamentSchedulerStats(BaseModel):
+    is_leader: bool
+    leader_since: Optional[datetime] = None
+    scheduled: int
+    # Entries handed to the pipeline and not finished yet
+    running: int
+    next_due_at: Optional[datetime] = None
+    rebuilds: int
+    fired: int
+    skipped: int
+    failed: int
+    last_fired_at: Optional[datetime] = None
+    last_lag_ms: float
+    lag_p50_ms: float
+    lag_p99_ms: float
+    lag_max_ms: float
+
+
+class TournamentTaskRun(BaseModel):
+    tournament_id: UUID
+    event: str
+    outcome: str
+    attempts: int
+    ms: float
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class TournamentPipelineStats(BaseModel):
+    concurrency: int
+    done: int
+    skipped: int
+    failed: int
+    retries: int
+    task_p50_ms: float
+    task_p99_ms: float
+    recent: list[TournamentTaskRun]
+
+
+class TournamentLeaderboardStats(BaseModel):
+    phases: int
+    players: int
+    recorded: int
+    flushed: int
+    pending: int
+    watermark: Optional[datetime] = None
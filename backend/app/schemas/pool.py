@@ -1,7 +1,11 @@
 from datetime import datetime
+from enum import Enum
+from typing import Optional
 from uuid import UUID
 from pydantic import BaseModel
 
+from app.schemas.prize_image import PrizeImage
+
 class PoolBase(BaseModel):
     prize_id: UUID
     ticket_price_cents: int
@@ -24,3 +28,69 @@ class Pool(PoolBase):
 class LikeStatus(BaseModel):
     likes: int
     liked_by_me: bool
+    # Set on like/unlike: the caller's liked-pool set version after the toggle
+    likes_version: Optional[int] = None
+
+
+class PoolLikeStatus(BaseModel):
+    pool_id: UUID
+    likes: int
+    liked_by_me: bool
+
+
+class LikedPools(BaseModel):
+    version: int
+    pool_ids: list[UUID]
+
+
+class PoolCatalogSort(str, Enum):
+    NEWEST = "newest"
+    CLOSEST_TO_FULL = "closest_to_full"
+    MOST_LIKED = "most_liked"
+
+
+class PoolPage(BaseModel):
+    items: list[Pool]
+    next_cursor: Optional[str] = None
+
+
+class PoolCardPrize(BaseModel):
+    prize_id: UUID
+    title: str
+    description: Optional[str] = None
+    value_cents: Optional[int] = None
+    image_url: Optional[str] = None
+    sponsor: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+class PoolCard(BaseModel):
+    pool: Pool
+    prize: PoolCardPrize
+    cover_image: Optional[PrizeImage] = None
+    likes: int
+    liked_by_me: bool
+
+
+class PoolCardPage(BaseModel):
+    items: list[PoolCard]
+    next_cursor: Optional[str] = None
+
+
+class TrendingPool(BaseModel):
+    rank: int
+    score: float
+    pool: Pool
+
+
+class TrendingPage(BaseModel):
+    items: list[TrendingPool]
+    total: int
+
+
+class TrendingRank(BaseModel):
+    pool_id: UUID
+    rank: int
+    score: float
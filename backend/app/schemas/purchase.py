@@ -43,3 +43,7 @@ class Purchase(PurchaseBase):
 
     class Config:
         orm_mode = True
+
+class PurchasePage(BaseModel):
+    items: list[Purchase]
+    next_cursor: Optional[str] = None
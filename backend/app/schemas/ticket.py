@@ -2,7 +2,10 @@ from datetime import datetime
 from uuid import UUID
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.schemas.purchase import Purchase
+from app.schemas.wallet import WalletBalance
 
 class TicketBase(BaseModel):
     pool_id: UUID
@@ -23,3 +26,22 @@ class Ticket(TicketBase):
 
     class Config:
         orm_mode = True
+
+class TicketBatchPurchaseRequest(BaseModel):
+    quantity: int = Field(..., ge=1, le=50)
+
+class TicketBatch(BaseModel):
+    purchase_id: UUID
+    wallet_entry_id: int
+    requested: int
+    issued: int
+    first_ticket_num: int
+    last_ticket_num: int
+    amount_cents: int
+    balance_cents: int
+    tickets: list[Ticket]
+
+class TicketCheckout(BaseModel):
+    ticket: Ticket
+    purchase: Purchase
+    balance: WalletBalance
@@ -0,0 +1,19 @@
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    player_id: UUID
+    best_score: Optional[int] = None
+    best_time_seconds: Optional[int] = None
+
+
+class LeaderboardPage(BaseModel):
+    items: list[LeaderboardEntry]
+    total: int
+
+
+class LeaderboardRank(LeaderboardEntry):
+    total: int
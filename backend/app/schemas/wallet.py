@@ -56,6 +56,8 @@ class WalletAccount(BaseModel):
     wallet_id: UUID
     user_id: UUID
     balance_cents: int
+    held_cents: int = 0
+    available_cents: int
     currency: str
     status: WalletStatus
     created_at: datetime
@@ -117,11 +119,79 @@ class WalletTopupWithEntry(BaseModel):
 class WalletLedgerList(BaseModel):
     items: list[WalletLedgerEntry]
     total: int
+    total_debit_cents: int = 0
+    total_credit_cents: int = 0
+    next_cursor: Optional[str] = None
 
 
 class WalletBalance(BaseModel):
     wallet_id: UUID
     balance_cents: int
+    held_cents: int = 0
+    available_cents: int
     currency: str
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class WalletHoldCreate(BaseModel):
+    amount_cents: int = Field(..., gt=0)
+    ttl_seconds: Optional[int] = Field(None, ge=1, le=86_400)
+    ref_purchase_id: Optional[UUID] = None
+    ref_pool_id: Optional[UUID] = None
+
+
+class WalletHold(BaseModel):
+    hold_id: UUID
+    wallet_id: UUID
+    amount_cents: int
+    reason: str
+    status: WalletHoldStatus
+    ref_purchase_id: Optional[UUID] = None
+    ref_pool_id: Optional[UUID] = None
+    expires_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WalletHoldCapture(BaseModel):
+    hold: WalletHold
+    ledger_entry: WalletLedgerEntry
+
+
+class WalletSettlementReport(BaseModel):
+    pool_id: UUID
+    reason: WalletLedgerReason
+    requested: int
+    settled: int
+    skipped: int
+    amount_cents: int
+    holds_released: int
+    elapsed_ms: float
+    wallets_per_sec: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TopupWebhookEventType(str, Enum):
+    SUCCEEDED = "topup.succeeded"
+    FAILED = "topup.failed"
+
+
+class TopupWebhookEvent(BaseModel):
+    id: str = Field(..., min_length=1, max_length=255)
+    type: TopupWebhookEventType
+    topup_id: UUID
+    provider_txn_id: str = Field(..., min_length=1, max_length=255)
+    amount_cents: int = Field(..., gt=0)
+
+
+class TopupWebhookBatch(BaseModel):
+    events: list[TopupWebhookEvent] = Field(..., min_length=1, max_length=1000)
+
+
+class TopupWebhookAck(BaseModel):
+    received: int
+    duplicates: int
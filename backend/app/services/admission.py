@@ -0,0 +1,317 @@
+"""Flash-sale admission control (virtual waiting room) for pool purchases.
+
+Buyers of a pool go through a FIFO queue and only ``min(max_in_flight,
+seats_left)`` of them at a time are let into the purchase path; the others get
+their queue position and an ETA and are expected to retry. Once the pool is
+sold out everybody is rejected without queueing.
+"""
+from __future__ import annotations
+
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import AsyncIterator
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.pool import RafflePool
+from app.models.pool_admission import PoolAdmission, PoolAdmissionStatus
+
+
+class AdmissionBackend(ABC):
+    """Per-pool FIFO queue shared by the buyers of that pool."""
+
+    @abstractmethod
+    async def enter(self, pool_id: UUID, user_id: UUID, capacity: int) -> tuple[bool, int]:
+        """Enqueue (or refresh) a buyer and return ``(admitted, position)``.
+
+        ``capacity`` is how many buyers may be admitted at the same time;
+        ``position`` is 1-based and only meaningful when not admitted.
+        """
+
+    @abstractmethod
+    async def leave(self, pool_id: UUID, user_id: UUID) -> None:
+        """Free the buyer's slot (or drop them from the queue)."""
+
+    @abstractmethod
+    async def close(self, pool_id: UUID) -> None:
+        """Drop the whole queue of a pool that can no longer sell."""
+
+
+class _PoolQueue:
+    __slots__ = ("waiting", "seq_of", "last_seen", "next_seq", "admitted")
+
+    def __init__(self) -> None:
+        self.waiting: deque[tuple[int, UUID]] = deque()
+        self.seq_of: dict[UUID, int] = {}
+        self.last_seen: dict[UUID, float] = {}
+        self.next_seq = 0
+        self.admitted: dict[UUID, float] = {}
+
+
+class InMemoryAdmissionBackend(AdmissionBackend):
+    """Queue kept in the worker process; no awaits, so every call is atomic."""
+
+    def __init__(self, *, ttl_seconds: float) -> None:
+        self._ttl = ttl_seconds
+        self._queues: dict[UUID, _PoolQueue] = {}
+
+    async def enter(self, pool_id: UUID, user_id: UUID, capacity: int) -> tuple[bool, int]:
+        queue = self._queues.setdefault(pool_id, _PoolQueue())
+        now = time.monotonic()
+
+        # Admitted buyers that never came back give their slot up after the TTL
+        for uid in [u for u, at in queue.admitted.items() if now - at > self._ttl]:
+            del queue.admitted[uid]
+
+        if user_id in queue.admitted:
+            return True, 0
+
+        if user_id not in queue.seq_of:
+            queue.seq_of[user_id] = queue.next_seq
+            queue.waiting.append((queue.next_seq, user_id))
+            queue.next_seq += 1
+        queue.last_seen[user_id] = now
+
+        while queue.waiting and len(queue.admitted) < capacity:
+            seq, uid = queue.waiting.popleft()
+            if queue.seq_of.get(uid) != seq:
+                continue  # left the queue meanwhile
+            del queue.seq_of[uid]
+            if now - queue.last_seen.pop(uid) > self._ttl:
+                continue  # stopped polling: skip instead of holding a slot
+            queue.admitted[uid] = now
+
+        if user_id in queue.admitted:
+            return True, 0
+        # Lazily-deleted entries ahead make this an upper bound
+        return False, queue.seq_of[user_id] - queue.waiting[0][0] + 1
+
+    async def leave(self, pool_id: UUID, user_id: UUID) -> None:
+        queue = self._queues.get(pool_id)
+        if queue is None:
+            return
+        queue.admitted.pop(user_id, None)
+        queue.seq_of.pop(user_id, None)
+        queue.last_seen.pop(user_id, None)
+        if not queue.admitted and not queue.seq_of:
+            del self._queues[pool_id]
+
+    async def close(self, pool_id: UUID) -> None:
+        self._queues.pop(pool_id, None)
+
+
+class PostgresAdmissionBackend(AdmissionBackend):
+    """Queue stored in ``pool_admission``, shared by every uvicorn worker.
+
+    Each call runs in its own short transaction serialized per pool with a
+    transaction-scoped advisory lock, so concurrent workers never admit more
+    buyers than ``capacity``.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        ttl_seconds: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self._ttl = timedelta(seconds=ttl_seconds)
+
+    async def enter(self, pool_id: UUID, user_id: UUID, capacity: int) -> tuple[bool, int]:
+        async with self._session_factory() as db:
+            await db.execute(
+                select(func.pg_advisory_xact_lock(func.hashtext(str(pool_id))))
+            )
+
+            await db.execute(
+                delete(PoolAdmission).where(
+                    PoolAdmission.pool_id == pool_id,
+                    or_(
+                        and_(
+                            PoolAdmission.status == PoolAdmissionStatus.ADMITTED.value,
+                            PoolAdmission.admitted_at < func.now() - self._ttl,
+                        ),
+                        and_(
+                            PoolAdmission.status == PoolAdmissionStatus.WAITING.value,
+                            PoolAdmission.last_seen_at < func.now() - self._ttl,
+                        ),
+                    ),
+                )
+            )
+
+            entry_id = (
+                await db.execute(
+                    pg_insert(PoolAdmission)
+                    .values(
+                        pool_id=pool_id,
+                        user_id=user_id,
+                        status=PoolAdmissionStatus.WAITING.value,
+                    )
+                    .on_conflict_do_update(
+                        constraint="uq_pool_admission_pool_user",
+                        set_={"last_seen_at": func.now()},
+                    )
+                    .returning(PoolAdmission.entry_id)
+                )
+            ).scalar_one()
+
+            admitted_count = (
+                select(func.count())
+                .where(
+                    PoolAdmission.pool_id == pool_id,
+                    PoolAdmission.status == PoolAdmissionStatus.ADMITTED.value,
+                )
+                .scalar_subquery()
+            )
+            head = (
+                select(PoolAdmission.entry_id)
+                .where(
+                    PoolAdmission.pool_id == pool_id,
+                    PoolAdmission.status == PoolAdmissionStatus.WAITING.value,
+                )
+                .order_by(PoolAdmission.entry_id)
+                .limit(func.greatest(0, capacity - admitted_count))
+            )
+            await db.execute(
+                update(PoolAdmission)
+                .where(PoolAdmission.entry_id.in_(head))
+                .values(
+                    status=PoolAdmissionStatus.ADMITTED.value,
+                    admitted_at=func.now(),
+                )
+            )
+
+            ahead = (
+                select(func.count())
+                .where(
+                    PoolAdmission.pool_id == pool_id,
+                    PoolAdmission.status == PoolAdmissionStatus.WAITING.value,
+                    PoolAdmission.entry_id < entry_id,
+                )
+                .scalar_subquery()
+            )
+            status, position = (
+                await db.execute(
+                    select(PoolAdmission.status, ahead + 1).where(
+                        PoolAdmission.entry_id == entry_id
+                    )
+                )
+            ).one()
+            await db.commit()
+
+        if status == PoolAdmissionStatus.ADMITTED.value:
+            return True, 0
+        return False, int(position)
+
+    async def leave(self, pool_id: UUID, user_id: UUID) -> None:
+        async with self._session_factory() as db:
+            await db.execute(
+                delete(PoolAdmission).where(
+                    PoolAdmission.pool_id == pool_id,
+                    PoolAdmission.user_id == user_id,
+                )
+            )
+            await db.commit()
+
+    async def close(self, pool_id: UUID) -> None:
+        async with self._session_factory() as db:
+            await db.execute(delete(PoolAdmission).where(PoolAdmission.pool_id == pool_id))
+            await db.commit()
+
+
+class AdmissionController:
+    """Gate in front of the purchase endpoints of a pool.
+
+    Usage::
+
+        async with admission_controller.admit(db, pool_id, user_id):
+            await purchase_ticket_for_pool(db, pool_id, user_id, purchase_id)
+    """
+
+    # Initial guess of how long an admitted buyer stays in the purchase path
+    DEFAULT_SERVICE_SECONDS = 0.2
+
+    def __init__(self, backend: AdmissionBackend, *, max_in_flight: int) -> None:
+        self.backend = backend
+        self.max_in_flight = max(1, max_in_flight)
+        self._service_seconds: dict[UUID, float] = {}
+
+    async def _seats_left(self, db: AsyncSession, pool_id: UUID) -> int:
+        row = (
+            await db.execute(
+                select(
+                    RafflePool.state,
+                    RafflePool.tickets_required - RafflePool.tickets_sold,
+                ).where(RafflePool.pool_id == pool_id)
+            )
+        ).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Pool not found")
+        state, seats_left = row
+        if state not in ("OPEN", "FULL"):
+            raise HTTPException(status_code=400, detail="Pool is not open")
+        return seats_left if state == "OPEN" else 0
+
+    def eta_seconds(self, pool_id: UUID, position: int, capacity: int) -> float:
+        service = self._service_seconds.get(pool_id, self.DEFAULT_SERVICE_SECONDS)
+        return math.ceil(position / max(1, capacity)) * service
+
+    def _record_service_time(self, pool_id: UUID, seconds: float) -> None:
+        previous = self._service_seconds.get(pool_id, seconds)
+        self._service_seconds[pool_id] = 0.8 * previous + 0.2 * seconds
+
+    @asynccontextmanager
+    async def admit(
+        self, db: AsyncSession, pool_id: UUID, user_id: UUID
+    ) -> AsyncIterator[None]:
+        seats_left = await self._seats_left(db, pool_id)
+        if seats_left <= 0:
+            self._service_seconds.pop(pool_id, None)
+            await self.backend.close(pool_id)
+            raise HTTPException(status_code=400, detail="Pool is already full")
+
+        capacity = min(self.max_in_flight, seats_left)
+        admitted, position = await self.backend.enter(pool_id, user_id, capacity)
+        if not admitted:
+            eta = self.eta_seconds(pool_id, position, capacity)
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "message": "Queued for admission",
+                    "queue_position": position,
+                    "eta_seconds": round(eta, 2),
+                },
+                headers={"Retry-After": str(max(1, math.ceil(eta)))},
+            )
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record_service_time(pool_id, time.monotonic() - started)
+            await self.backend.leave(pool_id, user_id)
+
+
+def _build_backend() -> AdmissionBackend:
+    if settings.ADMISSION_BACKEND == "postgres":
+        return PostgresAdmissionBackend(
+            async_session, ttl_seconds=settings.ADMISSION_TTL_SECONDS
+        )
+    if settings.ADMISSION_BACKEND == "memory":
+        return InMemoryAdmissionBackend(ttl_seconds=settings.ADMISSION_TTL_SECONDS)
+    raise ValueError(f"Unknown ADMISSION_BACKEND: {settings.ADMISSION_BACKEND!r}")
+
+
+admission_controller = AdmissionController(
+    _build_backend(), max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT
+)
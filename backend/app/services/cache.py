@@ -0,0 +1,138 @@
+"""In-process read-through cache for hot, rarely-changing reads (pools, prizes, images).
+
+Entries are immutable pydantic snapshots, never ORM instances, so they can be
+shared across sessions and requests. Each key carries a version stamp that is
+bumped by ``invalidate``: a loader that started before an invalidation cannot
+store its (possibly stale) result afterwards. Entries also expire after a TTL
+and the least recently used ones are evicted past ``max_entries``.
+
+The cache is per process: with several uvicorn workers an invalidation only
+reaches the worker that performed the write, the others converge within the
+TTL.
+"""
+from __future__ import annotations
+
+import itertools
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    # Loads whose result was dropped because the key was invalidated meanwhile
+    stale_fills: int = 0
+
+
+class VersionedCache(Generic[T]):
+    def __init__(self, name: str, *, ttl_seconds: float, max_entries: int) -> None:
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.stats = CacheStats()
+        # key -> (version, expires_at, value), in LRU order (oldest first)
+        self._entries: OrderedDict[Hashable, tuple[int, float, T]] = OrderedDict()
+        # key -> version of its last invalidation; bounded, see _version()
+        self._versions: OrderedDict[Hashable, int] = OrderedDict()
+        self._version_floor = 0
+        self._clock = itertools.count(1)
+
+    def _version(self, key: Hashable) -> int:
+        # Forgotten keys report the highest version ever pruned, which is
+        # newer than any stamp taken before that key was last invalidated.
+        return self._versions.get(key, self._version_floor)
+
+    def get(self, key: Hashable) -> T | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        _, expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: T, *, version: int | None = None) -> bool:
+        """Store ``value``; when ``version`` is given, only if the key was not invalidated since."""
+        current = self._version(key)
+        if version is not None and version != current:
+            self.stats.stale_fills += 1
+            return False
+        self._entries[key] = (current, time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+        return True
+
+    def invalidate(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+            self._versions[key] = next(self._clock)
+            self._versions.move_to_end(key)
+            self.stats.invalidations += 1
+        while len(self._versions) > 4 * self.max_entries:
+            _, pruned = self._versions.popitem(last=False)
+            self._version_floor = max(self._version_floor, pruned)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        """Return the cached value or await ``loader`` and cache its result.
+
+        ``None`` results (e.g. not found) are returned but not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        version = self._version(key)
+        value = await loader()
+        if value is not None:
+            self.set(key, value, version=version)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def snapshot_stats(self) -> dict[str, Any]:
+        lookups = self.stats.hits + self.stats.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            **asdict(self.stats),
+            "hit_ratio": self.stats.hits / lookups if lookups else 0.0,
+        }
+
+
+pool_cache = VersionedCache(
+    "pool",
+    ttl_seconds=settings.CACHE_POOL_TTL_SECONDS,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+)
+prize_cache = VersionedCache(
+    "prize",
+    ttl_seconds=settings.CACHE_PRIZE_TTL_SECONDS,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+)
+prize_images_cache = VersionedCache(
+    "prize_images",
+    ttl_seconds=settings.CACHE_PRIZE_TTL_SECONDS,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+)
+
+CACHES = (pool_cache, prize_cache, prize_images_cache)
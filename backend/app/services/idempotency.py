@@ -0,0 +1,240 @@
+"""Storage behind the ``Idempotency-Key`` middleware (app/api/v1/idempotency.py).
+
+A request claims its (user, key) row with one ``INSERT ... ON CONFLICT``; the
+claim succeeds when the row is new or expired. Whoever holds the claim runs
+the endpoint and stores the response; everyone else either replays the stored
+response or waits for it. Waiting is an ``asyncio.Event`` when the owner runs
+in this process and a backing-off poll of the row otherwise.
+
+A row still IN_PROGRESS past ``locked_until`` is never taken over: its owner
+died or failed to store the response, possibly after the endpoint committed,
+so running the request again could move money twice. Retries get a 409 until
+the key expires.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyStore:
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float,
+        lock_seconds: float,
+        wait_seconds: float,
+        purge_batch: int,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.wait_seconds = wait_seconds
+        self.purge_batch = purge_batch
+        self._inflight: dict[tuple[str, str], asyncio.Event] = {}
+
+    async def _claim(self, db: AsyncSession, scope: str, key: str, fingerprint: str) -> bool:
+        stmt = pg_insert(IdempotencyKey).values(
+            scope=scope,
+            key=key,
+            fingerprint=fingerprint,
+            status=IdempotencyStatus.IN_PROGRESS.value,
+            locked_until=func.now() + timedelta(seconds=self.lock_seconds),
+            expires_at=func.now() + timedelta(seconds=self.ttl_seconds),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "status": stmt.excluded.status,
+                "response_status": None,
+                "response_headers": None,
+                "response_body": None,
+                "locked_until": stmt.excluded.locked_until,
+                "created_at": func.now(),
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at <= func.now(),
+        ).returning(IdempotencyKey.key)
+        claimed = (await db.execute(stmt)).first() is not None
+        await db.commit()
+        return claimed
+
+    async def begin(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        scope: str,
+        key: str,
+        fingerprint: str,
+    ) -> IdempotencyKey | None:
+        """Claim the key (``None``: run the request) or return the response to replay.
+
+        Raises 422 when the key was used for a different request and 409 when
+        its first request is still running after ``wait_seconds`` or ended
+        without storing a response.
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        delay = 0.02
+        while True:
+            async with session_factory() as db:
+                if await self._claim(db, scope, key, fingerprint):
+                    self._inflight[(scope, key)] = asyncio.Event()
+                    return None
+                row = (
+                    await db.execute(
+                        select(IdempotencyKey, IdempotencyKey.locked_until <= func.now()).where(
+                            IdempotencyKey.scope == scope, IdempotencyKey.key == key
+                        )
+                    )
+                ).first()
+            if row is None:
+                # Released or purged in between: claim again
+                continue
+            record, abandoned = row
+            if record.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key already used for a different request",
+                )
+            if record.status == IdempotencyStatus.COMPLETED.value:
+                return record
+            if abandoned:
+                raise HTTPException(
+                    status_code=409,
+                    detail=(
+                        "The first request with this Idempotency-Key did not finish "
+                        "cleanly and its outcome is unknown"
+                    ),
+                )
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still in progress",
+                )
+            event = self._inflight.get((scope, key))
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.5)
+
+    def _done(self, scope: str, key: str) -> None:
+        event = self._inflight.pop((scope, key), None)
+        if event is not None:
+            event.set()
+
+    async def complete(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        scope: str,
+        key: str,
+        fingerprint: str,
+        *,
+        status_code: int,
+        headers: list[tuple[str, str]],
+        body: bytes,
+    ) -> None:
+        try:
+            async with session_factory() as db:
+                await db.execute(
+                    update(IdempotencyKey)
+                    .where(
+                        IdempotencyKey.scope == scope,
+                        IdempotencyKey.key == key,
+                        # Expired and claimed again meanwhile: no longer ours
+                        IdempotencyKey.fingerprint == fingerprint,
+                        IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS.value,
+                    )
+                    .values(
+                        status=IdempotencyStatus.COMPLETED.value,
+                        response_status=status_code,
+                        response_headers=headers,
+                        response_body=body,
+                        locked_until=None,
+                    )
+                )
+                await db.commit()
+        finally:
+            self._done(scope, key)
+
+    async def release(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        scope: str,
+        key: str,
+        fingerprint: str,
+    ) -> None:
+        """Drop an unfinished claim so the next retry runs the request again."""
+        try:
+            async with session_factory() as db:
+                await db.execute(
+                    delete(IdempotencyKey).where(
+                        IdempotencyKey.scope == scope,
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.fingerprint == fingerprint,
+                        IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS.value,
+                    )
+                )
+                await db.commit()
+        finally:
+            self._done(scope, key)
+
+    async def purge_expired(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+        """Delete expired keys along ``ix_idempotency_key_expires_at``, ``purge_batch`` at a time."""
+        purged = 0
+        while True:
+            expired = (
+                select(IdempotencyKey.scope, IdempotencyKey.key)
+                .where(IdempotencyKey.expires_at <= func.now())
+                .order_by(IdempotencyKey.expires_at)
+                .limit(self.purge_batch)
+                .with_for_update(skip_locked=True)
+                .cte("expired")
+            )
+            async with session_factory() as db:
+                result = await db.execute(
+                    delete(IdempotencyKey).where(
+                        IdempotencyKey.scope == expired.c.scope,
+                        IdempotencyKey.key == expired.c.key,
+                    )
+                )
+                await db.commit()
+            purged += result.rowcount
+            if result.rowcount < self.purge_batch:
+                return purged
+
+    async def run(
+        self, session_factory: async_sessionmaker[AsyncSession], interval_seconds: float
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                purged = await self.purge_expired(session_factory)
+                if purged:
+                    logger.info("Purged %d expired idempotency keys", purged)
+            except Exception:
+                logger.exception("Idempotency key purge failed")
+
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+    wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+    purge_batch=settings.IDEMPOTENCY_PURGE_BATCH,
+)
@@ -1,12 +1,29 @@
+from datetime import datetime
+from uuid import UUID
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, join, func
+from sqlalchemy import Float, cast, select, join, func, or_, tuple_
 from fastapi import HTTPException
 
+from app.core.pagination import decode_cursor, encode_cursor, parse_cursor_values
+
 from app.models.pool import RafflePool
 from app.models.prize import Prize
 from app.models.ticket import Ticket
 from app.models.purchase import Purchase
-from app.schemas.pool import PoolCreate
+from app.schemas.pool import Pool as PoolSchema, PoolCatalogSort, PoolCreate
+from app.services.cache import pool_cache
+
+# Must match the expression of ix_raffle_pool_fill_ratio_pool_id
+POOL_FILL_RATIO = cast(RafflePool.tickets_sold, Float) / cast(
+    func.nullif(RafflePool.tickets_required, 0), Float
+)
+
+_CATALOG_SORT_KEYS = {
+    PoolCatalogSort.NEWEST: (RafflePool.created_at, datetime.fromisoformat),
+    PoolCatalogSort.CLOSEST_TO_FULL: (POOL_FILL_RATIO, float),
+    PoolCatalogSort.MOST_LIKED: (RafflePool.likes, int),
+}
 
 async def create_pool(db: AsyncSession, pool_in: PoolCreate) -> RafflePool:
     prize = await db.get(Prize, pool_in.prize_id)
@@ -33,10 +50,102 @@ async def create_pool(db: AsyncSession, pool_in: PoolCreate) -> RafflePool:
 async def get_pool(db: AsyncSession, pool_id: str):
     return await db.get(RafflePool, pool_id)
 
+async def read_pool(db: AsyncSession, pool_id: UUID) -> PoolSchema | None:
+    """Cached read-only snapshot of a pool; use `get_pool` to modify it."""
+    async def load():
+        pool = await db.get(RafflePool, pool_id)
+        return PoolSchema.model_validate(pool, from_attributes=True) if pool else None
+
+    return await pool_cache.get_or_load(pool_id, load)
+
+async def get_pools_by_ids(db: AsyncSession, pool_ids: list[UUID]) -> list[RafflePool]:
+    """Pools in the order of ``pool_ids``; unknown ids are skipped."""
+    if not pool_ids:
+        return []
+    result = await db.execute(select(RafflePool).where(RafflePool.pool_id.in_(pool_ids)))
+    found = {pool.pool_id: pool for pool in result.scalars().all()}
+    return [found[pool_id] for pool_id in pool_ids if pool_id in found]
+
 async def get_all_pool(db: AsyncSession) -> list[RafflePool]:
     result = await db.execute(select(RafflePool))
     return result.scalars().all()
 
+def catalog_stmt(
+    *,
+    sort: PoolCatalogSort,
+    state: str | None,
+    min_price_cents: int | None,
+    max_price_cents: int | None,
+    min_fill: float | None,
+    max_fill: float | None,
+    cursor: str | None,
+):
+    key, parse_key = _CATALOG_SORT_KEYS[sort]
+    stmt = select(RafflePool, key.label("sort_key"))
+
+    if state is not None:
+        stmt = stmt.where(RafflePool.state == state)
+    if min_price_cents is not None:
+        stmt = stmt.where(RafflePool.ticket_price_cents >= min_price_cents)
+    if max_price_cents is not None:
+        stmt = stmt.where(RafflePool.ticket_price_cents <= max_price_cents)
+    if min_fill is not None:
+        stmt = stmt.where(POOL_FILL_RATIO >= min_fill)
+    if max_fill is not None:
+        stmt = stmt.where(POOL_FILL_RATIO <= max_fill)
+
+    if cursor is not None:
+        last_key, last_pool_id = decode_cursor(cursor, 2)
+        (last_pool_id,) = parse_cursor_values([last_pool_id], UUID)
+        if last_key is None:
+            # NULL keys (no likes yet, no tickets required) sort first: the rest
+            # of them, then every pool with a key
+            stmt = stmt.where(
+                or_(key.is_not(None), RafflePool.pool_id < last_pool_id)
+            )
+        else:
+            (last_key,) = parse_cursor_values([last_key], parse_key)
+            # Row comparison on (sort key, pool_id) is an index condition on the
+            # matching two-column index, so deep pages cost the same as the first.
+            # It is never true for NULL keys, already listed before this page.
+            stmt = stmt.where(
+                tuple_(key, RafflePool.pool_id) < tuple_(last_key, last_pool_id)
+            )
+
+    # NULLS FIRST is what DESC does anyway: a backward scan of the index
+    return stmt.order_by(key.desc().nulls_first(), RafflePool.pool_id.desc())
+
+async def list_pool_catalog(
+    db: AsyncSession,
+    *,
+    sort: PoolCatalogSort = PoolCatalogSort.NEWEST,
+    state: str | None = None,
+    min_price_cents: int | None = None,
+    max_price_cents: int | None = None,
+    min_fill: float | None = None,
+    max_fill: float | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list[RafflePool], str | None]:
+    stmt = catalog_stmt(
+        sort=sort,
+        state=state,
+        min_price_cents=min_price_cents,
+        max_price_cents=max_price_cents,
+        min_fill=min_fill,
+        max_fill=max_fill,
+        cursor=cursor,
+    )
+    # Fetch one extra row to know whether another page exists
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    pools = [row[0] for row in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last_pool, last_key = rows[limit - 1]
+        next_cursor = encode_cursor(last_key, last_pool.pool_id)
+    return pools, next_cursor
+
 async def get_pools_by_user(db: AsyncSession, user_id: str) -> list[RafflePool]:
     # Join pools -> prize to filter by owner
     j = join(RafflePool, Prize, RafflePool.prize_id == Prize.prize_id)
@@ -66,6 +175,7 @@ async def update_pool(db: AsyncSession, pool: RafflePool, data: dict):
     for key, value in data.items():
         setattr(pool, key, value)
     await db.commit()
+    pool_cache.invalidate(pool.pool_id)
     await db.refresh(pool)
     return pool
 
@@ -92,3 +202,4 @@ async def delete_pool(db: AsyncSession, pool: RafflePool):
 
     await db.delete(pool)
     await db.commit()
+    pool_cache.invalidate(pool.pool_id)
@@ -0,0 +1,115 @@
+"""Composite "pool card" read model for the mobile feed.
+
+A card bundles the pool, its prize, the cover image and the like state of the
+current user. A whole page is assembled with three queries whatever its size:
+pools joined with prizes, cover images (DISTINCT ON prize) and the user's
+likes on the page.
+"""
+from typing import Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import encode_cursor
+from app.models.pool import RafflePool
+from app.models.pool_like import PoolLike
+from app.models.prize import Prize
+from app.models.prize_image import PrizeImage
+from app.schemas.pool import PoolCard, PoolCatalogSort
+from app.services.pool import catalog_stmt
+from app.services.pool_like import like_counter
+
+
+async def _cover_images(
+    db: AsyncSession, prize_ids: Sequence[UUID]
+) -> dict[UUID, PrizeImage]:
+    # Explicit cover first, otherwise the first image of the gallery order
+    stmt = (
+        select(PrizeImage)
+        .where(PrizeImage.prize_id.in_(prize_ids))
+        .distinct(PrizeImage.prize_id)
+        .order_by(
+            PrizeImage.prize_id,
+            PrizeImage.is_cover.desc(),
+            PrizeImage.sort_order.asc().nulls_last(),
+            PrizeImage.created_at.asc(),
+        )
+    )
+    result = await db.execute(stmt)
+    return {image.prize_id: image for image in result.scalars().all()}
+
+
+async def _liked_pool_ids(
+    db: AsyncSession, pool_ids: Sequence[UUID], user_id: UUID
+) -> set[UUID]:
+    stmt = select(PoolLike.pool_id).where(
+        PoolLike.user_id == user_id, PoolLike.pool_id.in_(pool_ids)
+    )
+    result = await db.execute(stmt)
+    return set(result.scalars().all())
+
+
+async def _assemble_cards(
+    db: AsyncSession,
+    rows: Sequence[tuple[RafflePool, Prize]],
+    user_id: UUID,
+) -> list[PoolCard]:
+    if not rows:
+        return []
+    covers = await _cover_images(db, [prize.prize_id for _, prize in rows])
+    liked = await _liked_pool_ids(db, [pool.pool_id for pool, _ in rows], user_id)
+    return [
+        PoolCard.model_validate(
+            {
+                "pool": pool,
+                "prize": prize,
+                "cover_image": covers.get(prize.prize_id),
+                "likes": max(0, int(pool.likes or 0) + like_counter.pending(pool.pool_id)),
+                "liked_by_me": pool.pool_id in liked,
+            },
+            from_attributes=True,
+        )
+        for pool, prize in rows
+    ]
+
+
+async def list_pool_cards(
+    db: AsyncSession,
+    user_id: UUID,
+    *,
+    sort: PoolCatalogSort = PoolCatalogSort.NEWEST,
+    state: str | None = None,
+    min_price_cents: int | None = None,
+    max_price_cents: int | None = None,
+    min_fill: float | None = None,
+    max_fill: float | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list[PoolCard], str | None]:
+    """Catalog page (same filters, sorts and cursor as the catalog) rendered as cards."""
+    stmt = (
+        catalog_stmt(
+            sort=sort,
+            state=state,
+            min_price_cents=min_price_cents,
+            max_price_cents=max_price_cents,
+            min_fill=min_fill,
+            max_fill=max_fill,
+            cursor=cursor,
+        )
+        .add_columns(Prize)
+        .join(Prize, Prize.prize_id == RafflePool.prize_id)
+        .limit(limit + 1)
+    )
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        last_pool, last_key, _ = rows[limit - 1]
+        next_cursor = encode_cursor(last_key, last_pool.pool_id)
+
+    cards = await _assemble_cards(
+        db, [(pool, prize) for pool, _, prize in rows[:limit]], user_id
+    )
+    return cards, next_cursor
@@ -1,79 +1,232 @@
+import asyncio
+import logging
+from typing import Sequence
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import select, delete
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import Integer, and_, delete, exists, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.models.pool import RafflePool
 from app.models.pool_like import PoolLike
+from app.models.user import User
+from app.services.cache import pool_cache
+from app.services.pool import read_pool
+from app.services.trending import trending_engine
+
+logger = logging.getLogger(__name__)
+
+
+class LikeCounterBuffer:
+    """Coalesces like/unlike deltas per pool before they reach ``raffle_pool.likes``.
+
+    ``pool_like`` rows are the source of truth and are written right away;
+    only the denormalized counter is deferred, so a burst of likes on a hot
+    pool costs one row update per flush instead of one per like. Deltas not
+    yet flushed are added back when the counter is read.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[UUID, int] = {}
+        self._lock = asyncio.Lock()
+
+    def add(self, pool_id: UUID, delta: int) -> None:
+        if delta:
+            self._pending[pool_id] = self._pending.get(pool_id, 0) + delta
+
+    def pending(self, pool_id: UUID) -> int:
+        return self._pending.get(pool_id, 0)
+
+    async def flush(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+        """Apply the pending deltas with one UPDATE; return the number of pools touched."""
+        async with self._lock:
+            batch = {pool_id: delta for pool_id, delta in self._pending.items() if delta}
+            if not batch:
+                return 0
+            # Sorted so concurrent flushes from several workers lock rows in the
+            # same order; arrays keep one bind parameter per column
+            rows = sorted(batch.items())
+            deltas = (
+                func.unnest(
+                    literal([pool_id for pool_id, _ in rows], ARRAY(PG_UUID(as_uuid=True))),
+                    literal([delta for _, delta in rows], ARRAY(Integer)),
+                )
+                .table_valued("pool_id", "delta")
+                .render_derived(name="like_delta")
+            )
+            try:
+                async with session_factory() as db:
+                    await db.execute(
+                        update(RafflePool)
+                        .where(RafflePool.pool_id == deltas.c.pool_id)
+                        .values(likes=func.greatest(0, RafflePool.likes + deltas.c.delta))
+                    )
+                    await db.commit()
+            except Exception:
+                logger.exception("Like counter flush failed, %d pools kept pending", len(batch))
+                return 0
+
+            # Likes recorded while the UPDATE was in flight stay pending
+            for pool_id, delta in batch.items():
+                left = self._pending.get(pool_id, 0) - delta
+                if left:
+                    self._pending[pool_id] = left
+                else:
+                    self._pending.pop(pool_id, None)
+            pool_cache.invalidate(*batch)
+            return len(batch)
+
+    async def run(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval_seconds: float,
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.flush(session_factory)
+
+
+like_counter = LikeCounterBuffer()
+
+
+def _like_count(persisted: int | None, pool_id: UUID) -> int:
+    return max(0, int(persisted or 0) + like_counter.pending(pool_id))
 
 
-async def _ensure_pool(db: AsyncSession, pool_id: UUID) -> RafflePool:
-    pool = await db.get(RafflePool, pool_id)
+async def get_like_status(db: AsyncSession, pool_id: UUID, user_id: UUID) -> tuple[int, bool]:
+    pool = await read_pool(db, pool_id)
     if not pool:
         raise HTTPException(status_code=404, detail="Pool not found")
-    return pool
-
-
-async def get_like_status(db: AsyncSession, pool_id: UUID, user_id: UUID) -> tuple[int, bool]:
-    pool = await _ensure_pool(db, pool_id)
     liked = (
         await db.execute(
-            select(PoolLike).where(
-                PoolLike.pool_id == pool_id, PoolLike.user_id == user_id
+            select(
+                exists().where(PoolLike.pool_id == pool_id, PoolLike.user_id == user_id)
             )
         )
-    ).scalar_one_or_none() is not None
-    return int(pool.likes or 0), liked
-
-
-async def like_pool(db: AsyncSession, pool_id: UUID, user_id: UUID) -> tuple[int, bool]:
-    pool = await _ensure_pool(db, pool_id)
-
-    exists = (
-        await db.execute(
-            select(PoolLike).where(
-                PoolLike.pool_id == pool_id, PoolLike.user_id == user_id
-            )
+    ).scalar_one()
+    return _like_count(pool.likes, pool_id), liked
+
+
+async def get_like_statuses(
+    db: AsyncSession, pool_ids: Sequence[UUID], user_id: UUID
+) -> list[tuple[UUID, int, bool]]:
+    """``(pool_id, likes, liked_by_me)`` for a page of pools, in input order.
+
+    One query: the caller's like is a LEFT JOIN probe on the ``pool_like``
+    primary key. Unknown pool ids are left out.
+    """
+    if not pool_ids:
+        return []
+    stmt = (
+        select(RafflePool.pool_id, RafflePool.likes, PoolLike.user_id.is_not(None))
+        .outerjoin(
+            PoolLike,
+            and_(PoolLike.pool_id == RafflePool.pool_id, PoolLike.user_id == user_id),
         )
-    ).scalar_one_or_none()
-    if exists:
-        return int(pool.likes or 0), True
-
-    db.add(PoolLike(pool_id=pool_id, user_id=user_id))
-    pool.likes = int(pool.likes or 0) + 1
-    try:
-        await db.commit()
-    except IntegrityError:
-        # Another concurrent like inserted first: idempotent return
-        await db.rollback()
-        # Refresh pool.likes from DB to avoid overcount
-        pool = await _ensure_pool(db, pool_id)
-        return int(pool.likes or 0), True
+        .where(RafflePool.pool_id.in_(pool_ids))
+    )
+    found = {
+        pool_id: (pool_id, _like_count(likes, pool_id), liked)
+        for pool_id, likes, liked in (await db.execute(stmt)).all()
+    }
+    return [found[pool_id] for pool_id in dict.fromkeys(pool_ids) if pool_id in found]
 
-    await db.refresh(pool)
-    return int(pool.likes or 0), True
 
+async def get_likes_version(db: AsyncSession, user_id: UUID) -> int | None:
+    stmt = select(User.likes_version).where(User.user_id == user_id)
+    return (await db.execute(stmt)).scalar_one_or_none()
 
-async def unlike_pool(db: AsyncSession, pool_id: UUID, user_id: UUID) -> tuple[int, bool]:
-    pool = await _ensure_pool(db, pool_id)
 
-    existing = (
+async def list_liked_pool_ids(db: AsyncSession, user_id: UUID) -> tuple[int, list[UUID]]:
+    """The user's whole liked-pool set and its version, from one snapshot.
+
+    Served by ``ix_pool_like_user_id_pool_id`` as an index-only scan.
+    """
+    liked = (
+        select(func.array_agg(PoolLike.pool_id))
+        .where(PoolLike.user_id == user_id)
+        .scalar_subquery()
+    )
+    row = (
+        await db.execute(select(User.likes_version, liked).where(User.user_id == user_id))
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    version, pool_ids = row
+    return version, sorted(pool_ids or [])
+
+
+async def _toggle(
+    db: AsyncSession, pool_id: UUID, user_id: UUID, changed_rows, delta: int
+) -> tuple[int, int]:
+    """Run a like/unlike CTE; return the caller-visible like count and likes_version.
+
+    ``changed_rows`` returns the inserted or deleted like's ``created_at``.
+    """
+    changed = select(func.count()).select_from(changed_rows).scalar_subquery()
+    # At most one row: (pool_id, user_id) is the primary key
+    liked_at = select(changed_rows.c.created_at).scalar_subquery()
+    bumped = (
+        update(User)
+        .where(User.user_id == user_id, select(changed_rows).exists())
+        .values(likes_version=User.likes_version + 1)
+        .returning(User.likes_version)
+        .cte("bumped")
+    )
+    version = func.coalesce(
+        select(bumped.c.likes_version).scalar_subquery(),
+        select(User.likes_version).where(User.user_id == user_id).scalar_subquery(),
+    )
+    row = (
         await db.execute(
-            select(PoolLike).where(
-                PoolLike.pool_id == pool_id, PoolLike.user_id == user_id
+            select(RafflePool.likes, changed, version, liked_at).where(
+                RafflePool.pool_id == pool_id
             )
         )
-    ).scalar_one_or_none()
-    if not existing:
-        return int(pool.likes or 0), False
-
-    await db.execute(
-        delete(PoolLike).where(PoolLike.pool_id == pool_id, PoolLike.user_id == user_id)
-    )
-    pool.likes = max(0, int(pool.likes or 0) - 1)
+    ).first()
+    if row is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Pool not found")
     await db.commit()
-    await db.refresh(pool)
-    return int(pool.likes or 0), False
 
+    persisted, changed_count, likes_version, created_at = row
+    like_counter.add(pool_id, delta * changed_count)
+    if changed_count and created_at is not None:
+        trending_engine.record_like(pool_id, delta, created_at)
+    return _like_count(persisted, pool_id), likes_version
+
+
+async def like_pool(
+    db: AsyncSession, pool_id: UUID, user_id: UUID
+) -> tuple[int, bool, int]:
+    # Insert-if-absent and counter read in one statement; the pool guard
+    # turns a missing pool into "no row" instead of a FK violation.
+    inserted = (
+        pg_insert(PoolLike)
+        .from_select(
+            ["pool_id", "user_id"],
+            select(
+                literal(pool_id, PG_UUID(as_uuid=True)),
+                literal(user_id, PG_UUID(as_uuid=True)),
+            ).where(exists().where(RafflePool.pool_id == pool_id)),
+        )
+        .on_conflict_do_nothing()
+        .returning(PoolLike.pool_id, PoolLike.created_at)
+        .cte("inserted")
+    )
+    likes, version = await _toggle(db, pool_id, user_id, inserted, +1)
+    return likes, True, version
+
+
+async def unlike_pool(
+    db: AsyncSession, pool_id: UUID, user_id: UUID
+) -> tuple[int, bool, int]:
+    deleted = (
+        delete(PoolLike)
+        .where(PoolLike.pool_id == pool_id, PoolLike.user_id == user_id)
+        .returning(PoolLike.pool_id, PoolLike.created_at)
+        .cte("deleted")
+    )
+    likes, version = await _toggle(db, pool_id, user_id, deleted, -1)
+    return likes, False, version
@@ -1,9 +1,12 @@
+from uuid import UUID
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import HTTPException
 from app.models.prize import Prize
 from app.models.pool import RafflePool
-from app.schemas.prize import PrizeCreate
+from app.schemas.prize import Prize as PrizeSchema, PrizeCreate
+from app.services.cache import prize_cache, prize_images_cache
 
 async def create_prize(db: AsyncSession, prize_in: PrizeCreate, *, user_id: str) -> Prize:
     prize = Prize(**prize_in.dict(), user_id=user_id)
@@ -15,6 +18,14 @@ async def create_prize(db: AsyncSession, prize_in: PrizeCreate, *, user_id: str)
 async def get_prize(db: AsyncSession, prize_id: str):
     return await db.get(Prize, prize_id)
 
+async def read_prize(db: AsyncSession, prize_id: UUID) -> PrizeSchema | None:
+    """Cached read-only snapshot of a prize; use `get_prize` to modify it."""
+    async def load():
+        prize = await db.get(Prize, prize_id)
+        return PrizeSchema.model_validate(prize, from_attributes=True) if prize else None
+
+    return await prize_cache.get_or_load(prize_id, load)
+
 async def get_all_prize(db: AsyncSession) -> list[Prize]:
     result = await db.execute(select(Prize))
     return result.scalars().all()
@@ -27,6 +38,7 @@ async def update_prize(db: AsyncSession, prize: Prize, data: dict):
     for key, value in data.items():
         setattr(prize, key, value)
     await db.commit()
+    prize_cache.invalidate(prize.prize_id)
     await db.refresh(prize)
     return prize
 
@@ -41,3 +53,5 @@ async def delete_prize(db: AsyncSession, prize: Prize):
 
     await db.delete(prize)
     await db.commit()
+    prize_cache.invalidate(prize.prize_id)
+    prize_images_cache.invalidate(prize.prize_id)
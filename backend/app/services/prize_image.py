@@ -14,11 +14,13 @@ import json
 from app.models.prize import Prize
 from app.models.prize_image import PrizeImage as PrizeImageModel
 from app.schemas.prize_image import (
+    PrizeImage as PrizeImageSchema,
     PrizeImageCreate,
     PrizeImageUpdate,
     PrizeImageReorderRequest,
 )
 from app.core.config import settings
+from app.services.cache import prize_images_cache
 
 logger = logging.getLogger(__name__)
 
@@ -37,18 +39,25 @@ async def _ensure_owner(db: AsyncSession, prize_id: UUID, user_id: UUID) -> Priz
     return prize
 
 
-async def list_images(db: AsyncSession, prize_id: UUID) -> List[PrizeImageModel]:
-    await _get_prize(db, prize_id)
-    stmt = (
-        select(PrizeImageModel)
-        .where(PrizeImageModel.prize_id == prize_id)
-        .order_by(
-            PrizeImageModel.sort_order.asc().nulls_last(),
-            PrizeImageModel.created_at.asc(),
+async def list_images(db: AsyncSession, prize_id: UUID) -> List[PrizeImageSchema]:
+    """Gallery of a prize in display order (cached snapshot, invalidated on every mutation)."""
+    async def load():
+        await _get_prize(db, prize_id)
+        stmt = (
+            select(PrizeImageModel)
+            .where(PrizeImageModel.prize_id == prize_id)
+            .order_by(
+                PrizeImageModel.sort_order.asc().nulls_last(),
+                PrizeImageModel.created_at.asc(),
+            )
         )
-    )
-    result = await db.execute(stmt)
-    return list(result.scalars().all())
+        result = await db.execute(stmt)
+        return tuple(
+            PrizeImageSchema.model_validate(img, from_attributes=True)
+            for img in result.scalars().all()
+        )
+
+    return list(await prize_images_cache.get_or_load(prize_id, load))
 
 
 async def create_image(
@@ -73,6 +82,7 @@ async def create_image(
     )
     db.add(obj)
     await db.commit()
+    prize_images_cache.invalidate(prize_id)
     await db.refresh(obj)
     return obj
 
@@ -104,6 +114,7 @@ async def update_image(
         obj.sort_order = data.sort_order
 
     await db.commit()
+    prize_images_cache.invalidate(prize_id)
     await db.refresh(obj)
     return obj
 
@@ -131,6 +142,7 @@ async def reorder_images(
         img.sort_order = item.sort_order
 
     await db.commit()
+    prize_images_cache.invalidate(prize_id)
     # Return ordered list
     return await list_images(db, prize_id)
 
@@ -158,6 +170,7 @@ async def delete_image(
 
     await db.delete(obj)
     await db.commit()
+    prize_images_cache.invalidate(prize_id)
 
 
 async def _delete_storage_object(bucket: str, storage_path: str) -> None:
@@ -1,13 +1,16 @@
+from datetime import datetime
 from typing import Sequence
 from uuid import UUID
-from sqlalchemy import select
+from sqlalchemy import Select, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import HTTPException
 
+from app.core.pagination import decode_cursor, encode_cursor, parse_cursor_values
 from app.models.purchase import Purchase, PurchaseStatus, PurchaseType
 from app.schemas.purchase import PurchaseCreate, PurchaseUpdate
 from app.services.ticket import purchase_ticket_for_pool
+from app.services.wallet import register_ledger_ref
 
 async def create_purchase(
     db: AsyncSession,
@@ -32,6 +35,9 @@ async def create_purchase(
             detail="Confirmed purchase requires a wallet ledger entry",
         )
 
+    if wallet_entry_id is not None:
+        await register_ledger_ref(db, wallet_entry_id)
+
     purchase = Purchase(
         user_id=user_id,
         pool_id=pool_id,
@@ -69,15 +75,78 @@ async def create_purchase(
 async def get_purchase(db: AsyncSession, purchase_id: UUID) -> Purchase | None:
     return await db.get(Purchase, purchase_id)
 
-async def get_all_purchases(db: AsyncSession) -> Sequence[Purchase]:
-    result = await db.execute(select(Purchase))
-    return result.scalars().all()
-
 async def get_user_purchases(db: AsyncSession, user_id: UUID) -> Sequence[Purchase]:
     stmt = select(Purchase).where(Purchase.user_id == user_id)
     result = await db.execute(stmt)
     return result.scalars().all()
 
+def all_purchases_stmt(
+    *,
+    purchase_status: PurchaseStatus | None = None,
+    purchase_type: PurchaseType | None = None,
+    pool_id: UUID | None = None,
+) -> Select:
+    """Every purchase matching the filters, as plain rows in ``(created_at, purchase_id)`` order."""
+    return filter_purchases(
+        select(*Purchase.__table__.c),
+        purchase_status=purchase_status,
+        purchase_type=purchase_type,
+        pool_id=pool_id,
+    ).order_by(Purchase.created_at, Purchase.purchase_id)
+
+def filter_purchases(
+    stmt: Select,
+    *,
+    purchase_status: PurchaseStatus | None = None,
+    purchase_type: PurchaseType | None = None,
+    pool_id: UUID | None = None,
+) -> Select:
+    if purchase_status is not None:
+        stmt = stmt.where(Purchase.status == purchase_status.value)
+    if purchase_type is not None:
+        stmt = stmt.where(Purchase.type == purchase_type.value)
+    if pool_id is not None:
+        stmt = stmt.where(Purchase.pool_id == pool_id)
+    return stmt
+
+async def list_user_purchases(
+    db: AsyncSession,
+    user_id: UUID,
+    *,
+    purchase_status: PurchaseStatus | None = None,
+    purchase_type: PurchaseType | None = None,
+    pool_id: UUID | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[Sequence[Purchase], str | None]:
+    """Newest-first page of a user's purchases and the cursor of the next one.
+
+    Seeks on ``(created_at, purchase_id)`` along ``ix_purchase_user_created_at``;
+    the filters are applied on the rows the index returns.
+    """
+    stmt = filter_purchases(
+        select(Purchase).where(Purchase.user_id == user_id),
+        purchase_status=purchase_status,
+        purchase_type=purchase_type,
+        pool_id=pool_id,
+    )
+    if cursor is not None:
+        last_created_at, last_purchase_id = parse_cursor_values(
+            decode_cursor(cursor, 2), datetime.fromisoformat, UUID
+        )
+        stmt = stmt.where(
+            tuple_(Purchase.created_at, Purchase.purchase_id)
+            < tuple_(last_created_at, last_purchase_id)
+        )
+    stmt = stmt.order_by(Purchase.created_at.desc(), Purchase.purchase_id.desc()).limit(limit + 1)
+    items = (await db.execute(stmt)).scalars().all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].purchase_id)
+    return items, next_cursor
+
 async def update_purchase(
     db: AsyncSession,
     purchase: Purchase,
@@ -106,6 +175,9 @@ async def update_purchase(
             detail="Confirmed purchase requires a wallet ledger entry",
         )
 
+    if payload.get("wallet_entry_id") is not None:
+        await register_ledger_ref(db, payload["wallet_entry_id"])
+
     for key, value in payload.items():
         setattr(purchase, key, value)
     await db.flush()
@@ -0,0 +1,176 @@
+"""Order-statistic index: sorted members with O(log n) rank lookups and page slicing.
+
+Members are kept sorted by a comparable key in a list of bounded, sorted
+buckets (the layout used by ``sortedcontainers``). Updates cost a bisect plus
+a list insert within one bucket; ``rank`` and ``page`` find positions through
+a Fenwick tree of bucket sizes, adjusted in O(log buckets) by every update and
+only rebuilt when buckets split or disappear.
+
+Lower keys rank first, so "highest score first" uses ``(-score, tiebreak)``.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Any, Generic, Hashable, Iterable, TypeVar
+
+M = TypeVar("M", bound=Hashable)
+
+_BUCKET_SIZE = 512
+
+
+class RankedIndex(Generic[M]):
+    def __init__(self, items: Iterable[tuple[M, Any]] = ()) -> None:
+        self._key_of: dict[M, Any] = {}
+        self._buckets: list[list[tuple[Any, M]]] = []
+        self._maxes: list[tuple[Any, M]] = []
+        # Fenwick tree (1-based) over bucket sizes; None until next needed
+        self._tree: list[int] | None = None
+        self.bulk_load(items)
+
+    def __len__(self) -> int:
+        return len(self._key_of)
+
+    def __contains__(self, member: object) -> bool:
+        return member in self._key_of
+
+    def key_of(self, member: M) -> Any:
+        return self._key_of.get(member)
+
+    def items(self) -> Iterable[tuple[M, Any]]:
+        return self._key_of.items()
+
+    def update(self, items: Iterable[tuple[M, Any]]) -> None:
+        """``set`` many members; rebuilds instead when a large share of the index moves."""
+        items = list(items)
+        if len(items) * 4 < len(self._key_of):
+            for member, key in items:
+                self.set(member, key)
+        else:
+            merged = dict(self._key_of)
+            merged.update(items)
+            self.bulk_load(merged.items())
+
+    def bulk_load(self, items: Iterable[tuple[M, Any]]) -> None:
+        """Replace the whole content; O(n log n), cheaper than n ``set`` calls."""
+        self._key_of = dict(items)
+        ordered = sorted((key, member) for member, key in self._key_of.items())
+        self._buckets = [
+            ordered[i : i + _BUCKET_SIZE] for i in range(0, len(ordered), _BUCKET_SIZE)
+        ]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._tree = None
+
+    def set(self, member: M, key: Any) -> None:
+        old = self._key_of.get(member)
+        if old is not None:
+            if old == key:
+                return
+            self._discard((old, member))
+        self._key_of[member] = key
+        self._insert((key, member))
+
+    def remove(self, member: M) -> None:
+        key = self._key_of.pop(member, None)
+        if key is not None:
+            self._discard((key, member))
+
+    def rank(self, member: M) -> int | None:
+        """0-based position of ``member``, or ``None`` when absent."""
+        key = self._key_of.get(member)
+        if key is None:
+            return None
+        entry = (key, member)
+        pos = bisect_left(self._maxes, entry)
+        return self._before(pos) + bisect_left(self._buckets[pos], entry)
+
+    def page(self, offset: int, limit: int) -> list[tuple[M, Any]]:
+        """``limit`` members starting at rank ``offset``, as ``(member, key)``."""
+        if offset < 0 or limit <= 0 or offset >= len(self._key_of):
+            return []
+        pos, idx = self._locate(offset)
+        out: list[tuple[M, Any]] = []
+        while pos < len(self._buckets) and len(out) < limit:
+            bucket = self._buckets[pos]
+            for key, member in bucket[idx : idx + limit - len(out)]:
+                out.append((member, key))
+            pos += 1
+            idx = 0
+        return out
+
+    def _fenwick(self) -> list[int]:
+        if self._tree is None:
+            tree = [0, *(len(bucket) for bucket in self._buckets)]
+            for i in range(1, len(tree)):
+                parent = i + (i & -i)
+                if parent < len(tree):
+                    tree[parent] += tree[i]
+            self._tree = tree
+        return self._tree
+
+    def _resize(self, pos: int, delta: int) -> None:
+        """Bucket ``pos`` gained (or lost) ``delta`` members."""
+        tree = self._tree
+        if tree is None:
+            return
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _before(self, pos: int) -> int:
+        """Members in the buckets before ``pos``."""
+        tree = self._fenwick()
+        total = 0
+        while pos:
+            total += tree[pos]
+            pos -= pos & -pos
+        return total
+
+    def _locate(self, offset: int) -> tuple[int, int]:
+        """``(bucket, index in bucket)`` of the member at rank ``offset``."""
+        tree = self._fenwick()
+        pos = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(tree) and tree[nxt] <= offset:
+                pos = nxt
+                offset -= tree[nxt]
+            step >>= 1
+        return pos, offset
+
+    def _insert(self, entry: tuple[Any, M]) -> None:
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            self._tree = None
+            return
+        pos = bisect_left(self._maxes, entry)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._buckets[pos].append(entry)
+            self._maxes[pos] = entry
+        else:
+            insort(self._buckets[pos], entry)
+        bucket = self._buckets[pos]
+        if len(bucket) > 2 * _BUCKET_SIZE:
+            half = bucket[_BUCKET_SIZE:]
+            del bucket[_BUCKET_SIZE:]
+            self._buckets.insert(pos + 1, half)
+            self._maxes[pos] = bucket[-1]
+            self._maxes.insert(pos + 1, half[-1])
+            self._tree = None
+        else:
+            self._resize(pos, 1)
+
+    def _discard(self, entry: tuple[Any, M]) -> None:
+        pos = bisect_left(self._maxes, entry)
+        bucket = self._buckets[pos]
+        del bucket[bisect_left(bucket, entry)]
+        if bucket:
+            self._maxes[pos] = bucket[-1]
+            self._resize(pos, -1)
+        else:
+            del self._buckets[pos]
+            del self._maxes[pos]
+            self._tree = None
@@ -1,12 +1,26 @@
+import uuid
 from uuid import UUID
-from sqlalchemy import select, func
+from sqlalchemy import case, func, insert, literal, select, true, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from fastapi import HTTPException
 
 from app.models.ticket import Ticket
 from app.models.pool import RafflePool
 from app.models.purchase import Purchase, PurchaseStatus, PurchaseType
+from app.models.wallet import (
+    WalletAccount,
+    WalletLedgerDirection,
+    WalletLedgerEntry,
+    WalletLedgerEntryStatus,
+    WalletLedgerReason,
+    WalletLedgerRef,
+)
 from app.schemas.ticket import TicketCreate
+from app.services.cache import pool_cache
+from app.services.trending import trending_engine
+from app.services.wallet import create_wallet_debit, get_or_create_wallet, register_ledger_ref
 
 async def create_ticket(db: AsyncSession, ticket_in: TicketCreate) -> Ticket:
     ticket, _ = await purchase_ticket_for_pool(
@@ -31,28 +45,84 @@ async def delete_ticket(db: AsyncSession, ticket: Ticket):
     await db.delete(ticket)
     await db.commit()
 
-async def purchase_ticket_for_pool(
-    db: AsyncSession,
+def _issue_ticket_stmt(
     pool_id: UUID,
     user_id: UUID,
     purchase_id: UUID,
+    wallet_entry_id: int | None,
 ):
-    pool = await db.get(RafflePool, pool_id)
-    if not pool:
-        raise HTTPException(status_code=404, detail="Pool not found")
+    """Claim the next seat of an OPEN pool and insert its ticket in one statement.
+
+    The UPDATE on ``raffle_pool`` takes the row lock, bumps ``tickets_sold`` and
+    flips the pool to FULL when the last seat goes; the INSERT reuses the new
+    counter value as ``ticket_num``. No row comes back when the pool is missing,
+    not OPEN or already sold out.
+    """
+    claimed = (
+        update(RafflePool)
+        .where(
+            RafflePool.pool_id == pool_id,
+            RafflePool.state == "OPEN",
+            RafflePool.tickets_sold < RafflePool.tickets_required,
+        )
+        .values(
+            tickets_sold=RafflePool.tickets_sold + 1,
+            state=case(
+                (RafflePool.tickets_sold + 1 >= RafflePool.tickets_required, "FULL"),
+                else_=RafflePool.state,
+            ),
+        )
+        .returning(RafflePool.pool_id, RafflePool.tickets_sold)
+        .cte("claimed")
+    )
+    return (
+        insert(Ticket)
+        .from_select(
+            ["pool_id", "user_id", "purchase_id", "wallet_entry_id", "ticket_num"],
+            select(
+                claimed.c.pool_id,
+                literal(user_id, Ticket.user_id.type),
+                literal(purchase_id, Ticket.purchase_id.type),
+                literal(wallet_entry_id, Ticket.wallet_entry_id.type),
+                claimed.c.tickets_sold,
+            ),
+        )
+        .returning(*Ticket.__table__.c)
+    )
 
-    if pool.state != "OPEN":
-        raise HTTPException(status_code=400, detail="Pool is not open")
+async def issue_ticket(
+    db: AsyncSession,
+    pool_id: UUID,
+    user_id: UUID,
+    purchase_id: UUID,
+    wallet_entry_id: int | None,
+) -> Ticket | None:
+    """Atomically issue the next ticket of the pool, or return None if no seat is left."""
+    stmt = select(Ticket).from_statement(
+        _issue_ticket_stmt(pool_id, user_id, purchase_id, wallet_entry_id)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
 
-    sold_query = select(func.count()).select_from(Ticket).where(Ticket.pool_id == pool.pool_id)
-    result = await db.execute(sold_query)
-    current_sold = result.scalar_one() or 0
+async def _raise_for_unavailable_pool(db: AsyncSession, pool_id: UUID):
+    pool = await db.get(RafflePool, pool_id, populate_existing=True)
+    if not pool:
+        raise HTTPException(status_code=404, detail="Pool not found")
 
-    if current_sold >= pool.tickets_required:
+    if pool.state == "OPEN" and pool.tickets_sold >= pool.tickets_required:
         pool.state = "FULL"
         await db.commit()
+        pool_cache.invalidate(pool_id)
+    if pool.state == "FULL":
         raise HTTPException(status_code=400, detail="Pool is already full")
+    raise HTTPException(status_code=400, detail="Pool is not open")
 
+async def purchase_ticket_for_pool(
+    db: AsyncSession,
+    pool_id: UUID,
+    user_id: UUID,
+    purchase_id: UUID,
+):
     purchase = await db.get(Purchase, purchase_id)
     if not purchase:
         raise HTTPException(status_code=404, detail="Purchase not found")
@@ -69,27 +139,289 @@ async def purchase_ticket_for_pool(
         )
 
     existing_ticket = await db.execute(
-        select(Ticket).where(Ticket.purchase_id == purchase.purchase_id)
+        select(Ticket.ticket_id).where(Ticket.purchase_id == purchase.purchase_id)
     )
-    if existing_ticket.scalars().first() is not None:
+    if existing_ticket.first() is not None:
         raise HTTPException(status_code=400, detail="Purchase already redeemed")
 
-    ticket_num = current_sold + 1
-    ticket = Ticket(
-        pool_id=pool.pool_id,
+    # Seat number, counter bump and FULL transition happen in a single
+    # statement, so concurrent buyers serialize on the pool row lock instead
+    # of racing on count(*) and colliding on uq_ticket_pool_ticketnum.
+    ticket = await issue_ticket(
+        db,
+        pool_id,
+        user_id,
+        purchase.purchase_id,
+        purchase.wallet_entry_id,
+    )
+    if ticket is None:
+        await _raise_for_unavailable_pool(db, pool_id)
+
+    await db.commit()
+    pool_cache.invalidate(pool_id)
+    trending_engine.record_tickets(pool_id, 1)
+
+    pool = await db.get(RafflePool, pool_id, populate_existing=True)
+
+    return ticket, pool
+
+def _reserve_ticket_range_stmt(pool_id: UUID, quantity: int):
+    """Reserve up to ``quantity`` contiguous seats of an OPEN pool in one UPDATE.
+
+    Returns ``(first_sold, tickets_sold, ticket_price_cents)``: the reserved
+    range is ``first_sold + 1 .. tickets_sold``, possibly shorter than
+    requested when the pool has fewer seats left (partial fill).
+    """
+    locked = (
+        select(RafflePool.pool_id, RafflePool.tickets_sold.label("first_sold"))
+        .where(
+            RafflePool.pool_id == pool_id,
+            RafflePool.state == "OPEN",
+            RafflePool.tickets_sold < RafflePool.tickets_required,
+        )
+        .with_for_update()
+        .cte("locked")
+    )
+    return (
+        update(RafflePool)
+        .where(RafflePool.pool_id == locked.c.pool_id)
+        .values(
+            tickets_sold=func.least(
+                locked.c.first_sold + quantity, RafflePool.tickets_required
+            ),
+            state=case(
+                (locked.c.first_sold + quantity >= RafflePool.tickets_required, "FULL"),
+                else_=RafflePool.state,
+            ),
+        )
+        .returning(
+            locked.c.first_sold,
+            RafflePool.tickets_sold,
+            RafflePool.ticket_price_cents,
+        )
+    )
+
+async def purchase_tickets_batch(
+    db: AsyncSession,
+    pool_id: UUID,
+    user_id: UUID,
+    quantity: int,
+) -> tuple[Purchase, WalletLedgerEntry, list[Ticket], WalletAccount]:
+    """Buy ``quantity`` entries of a pool with one purchase and one wallet debit.
+
+    Seats are reserved as a contiguous ``ticket_num`` range with a single pool
+    update, the wallet is debited once for the seats actually granted and all
+    tickets are written with a multi-row INSERT, all in one transaction.
+    """
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be greater than zero")
+
+    wallet = await get_or_create_wallet(db, user_id)
+
+    reserved = (await db.execute(_reserve_ticket_range_stmt(pool_id, quantity))).first()
+    if reserved is None:
+        await db.rollback()
+        await _raise_for_unavailable_pool(db, pool_id)
+
+    first_sold, last_num, price_cents = reserved
+    issued = last_num - first_sold
+    amount_cents = issued * price_cents
+
+    purchase = Purchase(
         user_id=user_id,
-        purchase_id=purchase.purchase_id,
-        wallet_entry_id=purchase.wallet_entry_id,
-        ticket_num=ticket_num,
+        pool_id=pool_id,
+        type=PurchaseType.ENTRY.value,
+        amount_cents=amount_cents,
+        status=PurchaseStatus.CONFIRMED.value,
     )
-    db.add(ticket)
+    db.add(purchase)
+    await db.flush()
 
-    if pool.tickets_sold >= pool.tickets_required:
-        pool.state = "FULL"
+    try:
+        entry = await create_wallet_debit(
+            db,
+            wallet,
+            amount_cents=amount_cents,
+            reason=WalletLedgerReason.TICKET_PURCHASE,
+            ref_purchase_id=purchase.purchase_id,
+            ref_pool_id=pool_id,
+            commit=False,
+        )
+    except HTTPException:
+        # Releases the reserved range together with the purchase
+        await db.rollback()
+        raise
+    await register_ledger_ref(db, entry.entry_id, created_at=entry.created_at)
+    purchase.wallet_entry_id = entry.entry_id
+
+    result = await db.execute(
+        insert(Ticket).returning(Ticket),
+        [
+            {
+                "pool_id": pool_id,
+                "user_id": user_id,
+                "purchase_id": purchase.purchase_id,
+                "wallet_entry_id": entry.entry_id,
+                "ticket_num": ticket_num,
+            }
+            for ticket_num in range(first_sold + 1, last_num + 1)
+        ],
+    )
+    tickets = list(result.scalars().all())
 
     await db.commit()
+    pool_cache.invalidate(pool_id)
+    trending_engine.record_tickets(pool_id, len(tickets))
+    return purchase, entry, tickets, wallet
 
-    await db.refresh(ticket)
-    await db.refresh(pool)
+def _checkout_stmt(pool_id: UUID, user_id: UUID, purchase_id: UUID):
+    """Seat, debit, ledger entry, purchase and ticket of a one-entry checkout in one statement.
 
-    return ticket, pool
+    ``claimed`` takes the pool row lock and the next seat like
+    ``_issue_ticket_stmt``; ``moved`` debits the ticket price from the buyer's
+    wallet only while the available balance covers it (pool first, then
+    wallet: the lock order of the batch purchase); the ledger entry, its
+    ``wallet_ledger_ref`` row, the CONFIRMED purchase and the ticket are
+    inserted from their ``RETURNING``. The foreign keys between the rows are
+    checked at the end of the statement, once every row exists. No row back
+    means no seat or not enough funds, and the seat UPDATE still ran: the
+    caller must roll back.
+    """
+    claimed = (
+        update(RafflePool)
+        .where(
+            RafflePool.pool_id == pool_id,
+            RafflePool.state == "OPEN",
+            RafflePool.tickets_sold < RafflePool.tickets_required,
+        )
+        .values(
+            tickets_sold=RafflePool.tickets_sold + 1,
+            state=case(
+                (RafflePool.tickets_sold + 1 >= RafflePool.tickets_required, "FULL"),
+                else_=RafflePool.state,
+            ),
+        )
+        .returning(
+            RafflePool.pool_id,
+            RafflePool.tickets_sold,
+            RafflePool.ticket_price_cents,
+        )
+        .cte("claimed")
+    )
+    moved = (
+        update(WalletAccount)
+        .where(
+            WalletAccount.user_id == user_id,
+            WalletAccount.balance_cents - WalletAccount.held_cents
+            >= claimed.c.ticket_price_cents,
+        )
+        .values(
+            balance_cents=WalletAccount.balance_cents - claimed.c.ticket_price_cents,
+            ledger_debit_cents=WalletAccount.ledger_debit_cents + claimed.c.ticket_price_cents,
+            ledger_entries=WalletAccount.ledger_entries + 1,
+        )
+        .returning(
+            *WalletAccount.__table__.c,
+            claimed.c.ticket_price_cents.label("charged_cents"),
+        )
+        .cte("moved")
+    )
+    entry = (
+        insert(WalletLedgerEntry)
+        .from_select(
+            ["wallet_id", "direction", "amount_cents", "reason", "status", "ref_purchase_id", "ref_pool_id"],
+            select(
+                moved.c.wallet_id,
+                literal(WalletLedgerDirection.DEBIT.value),
+                moved.c.charged_cents,
+                literal(WalletLedgerReason.TICKET_PURCHASE.value),
+                literal(WalletLedgerEntryStatus.POSTED.value),
+                literal(purchase_id, PG_UUID(as_uuid=True)),
+                literal(pool_id, PG_UUID(as_uuid=True)),
+            ),
+        )
+        .returning(
+            WalletLedgerEntry.entry_id,
+            WalletLedgerEntry.wallet_id,
+            WalletLedgerEntry.created_at,
+        )
+        .cte("entry")
+    )
+    ref = (
+        insert(WalletLedgerRef)
+        .from_select(
+            ["entry_id", "wallet_id", "created_at"],
+            select(entry.c.entry_id, entry.c.wallet_id, entry.c.created_at),
+        )
+        .returning(WalletLedgerRef.entry_id)
+        .cte("ref")
+    )
+    purchased = (
+        insert(Purchase)
+        .from_select(
+            ["purchase_id", "user_id", "pool_id", "wallet_entry_id", "type", "amount_cents", "currency", "status"],
+            select(
+                literal(purchase_id, PG_UUID(as_uuid=True)),
+                literal(user_id, PG_UUID(as_uuid=True)),
+                literal(pool_id, PG_UUID(as_uuid=True)),
+                ref.c.entry_id,
+                literal(PurchaseType.ENTRY.value),
+                moved.c.charged_cents,
+                moved.c.currency,
+                literal(PurchaseStatus.CONFIRMED.value),
+            ).join_from(ref, moved, true()),
+        )
+        .returning(*Purchase.__table__.c)
+        .cte("purchased")
+    )
+    issued = (
+        insert(Ticket)
+        .from_select(
+            ["pool_id", "user_id", "purchase_id", "wallet_entry_id", "ticket_num"],
+            select(
+                claimed.c.pool_id,
+                literal(user_id, PG_UUID(as_uuid=True)),
+                purchased.c.purchase_id,
+                purchased.c.wallet_entry_id,
+                claimed.c.tickets_sold,
+            ).join_from(purchased, claimed, purchased.c.pool_id == claimed.c.pool_id),
+        )
+        .returning(*Ticket.__table__.c)
+        .cte("issued")
+    )
+    ticket_alias = aliased(Ticket, issued)
+    purchase_alias = aliased(Purchase, purchased)
+    wallet_alias = aliased(WalletAccount, moved)
+    return (
+        select(ticket_alias, purchase_alias, wallet_alias)
+        .join_from(
+            ticket_alias, purchase_alias, ticket_alias.purchase_id == purchase_alias.purchase_id
+        )
+        .join_from(purchase_alias, wallet_alias, true())
+    )
+
+async def checkout_ticket(
+    db: AsyncSession,
+    pool_id: UUID,
+    user_id: UUID,
+) -> tuple[Ticket, Purchase, WalletAccount]:
+    """Buy one entry of a pool from the wallet: debit, purchase and ticket in one transaction.
+
+    Replaces the debit → purchase → ticket round trips with a single
+    statement and a commit. Returns the ticket, the purchase and the
+    wallet as left by the debit.
+    """
+    row = (await db.execute(_checkout_stmt(pool_id, user_id, uuid.uuid4()))).first()
+    if row is None:
+        # Gives the claimed seat back
+        await db.rollback()
+        pool = await db.get(RafflePool, pool_id, populate_existing=True)
+        if pool is None or pool.state != "OPEN" or pool.tickets_sold >= pool.tickets_required:
+            await _raise_for_unavailable_pool(db, pool_id)
+        raise HTTPException(status_code=400, detail="Saldo insufficiente")
+
+    ticket, purchase, wallet = row
+    await db.commit()
+    pool_cache.invalidate(pool_id)
+    trending_engine.record_tickets(pool_id, 1)
+    return ticket, purchase, wallet
@@ -0,0 +1,465 @@
+"""Top-up webhooks: acknowledge fast, apply in batches in the background.
+
+The endpoint only checks the signature and stores the events
+(``wallet_topup_event``, deduplicated on provider + provider event id), then
+wakes the processor. ``TopupEventProcessor`` runs ``workers`` tasks; each
+claims up to ``batch`` RECEIVED events with ``FOR UPDATE SKIP LOCKED`` and, in
+one transaction,
+
+* completes the matching CREATED/PROCESSING top-ups, appends their TOPUP
+  credits and moves the balances, one statement for the whole batch;
+* marks the top-ups of ``topup.failed`` events FAILED;
+* records the outcome of every event: APPLIED, IGNORED (top-up already
+  settled, e.g. a second delivery under a new event id) or FAILED.
+
+A batch that trips ``uq_wallet_topup_provider_txn`` is redone one event per
+transaction, so a single bad event does not hold back the others.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Sequence
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import BigInteger, Integer, String, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.wallet import (
+    WalletAccount,
+    WalletLedgerDirection,
+    WalletLedgerEntry,
+    WalletLedgerEntryStatus,
+    WalletLedgerReason,
+    WalletTopupEvent,
+    WalletTopupEventStatus,
+    WalletTopupRequest,
+    WalletTopupStatus,
+)
+from app.schemas.wallet import TopupWebhookEvent, TopupWebhookEventType
+
+logger = logging.getLogger(__name__)
+
+_OPEN_TOPUP_STATES = (WalletTopupStatus.CREATED.value, WalletTopupStatus.PROCESSING.value)
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    digest = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256)
+    return f"sha256={digest.hexdigest()}"
+
+
+def verify_signature(
+    secret: str,
+    timestamp: str | None,
+    signature: str | None,
+    body: bytes,
+    *,
+    tolerance_seconds: int,
+) -> None:
+    if not timestamp or not signature:
+        raise HTTPException(status_code=401, detail="Missing webhook signature")
+    try:
+        sent_at = int(timestamp)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid webhook timestamp")
+    if abs(time.time() - sent_at) > tolerance_seconds:
+        raise HTTPException(status_code=401, detail="Webhook timestamp outside tolerance")
+    if not hmac.compare_digest(sign_payload(secret, timestamp, body), signature):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+
+async def ingest_topup_events(
+    db: AsyncSession,
+    provider: str,
+    events: Sequence[TopupWebhookEvent],
+) -> tuple[int, int]:
+    """Store raw events; return (stored, duplicates)."""
+    rows = [
+        {
+            "provider": provider,
+            "provider_event_id": event.id,
+            "event_type": event.type.value,
+            "topup_id": event.topup_id,
+            "provider_txn_id": event.provider_txn_id,
+            "amount_cents": event.amount_cents,
+            "payload": event.model_dump(mode="json"),
+        }
+        for event in events
+    ]
+    # Parameter list rather than .values(rows): one cached statement for any
+    # batch size, sent as multi-row INSERTs by the driver
+    stmt = (
+        pg_insert(WalletTopupEvent)
+        .on_conflict_do_nothing(constraint="uq_wallet_topup_event_provider_event")
+        .returning(WalletTopupEvent.event_id)
+    )
+    stored = len((await db.execute(stmt, rows)).all())
+    await db.commit()
+    return stored, len(rows) - stored
+
+
+def _credit_stmt(events: Sequence[WalletTopupEvent]):
+    """Complete the top-ups of ``events`` (one per top-up) and credit their wallets."""
+    batch = select(
+        func.unnest(
+            literal([e.topup_id for e in events], ARRAY(PG_UUID(as_uuid=True)))
+        ).label("topup_id"),
+        func.unnest(literal([e.provider_txn_id for e in events], ARRAY(String))).label(
+            "provider_txn_id"
+        ),
+        func.unnest(literal([e.amount_cents for e in events], ARRAY(Integer))).label(
+            "amount_cents"
+        ),
+    ).cte("batch")
+    applied = (
+        update(WalletTopupRequest)
+        .where(
+            WalletTopupRequest.topup_id == batch.c.topup_id,
+            WalletTopupRequest.status.in_(_OPEN_TOPUP_STATES),
+            WalletTopupRequest.amount_cents == batch.c.amount_cents,
+        )
+        .values(
+            status=WalletTopupStatus.COMPLETED.value,
+            completed_at=func.now(),
+            provider_txn_id=func.coalesce(
+                WalletTopupRequest.provider_txn_id, batch.c.provider_txn_id
+            ),
+        )
+        .returning(
+            WalletTopupRequest.topup_id,
+            WalletTopupRequest.wallet_id,
+            WalletTopupRequest.amount_cents,
+            WalletTopupRequest.provider_txn_id,
+        )
+        .cte("applied")
+    )
+    credited = (
+        insert(WalletLedgerEntry)
+        .from_select(
+            ["wallet_id", "direction", "amount_cents", "reason", "status", "ref_external_txn"],
+            select(
+                applied.c.wallet_id,
+                literal(WalletLedgerDirection.CREDIT.value),
+                applied.c.amount_cents,
+                literal(WalletLedgerReason.TOPUP.value),
+                literal(WalletLedgerEntryStatus.POSTED.value),
+                applied.c.provider_txn_id,
+            ),
+        )
+        .cte("credited")
+    )
+    per_wallet = (
+        select(
+            applied.c.wallet_id,
+            func.sum(applied.c.amount_cents).label("amount_cents"),
+            func.count().label("entries"),
+        )
+        .group_by(applied.c.wallet_id)
+        .cte("per_wallet")
+    )
+    # Wallets locked in id order: workers crediting the same wallets queue
+    # instead of deadlocking
+    locked = (
+        select(WalletAccount.wallet_id)
+        .where(WalletAccount.wallet_id.in_(select(per_wallet.c.wallet_id)))
+        .order_by(WalletAccount.wallet_id)
+        .with_for_update(key_share=True)
+        .cte("locked")
+    )
+    moved = (
+        update(WalletAccount)
+        .where(
+            WalletAccount.wallet_id == per_wallet.c.wallet_id,
+            WalletAccount.wallet_id == locked.c.wallet_id,
+        )
+        .values(
+            balance_cents=WalletAccount.balance_cents + per_wallet.c.amount_cents,
+            ledger_entries=WalletAccount.ledger_entries + per_wallet.c.entries,
+            ledger_credit_cents=WalletAccount.ledger_credit_cents + per_wallet.c.amount_cents,
+        )
+        .returning(WalletAccount.wallet_id)
+        .cte("moved")
+    )
+    return select(applied.c.topup_id).add_cte(credited, moved)
+
+
+class TopupEventProcessor:
+    def __init__(
+        self,
+        *,
+        workers: int,
+        batch: int,
+        poll_seconds: float,
+        window: int = 1024,
+    ) -> None:
+        self.workers = workers
+        self.batch = batch
+        self.poll_seconds = poll_seconds
+        self.received = 0
+        self.duplicates = 0
+        self.batches = 0
+        self.applied = 0
+        self.ignored = 0
+        self.failed = 0
+        self.last_batch_at: datetime | None = None
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+        self._lags: deque[float] = deque(maxlen=window)
+        self._recent: deque[tuple[float, int]] = deque(maxlen=window)
+        self._wakeup = asyncio.Event()
+
+    def record_ingested(self, stored: int, duplicates: int) -> None:
+        self.received += stored
+        self.duplicates += duplicates
+        if stored:
+            self._wakeup.set()
+
+    async def _claim(self, db: AsyncSession, event_ids: Sequence[int] | None = None):
+        stmt = select(WalletTopupEvent).where(
+            WalletTopupEvent.status == WalletTopupEventStatus.RECEIVED.value
+        )
+        if event_ids is not None:
+            stmt = stmt.where(WalletTopupEvent.event_id.in_(event_ids))
+        stmt = (
+            stmt.order_by(WalletTopupEvent.event_id)
+            .limit(self.batch)
+            .with_for_update(skip_locked=True)
+        )
+        return list((await db.execute(stmt)).scalars().all())
+
+    async def _apply(self, db: AsyncSession, events: list[WalletTopupEvent]) -> list[float]:
+        """Apply claimed events and record their outcome; return their lags in seconds."""
+        # Top-ups are locked in id order before any wallet, so workers never
+        # wait on each other in a cycle
+        topups = {
+            row.topup_id: row
+            for row in (
+                await db.execute(
+                    select(
+                        WalletTopupRequest.topup_id,
+                        WalletTopupRequest.provider,
+                        WalletTopupRequest.status,
+                        WalletTopupRequest.amount_cents,
+                    )
+                    .where(WalletTopupRequest.topup_id.in_({e.topup_id for e in events}))
+                    .order_by(WalletTopupRequest.topup_id)
+                    .with_for_update()
+                )
+            ).all()
+        }
+        # The first applicable event settles a top-up; later ones are redeliveries
+        succeeded: dict[UUID, WalletTopupEvent] = {}
+        failed: dict[UUID, WalletTopupEvent] = {}
+        for event in events:
+            topup = topups.get(event.topup_id)
+            if (
+                topup is None
+                or topup.provider != event.provider
+                or topup.status not in _OPEN_TOPUP_STATES
+                or event.topup_id in succeeded
+                or event.topup_id in failed
+            ):
+                continue
+            if event.event_type == TopupWebhookEventType.FAILED.value:
+                failed[event.topup_id] = event
+            elif event.amount_cents == topup.amount_cents:
+                succeeded[event.topup_id] = event
+
+        applied_ids: set[int] = set()
+        settled: dict[UUID, str] = {}
+        if succeeded:
+            for topup_id in (await db.execute(_credit_stmt(list(succeeded.values())))).scalars():
+                applied_ids.add(succeeded[topup_id].event_id)
+                settled[topup_id] = WalletTopupStatus.COMPLETED.value
+        if failed:
+            marked = await db.execute(
+                update(WalletTopupRequest)
+                .where(
+                    WalletTopupRequest.topup_id.in_(failed),
+                    WalletTopupRequest.status.in_(_OPEN_TOPUP_STATES),
+                )
+                .values(status=WalletTopupStatus.FAILED.value)
+                .returning(WalletTopupRequest.topup_id)
+            )
+            for topup_id in marked.scalars():
+                applied_ids.add(failed[topup_id].event_id)
+                settled[topup_id] = WalletTopupStatus.FAILED.value
+
+        outcomes: list[tuple[int, str, str | None]] = []
+        for event in events:
+            topup = topups.get(event.topup_id)
+            if event.event_id in applied_ids:
+                outcome = (WalletTopupEventStatus.APPLIED.value, None)
+            elif topup is None:
+                outcome = (WalletTopupEventStatus.FAILED.value, "Unknown top-up")
+            elif topup.provider != event.provider:
+                outcome = (WalletTopupEventStatus.FAILED.value, "Top-up belongs to another provider")
+            else:
+                status = settled.get(event.topup_id, topup.status)
+                if (
+                    status in _OPEN_TOPUP_STATES
+                    and event.event_type == TopupWebhookEventType.SUCCEEDED.value
+                ):
+                    outcome = (
+                        WalletTopupEventStatus.FAILED.value,
+                        f"Amount mismatch: top-up is {topup.amount_cents} cents",
+                    )
+                else:
+                    outcome = (WalletTopupEventStatus.IGNORED.value, f"Top-up already {status}")
+            outcomes.append((event.event_id, *outcome))
+
+        return await self._mark(db, outcomes)
+
+    async def _mark(self, db: AsyncSession, outcomes: list[tuple[int, str, str | None]]) -> list[float]:
+        ids, statuses, errors = zip(*outcomes)
+        marks = select(
+            func.unnest(literal(list(ids), ARRAY(BigInteger))).label("event_id"),
+            func.unnest(literal(list(statuses), ARRAY(String))).label("status"),
+            func.unnest(literal(list(errors), ARRAY(String))).label("error"),
+        ).subquery("marks")
+        processed_at = func.clock_timestamp()
+        lags = await db.execute(
+            update(WalletTopupEvent)
+            .where(WalletTopupEvent.event_id == marks.c.event_id)
+            .values(status=marks.c.status, error=marks.c.error, processed_at=processed_at)
+            .returning(
+                WalletTopupEvent.status,
+                func.extract("epoch", WalletTopupEvent.processed_at - WalletTopupEvent.received_at),
+            )
+        )
+        counted = []
+        for status, lag in lags.all():
+            if status == WalletTopupEventStatus.APPLIED.value:
+                self.applied += 1
+            elif status == WalletTopupEventStatus.IGNORED.value:
+                self.ignored += 1
+            else:
+                self.failed += 1
+            counted.append(float(lag))
+        return counted
+
+    async def _apply_one_by_one(
+        self, session_factory: async_sessionmaker[AsyncSession], event_ids: list[int]
+    ) -> list[float]:
+        lags: list[float] = []
+        for event_id in event_ids:
+            async with session_factory() as db:
+                events = await self._claim(db, [event_id])
+                if not events:
+                    continue
+                try:
+                    lags += await self._apply(db, events)
+                    await db.commit()
+                    continue
+                except IntegrityError:
+                    await db.rollback()
+                events = await self._claim(db, [event_id])
+                if events:
+                    lags += await self._mark(
+                        db,
+                        [
+                            (
+                                event_id,
+                                WalletTopupEventStatus.FAILED.value,
+                                "provider_txn_id already used by another top-up",
+                            )
+                        ],
+                    )
+                    await db.commit()
+        return lags
+
+    async def process_batch(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+        """Apply up to ``batch`` received events; return how many were claimed."""
+        started = time.perf_counter()
+        async with session_factory() as db:
+            events = await self._claim(db)
+            if not events:
+                return 0
+            event_ids = [event.event_id for event in events]
+            try:
+                lags = await self._apply(db, events)
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                lags = None
+        if lags is None:
+            lags = await self._apply_one_by_one(session_factory, event_ids)
+
+        self.batches += 1
+        self.last_batch_at = datetime.now(timezone.utc)
+        self.last_batch_size = len(event_ids)
+        self.last_batch_ms = (time.perf_counter() - started) * 1000
+        self._lags.extend(lags)
+        self._recent.append((time.monotonic(), len(event_ids)))
+        return len(event_ids)
+
+    async def _worker(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                processed = await self.process_batch(session_factory)
+            except Exception:
+                # Claimed events stay RECEIVED and are picked up again
+                logger.exception("Top-up event batch failed")
+                processed = 0
+            if processed < self.batch:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        await asyncio.gather(*(self._worker(session_factory) for _ in range(self.workers)))
+
+    async def snapshot_stats(self, db: AsyncSession) -> dict:
+        backlog, oldest = (
+            await db.execute(
+                select(func.count(), func.min(WalletTopupEvent.received_at)).where(
+                    WalletTopupEvent.status == WalletTopupEventStatus.RECEIVED.value
+                )
+            )
+        ).one()
+        lags = sorted(self._lags)
+
+        def pct(p: float) -> float:
+            if not lags:
+                return 0.0
+            return lags[min(len(lags) - 1, int(p / 100 * len(lags)))] * 1000
+
+        horizon = time.monotonic() - 10
+        return {
+            "workers": self.workers,
+            "batch_size": self.batch,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "batches": self.batches,
+            "applied": self.applied,
+            "ignored": self.ignored,
+            "failed": self.failed,
+            "backlog": backlog,
+            "oldest_pending_seconds": (
+                (datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0.0
+            ),
+            "events_per_sec": sum(n for at, n in self._recent if at >= horizon) / 10,
+            "last_batch_at": self.last_batch_at,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": self.last_batch_ms,
+            "lag_p50_ms": pct(50),
+            "lag_p99_ms": pct(99),
+        }
+
+
+topup_event_processor = TopupEventProcessor(
+    workers=settings.TOPUP_WEBHOOK_WORKERS,
+    batch=settings.TOPUP_WEBHOOK_BATCH,
+    poll_seconds=settings.TOPUP_WEBHOOK_POLL_SECONDS,
+)
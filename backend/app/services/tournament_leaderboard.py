@@ -0,0 +1,324 @@
+"""Live leaderboards of the active tournament phases, kept in memory.
+
+One ``RankedIndex`` per active phase, keyed on ``(best_score desc,
+best_time_seconds asc)`` with missing values last and ties broken by
+player_id, the order ``_apply_elimination_rules`` ranks a ``top_percentage``
+phase by: a result, a top-N page and a player's rank each cost O(log n)
+instead of an ORDER BY over ``tournament_participants``.
+
+Results go through ``record_result``: the local index moves at once and the
+player's best is buffered. Each worker flushes its buffer into
+``tournament_participants`` (an improvement only ever overwrites a worse
+best, whichever worker wrote first) and pulls the rows other workers played
+since the last refresh (``last_played_at``). On start, and every
+``full_reload_seconds``, every active phase is reloaded from the database,
+which also drops the phases that ended.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import Integer, and_, case, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.tournament_participant import TournamentParticipant
+from app.models.tournament_phase import PhaseStatus, TournamentPhase
+from app.services.ranking import RankedIndex
+
+logger = logging.getLogger(__name__)
+
+# Rows played up to this long before the watermark are re-read on refresh
+_REFRESH_OVERLAP = timedelta(seconds=5)
+# Sorts after any score/time: missing values rank last
+_LAST = math.inf
+# Participants read per block when loading a phase
+_LOAD_BATCH = 10_000
+
+
+def _key(score: Optional[int], time_seconds: Optional[int]) -> tuple:
+    return (
+        _LAST if score is None else -score,
+        _LAST if time_seconds is None else time_seconds,
+    )
+
+
+def _unkey(key: tuple) -> tuple[Optional[int], Optional[int]]:
+    """``(best_score, best_time_seconds)`` back from an index key."""
+    score, time_seconds = key
+    return (
+        None if score == _LAST else -score,
+        None if time_seconds == _LAST else time_seconds,
+    )
+
+
+def _results(rows: Sequence[tuple[UUID, UUID, Optional[int], Optional[int], int]]):
+    # Array parameters, as for the trending deltas: constant planning cost
+    # however many players a flush touches
+    rows = sorted(rows, key=lambda row: (row[0], row[1]))
+    return (
+        func.unnest(
+            literal([row[0] for row in rows], ARRAY(PG_UUID(as_uuid=True))),
+            literal([row[1] for row in rows], ARRAY(PG_UUID(as_uuid=True))),
+            literal([row[2] for row in rows], ARRAY(Integer)),
+            literal([row[3] for row in rows], ARRAY(Integer)),
+            literal([row[4] for row in rows], ARRAY(Integer)),
+        )
+        .table_valued("phase_id", "player_id", "best_score", "best_time_seconds", "sessions")
+        .render_derived(name="leaderboard_result")
+    )
+
+
+class TournamentLeaderboards:
+    def __init__(self) -> None:
+        self.phases: dict[UUID, RankedIndex[UUID]] = {}
+        self._tournament_of: dict[UUID, UUID] = {}
+        # (phase_id, player_id) -> [best key, sessions played since the last flush]
+        self._pending: dict[tuple[UUID, UUID], list[Any]] = {}
+        self._watermark: datetime | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self.recorded = 0
+        self.flushed = 0
+
+    # -- ingestion ---------------------------------------------------------
+
+    def record_result(
+        self,
+        tournament_id: UUID,
+        phase_id: UUID,
+        player_id: UUID,
+        score: Optional[int],
+        time_seconds: Optional[int],
+    ) -> int:
+        """Count one played session; return the player's 1-based rank in the phase."""
+        index = self.phases.get(phase_id)
+        if index is None:
+            # Not loaded yet: the next refresh adds the other participants
+            index = self.phases[phase_id] = RankedIndex()
+        key = _key(score, time_seconds)
+        current = index.key_of(player_id)
+        if current is None or key < current:
+            index.set(player_id, key)
+        else:
+            key = current
+        pending = self._pending.get((phase_id, player_id))
+        if pending is None:
+            self._pending[phase_id, player_id] = [key, 1]
+        else:
+            pending[0] = min(pending[0], key)
+            pending[1] += 1
+        self.recorded += 1
+        return index.rank(player_id) + 1
+
+    async def flush(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+        """Write the buffered bests to ``tournament_participants``; return the rows touched."""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        P = TournamentParticipant
+        d = _results(
+            [
+                (phase_id, player_id, *_unkey(key), sessions)
+                for (phase_id, player_id), (key, sessions) in batch.items()
+            ]
+        )
+        # The order of _key: score desc, then time asc, missing values last
+        better = or_(
+            and_(
+                d.c.best_score.is_not(None),
+                or_(P.best_score.is_(None), d.c.best_score > P.best_score),
+            ),
+            and_(
+                d.c.best_score.is_not_distinct_from(P.best_score),
+                d.c.best_time_seconds.is_not(None),
+                or_(
+                    P.best_time_seconds.is_(None),
+                    d.c.best_time_seconds < P.best_time_seconds,
+                ),
+            ),
+        )
+        try:
+            async with session_factory() as db:
+                await db.execute(
+                    update(P)
+                    .where(P.phase_id == d.c.phase_id, P.player_id == d.c.player_id)
+                    .values(
+                        best_score=case((better, d.c.best_score), else_=P.best_score),
+                        best_time_seconds=case(
+                            (better, d.c.best_time_seconds), else_=P.best_time_seconds
+                        ),
+                        sessions_count=P.sessions_count + d.c.sessions,
+                        last_played_at=func.now(),
+                    )
+                )
+                await db.commit()
+        except asyncio.CancelledError:
+            # Shutdown cancels run() mid-flush: the final flush() gets these
+            self._requeue(batch)
+            raise
+        except Exception:
+            logger.exception("Leaderboard flush failed, %d results kept pending", len(batch))
+            self._requeue(batch)
+            return 0
+        self.flushed += len(batch)
+        return len(batch)
+
+    def _requeue(self, batch: dict[tuple[UUID, UUID], list[Any]]) -> None:
+        for entry, (key, sessions) in batch.items():
+            pending = self._pending.get(entry)
+            if pending is None:
+                self._pending[entry] = [key, sessions]
+            else:
+                pending[0] = min(pending[0], key)
+                pending[1] += sessions
+
+    # -- materialization ---------------------------------------------------
+
+    async def refresh(
+        self, session_factory: async_sessionmaker[AsyncSession], *, full: bool = False
+    ) -> int:
+        """Pull the participants played since the last refresh; return the rows read.
+
+        ``full`` reloads every active phase and drops the others.
+        """
+        async with self._lock:
+            P = TournamentParticipant
+            incremental = not full and self._watermark is not None
+            async with session_factory() as db:
+                # Transaction start: flushes committing later are re-read next
+                # time, thanks to the overlap
+                started_at = await db.scalar(select(func.now()))
+                active = dict(
+                    (
+                        await db.execute(
+                            select(TournamentPhase.id, TournamentPhase.tournament_id).where(
+                                TournamentPhase.status == PhaseStatus.ACTIVE.value
+                            )
+                        )
+                    ).all()
+                )
+                columns = (P.phase_id, P.player_id, P.best_score, P.best_time_seconds)
+                loaded = active.keys() & self._tournament_of.keys() if incremental else set()
+                # Phases started since the last refresh are read whole
+                fresh = active.keys() - loaded
+                stmts = []
+                if loaded:
+                    stmts.append(
+                        select(*columns).where(
+                            P.phase_id.in_(loaded),
+                            P.last_played_at > self._watermark - _REFRESH_OVERLAP,
+                        )
+                    )
+                if fresh:
+                    stmts.append(select(*columns).where(P.phase_id.in_(fresh)))
+                by_phase: dict[UUID, list[tuple[UUID, tuple]]] = defaultdict(list)
+                read = 0
+                for stmt in stmts:
+                    # In blocks: a million-player phase does not hold the event loop
+                    result = await db.stream(stmt.execution_options(yield_per=_LOAD_BATCH))
+                    async for rows in result.partitions():
+                        for phase_id, player_id, score, time_seconds in rows:
+                            by_phase[phase_id].append((player_id, _key(score, time_seconds)))
+                        read += len(rows)
+
+            if incremental:
+                for phase_id in self.phases.keys() - active.keys():
+                    del self.phases[phase_id]
+                for phase_id in active:
+                    index = self.phases.setdefault(phase_id, RankedIndex())
+                    # A best never gets worse: keep a local one not flushed yet
+                    index.update(
+                        (player_id, key)
+                        for player_id, key in by_phase.get(phase_id, ())
+                        if (current := index.key_of(player_id)) is None or key < current
+                    )
+            else:
+                self.phases = {
+                    phase_id: RankedIndex(by_phase.get(phase_id, ())) for phase_id in active
+                }
+                # Results recorded while reading are not in the database yet
+                for (phase_id, player_id), (key, _) in self._pending.items():
+                    index = self.phases.get(phase_id)
+                    if index is not None and (
+                        (current := index.key_of(player_id)) is None or key < current
+                    ):
+                        index.set(player_id, key)
+                self._loaded_at = time.monotonic()
+            self._tournament_of = active
+            self._watermark = started_at
+            return read
+
+    async def run(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        interval_seconds: float,
+        full_reload_seconds: float,
+    ) -> None:
+        await self.refresh(session_factory, full=True)
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.flush(session_factory)
+                full = time.monotonic() - self._loaded_at > full_reload_seconds
+                await self.refresh(session_factory, full=full)
+            except Exception:
+                logger.exception("Leaderboard refresh failed")
+
+    # -- reads ---------------------------------------------------------------
+
+    def _index(self, tournament_id: UUID, phase_id: UUID) -> RankedIndex[UUID] | None:
+        if self._tournament_of.get(phase_id) != tournament_id:
+            return None
+        return self.phases.get(phase_id)
+
+    def size(self, tournament_id: UUID, phase_id: UUID) -> int | None:
+        index = self._index(tournament_id, phase_id)
+        return None if index is None else len(index)
+
+    def top(
+        self, tournament_id: UUID, phase_id: UUID, offset: int, limit: int
+    ) -> list[tuple[int, UUID, Optional[int], Optional[int]]] | None:
+        """``(rank, player_id, best_score, best_time_seconds)`` for ranks ``offset+1 .. offset+limit``.
+
+        ``None`` when the phase is not active (or not of this tournament).
+        """
+        index = self._index(tournament_id, phase_id)
+        if index is None:
+            return None
+        return [
+            (offset + i + 1, player_id, *_unkey(key))
+            for i, (player_id, key) in enumerate(index.page(offset, limit))
+        ]
+
+    def rank_of(
+        self, tournament_id: UUID, phase_id: UUID, player_id: UUID
+    ) -> tuple[int, Optional[int], Optional[int]] | None:
+        index = self._index(tournament_id, phase_id)
+        if index is None:
+            return None
+        rank = index.rank(player_id)
+        if rank is None:
+            return None
+        return (rank + 1, *_unkey(index.key_of(player_id)))
+
+    def snapshot_stats(self) -> dict:
+        return {
+            "phases": len(self.phases),
+            "players": sum(len(index) for index in self.phases.values()),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "pending": len(self._pending),
+            "watermark": self._watermark,
+        }
+
+
+tournament_leaderboards = TournamentLeaderboards()
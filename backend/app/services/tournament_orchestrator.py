@@ -1,13 +1,18 @@
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, desc, asc
+from sqlalchemy import ColumnElement, Select, and_, case, false, func, insert, literal, select, true, update
 from fastapi import HTTPException
 
 from app.models.tournament import Tournament, TournamentStatus
 from app.models.tournament_phase import TournamentPhase, PhaseStatus
 from app.models.tournament_participant import TournamentParticipant
 from app.models.pool import RafflePool
+from app.models.ticket import Ticket
+
+# NOTIFY channel: payload is the id of a tournament whose start or phase
+# deadline changed (app/services/tournament_scheduler.py listens on it)
+SCHEDULE_CHANNEL = "tournament_schedule"
 
 class TournamentOrchestrator:
     """
@@ -23,6 +28,10 @@ class TournamentOrchestrator:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    async def _notify_schedule_change(self, tournament_id) -> None:
+        """Avvisa lo scheduler; la notifica parte solo al commit della transazione"""
+        await self.db.execute(select(func.pg_notify(SCHEDULE_CHANNEL, str(tournament_id))))
+
     async def convert_pool_to_tournament(
         self,
         pool_id: str,
@@ -75,110 +84,116 @@ class TournamentOrchestrator:
         # Aggiorna stato pool
         pool.state = "TOURNAMENT_READY"
         
+        await self._notify_schedule_change(tournament.id)
         await self.db.commit()
         await self.db.refresh(tournament)
         return tournament
 
-    async def check_phase_deadlines(self) -> List[TournamentPhase]:
+    async def process_expired_phase(self, phase: TournamentPhase):
+        """Eliminazioni della fase scaduta, poi fase successiva o fine torneo.
+
+        Un solo commit per tutto: una fase non resta mai chiusa con il torneo
+        fermo su di essa.
         """
-        Cron job principale: controlla tutte le fasi scadute e attiva eliminazioni.
-        Da chiamare ogni ora via scheduler.
+        await self.process_phase_elimination(phase, commit=False)
+        tournament = await self.db.get(Tournament, phase.tournament_id)
+        await self.setup_next_phase_or_complete_tournament(tournament)
+
+    async def process_phase_elimination(self, phase: TournamentPhase, commit: bool = True):
+        """Applica le regole di eliminazione per una fase scaduta.
+
+        Classifica e regola sono valutate nel database: un solo UPDATE ... FROM
+        su una query con window function aggiorna tutti i partecipanti della
+        fase, senza caricarli come oggetti ORM.
         """
-        
-        # Trova fasi attive scadute
-        stmt = select(TournamentPhase).where(
-            and_(
-                TournamentPhase.status == PhaseStatus.ACTIVE,
-                TournamentPhase.deadline_at <= datetime.utcnow()
+        P = TournamentParticipant
+        qualified = self._apply_elimination_rules(phase)
+        ranked = (
+            select(P.id, func.coalesce(qualified, False).label("qualified"))
+            .where(P.phase_id == phase.id)
+            .subquery("ranked")
+        )
+        updated = (
+            update(P)
+            .where(P.id == ranked.c.id)
+            .values(
+                qualified=ranked.c.qualified,
+                qualified_at=case((ranked.c.qualified, func.now()), else_=None),
+                eliminated_at=case((ranked.c.qualified, None), else_=func.now()),
             )
+            .returning(P.qualified)
+            .cte("updated")
         )
-        result = await self.db.execute(stmt)
-        expired_phases = result.scalars().all()
-
-        processed_phases = []
-        for phase in expired_phases:
-            await self.process_phase_elimination(phase)
-            await self.setup_next_phase_or_complete_tournament(phase.tournament)
-            processed_phases.append(phase)
-
-        return processed_phases
+        qualified_count = (
+            await self.db.execute(
+                select(func.count()).select_from(updated).where(updated.c.qualified)
+            )
+        ).scalar_one()
 
-    async def process_phase_elimination(self, phase: TournamentPhase):
-        """Applica le regole di eliminazione per una fase scaduta"""
-        
-        # Ottieni tutti i partecipanti della fase
-        stmt = select(TournamentParticipant).where(
-            TournamentParticipant.phase_id == phase.id
-        ).order_by(
-            desc(TournamentParticipant.best_score),
-            asc(TournamentParticipant.best_time_seconds)
-        )
-        result = await self.db.execute(stmt)
-        participants = result.scalars().all()
+        # Aggiorna statistiche fase
+        phase.status = PhaseStatus.COMPLETED
+        phase.qualified_count = qualified_count
 
-        if not participants:
-            phase.status = PhaseStatus.COMPLETED
+        if commit:
             await self.db.commit()
-            return
-
-        # Applica regole eliminazione
-        qualified_participants = self._apply_elimination_rules(participants, phase)
-        
-        # Aggiorna stato partecipanti
-        for participant in participants:
-            if participant in qualified_participants:
-                participant.qualified = True
-                participant.qualified_at = datetime.utcnow()
-            else:
-                participant.qualified = False
-                participant.eliminated_at = datetime.utcnow()
 
-        # Aggiorna statistiche fase
-        phase.status = PhaseStatus.COMPLETED
-        phase.qualified_count = len(qualified_participants)
-        
-        await self.db.commit()
+    def _apply_elimination_rules(self, phase: TournamentPhase) -> ColumnElement[bool]:
+        """Condizione SQL di qualificazione di un partecipante, per la regola della fase.
 
-    def _apply_elimination_rules(
-        self, 
-        participants: List[TournamentParticipant], 
-        phase: TournamentPhase
-    ) -> List[TournamentParticipant]:
-        """Applica le regole di eliminazione specifiche della fase"""
-        
+        Le regole a percentuale usano row_number()/count() OVER sulla fase:
+        la classifica è best_score DESC, best_time_seconds ASC (NULL in fondo),
+        a parità player_id: lo stesso ordine delle classifiche live
+        (app/services/tournament_leaderboard.py).
+        """
+        P = TournamentParticipant
         rule = phase.elimination_rule or {'type': 'top_percentage', 'value': 50}
         rule_type = rule.get('type')
 
         if rule_type == 'top_percentage':
             percentage = rule.get('value', 50)
-            qualified_count = max(1, int(len(participants) * percentage / 100))
-            return participants[:qualified_count]
-        
+            position = func.row_number().over(
+                order_by=(
+                    P.best_score.desc().nulls_last(),
+                    P.best_time_seconds.asc().nulls_last(),
+                    P.player_id,
+                )
+            )
+            return position <= self._top_count(func.count().over(), percentage)
+
         elif rule_type == 'min_score':
-            min_score = rule.get('value', 0)
-            return [p for p in participants if p.best_score >= min_score]
-        
+            return P.best_score >= rule.get('value', 0)
+
         elif rule_type == 'max_time':
-            max_time = rule.get('value', float('inf'))
-            return [p for p in participants if p.best_time_seconds <= max_time]
-        
+            max_time = rule.get('value')
+            if max_time is None:
+                return P.best_time_seconds.is_not(None)
+            return P.best_time_seconds <= max_time
+
         elif rule_type == 'combined':
             # Prima filtra per punteggio minimo, poi prendi top N% per tempo
-            min_score = rule.get('min_score', 0)
-            score_qualified = [p for p in participants if p.best_score >= min_score]
-            
-            if not score_qualified:
-                return []
-                
-            percentage = rule.get('time_percentage', 50)
-            time_qualified_count = max(1, int(len(score_qualified) * percentage / 100))
-            
-            # Riordina per tempo tra quelli che hanno passato il punteggio
-            score_qualified.sort(key=lambda p: p.best_time_seconds)
-            return score_qualified[:time_qualified_count]
-        
+            # tra quelli che hanno passato il punteggio (a parità di tempo
+            # resta l'ordine della classifica)
+            score_ok = func.coalesce(P.best_score >= rule.get('min_score', 0), False)
+            position = func.row_number().over(
+                partition_by=score_ok,
+                order_by=(
+                    P.best_time_seconds.asc().nulls_last(),
+                    P.best_score.desc().nulls_last(),
+                    P.player_id,
+                ),
+            )
+            top = self._top_count(
+                func.count().over(partition_by=score_ok), rule.get('time_percentage', 50)
+            )
+            return and_(score_ok, position <= top)
+
         # Default: tutti qualificati
-        return participants
+        return true()
+
+    @staticmethod
+    def _top_count(total: ColumnElement[int], percentage: float) -> ColumnElement[int]:
+        # max(1, int(total * percentage / 100)): divisione esatta, poi troncata
+        return func.greatest(1, func.floor(total * percentage / 100))
 
     async def setup_next_phase_or_complete_tournament(self, tournament: Tournament):
         """Avvia la fase successiva o completa il torneo se è l'ultima"""
@@ -218,6 +233,7 @@ class TournamentOrchestrator:
             # Prima fase: copia tutti i partecipanti del pool
             await self._create_initial_participants(tournament, next_phase)
         
+        await self._notify_schedule_change(tournament.id)
         await self.db.commit()
 
     async def _complete_tournament(self, tournament: Tournament):
@@ -234,6 +250,7 @@ class TournamentOrchestrator:
         # TODO: Logica assegnazione premi basata sulla classifica finale
         await self._assign_tournament_rewards(tournament)
         
+        await self._notify_schedule_change(tournament.id)
         await self.db.commit()
 
     async def _copy_qualified_participants_to_next_phase(
@@ -241,45 +258,71 @@ class TournamentOrchestrator:
         tournament: Tournament, 
         next_phase: TournamentPhase
     ):
-        """Copia i partecipanti qualificati alla fase successiva"""
-        
-        # Trova partecipanti qualificati della fase precedente
-        stmt = select(TournamentParticipant).where(
-            and_(
-                TournamentParticipant.tournament_id == tournament.id,
-                TournamentParticipant.qualified == True
-            )
-        ).order_by(desc(TournamentParticipant.phase_id))
-        
-        result = await self.db.execute(stmt)
-        qualified_participants = result.scalars().all()
-        
-        # Crea nuovi record per la fase successiva
-        for participant in qualified_participants:
-            new_participant = TournamentParticipant(
-                tournament_id=tournament.id,
-                phase_id=next_phase.id,
-                player_id=participant.player_id,
-                qualified=False,  # Reset per nuova fase
-                best_score=0,
-                best_time_seconds=None,
-                sessions_count=0
+        """Copia i qualificati della fase precedente nella successiva.
+
+        Un solo INSERT … SELECT lato server; le fasi prima della precedente
+        non contano (i loro qualificati hanno già giocato quella successiva).
+        """
+        P = TournamentParticipant
+        previous_phase = (
+            select(TournamentPhase.id)
+            .where(
+                TournamentPhase.tournament_id == tournament.id,
+                TournamentPhase.phase_number == next_phase.phase_number - 1,
             )
-            self.db.add(new_participant)
-        
-        next_phase.participants_count = len(qualified_participants)
+            .scalar_subquery()
+        )
+        players = (
+            select(P.player_id)
+            .where(P.phase_id == previous_phase, P.qualified.is_(True))
+        )
+        next_phase.participants_count = await self._insert_participants(
+            tournament, next_phase, players
+        )
 
     async def _create_initial_participants(
         self, 
         tournament: Tournament, 
         first_phase: TournamentPhase
     ):
-        """Crea i partecipanti iniziali dalla lista ticket del pool"""
-        
-        # TODO: Query per ottenere tutti i giocatori che hanno comprato ticket nel pool
-        # Per ora placeholder - implementare quando si ha la struttura ticket/players
-        
-        first_phase.participants_count = 0  # Da aggiornare con query reale
+        """Crea i partecipanti iniziali: un giocatore per ogni utente con ticket nel pool"""
+        players = (
+            select(Ticket.user_id)
+            .where(Ticket.pool_id == tournament.pool_id)
+            .distinct()
+        )
+        first_phase.participants_count = await self._insert_participants(
+            tournament, first_phase, players
+        )
+
+    async def _insert_participants(
+        self, tournament: Tournament, phase: TournamentPhase, players: Select
+    ) -> int:
+        """Inserisce nella fase un partecipante per ogni player_id di ``players``.
+
+        INSERT … SELECT … RETURNING in una CTE: le righe non passano da
+        Python e il conteggio arriva nello stesso statement.
+        """
+        P = TournamentParticipant
+        players = players.subquery("players")
+        inserted = (
+            insert(P)
+            .from_select(
+                ["id", "tournament_id", "phase_id", "player_id", "qualified", "best_score", "sessions_count"],
+                select(
+                    func.gen_random_uuid(),
+                    literal(tournament.id, P.tournament_id.type),
+                    literal(phase.id, P.phase_id.type),
+                    players.c[0],
+                    false(),
+                    literal(0),
+                    literal(0),
+                ),
+            )
+            .returning(P.id)
+            .cte("inserted")
+        )
+        return (await self.db.execute(select(func.count()).select_from(inserted))).scalar_one()
 
     async def _assign_tournament_rewards(self, tournament: Tournament):
         """Assegna i premi finali basati sulla classifica"""
@@ -288,6 +331,10 @@ class TournamentOrchestrator:
         # - Vincitore: premio principale del pool
         # - 2°/3° posto: premi secondari o ticket bonus
         # - Partecipazione: coins/XP
+        # Gli accrediti in denaro vanno passati tutti insieme a
+        # app.services.wallet_settlement.settle_prize_payouts(self.db, pool_id,
+        # {user_id: cents}, commit=False): un solo statement, idempotente per
+        # (pool, wallet), e il commit resta quello di _complete_tournament.
         pass
 
     async def start_tournament_manually(self, tournament_id: str) -> Tournament:
@@ -304,9 +351,8 @@ class TournamentOrchestrator:
             )
         
         tournament.status = TournamentStatus.ACTIVE
-        tournament.current_phase = 1
         
-        # Avvia prima fase
+        # Avvia prima fase (_start_next_phase porta current_phase da 0 a 1)
         await self._start_next_phase(tournament)
         
         return tournament
\ No newline at end of file
@@ -0,0 +1,284 @@
+"""Tournament work (phase deadlines, scheduled starts) run concurrently across tournaments.
+
+Each task is one unit of work for one tournament: its own session and
+transaction, opened with a transaction-scoped advisory lock on the tournament
+id, so two workers (or two processes) never advance the same tournament at
+once while different tournaments proceed in parallel:
+
+* workers take tasks from a queue, at most ``concurrency`` attempts running
+  at once across every ``process`` call in flight;
+* a task that raises goes to a retry queue and comes back after
+  ``retry_seconds``, doubled at every attempt, up to ``max_attempts``;
+* every task records its attempts, outcome and duration, and the last
+  ``window`` ones are kept for ``snapshot_stats``.
+
+``TournamentScheduler`` hands its due entries to ``tournament_pipeline``;
+``process_expired_phases`` runs every overdue phase through it at once
+(``python -m scripts.process_tournament_deadlines``).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.tournament import Tournament, TournamentStatus
+from app.models.tournament_phase import PhaseStatus, TournamentPhase
+from app.services.tournament_orchestrator import TournamentOrchestrator
+
+logger = logging.getLogger(__name__)
+
+# Two-key advisory locks (namespace, tournament): apart from the single-key
+# ones on pool ids (admission) and the scheduler's leader lock
+_TASK_LOCK_NAMESPACE = func.hashtext("tournament_task")
+
+
+class TournamentEvent(str, Enum):
+    PHASE_DEADLINE = "phase_deadline"
+    TOURNAMENT_START = "tournament_start"
+
+
+class TaskOutcome(str, Enum):
+    PENDING = "pending"
+    DONE = "done"
+    # No longer due when its turn came (already processed, rescheduled)
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+@dataclass
+class TournamentTask:
+    event: TournamentEvent
+    target_id: UUID
+    tournament_id: UUID
+    due_at: datetime
+    attempts: int = 0
+    outcome: TaskOutcome = TaskOutcome.PENDING
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    # Duration of the last attempt
+    seconds: float = 0.0
+    error: str | None = None
+
+
+async def run_tournament_task(
+    session_factory: async_sessionmaker[AsyncSession], task: TournamentTask
+) -> bool:
+    """One attempt at ``task``; False when the database says it is not due any more."""
+    async with session_factory() as db:
+        # Held until the orchestrator commits
+        await db.execute(
+            select(
+                func.pg_advisory_xact_lock(
+                    _TASK_LOCK_NAMESPACE, func.hashtext(str(task.tournament_id))
+                )
+            )
+        )
+        orchestrator = TournamentOrchestrator(db)
+        now = datetime.now(timezone.utc)
+        if task.event is TournamentEvent.PHASE_DEADLINE:
+            phase = await db.get(TournamentPhase, task.target_id, with_for_update=True)
+            if (
+                phase is None
+                or phase.status != PhaseStatus.ACTIVE.value
+                or phase.deadline_at is None
+                or phase.deadline_at > now
+            ):
+                return False
+            await orchestrator.process_expired_phase(phase)
+        else:
+            tournament = await db.get(Tournament, task.target_id, with_for_update=True)
+            if (
+                tournament is None
+                or tournament.status != TournamentStatus.READY.value
+                or tournament.scheduled_start_at is None
+                or tournament.scheduled_start_at > now
+            ):
+                return False
+            await orchestrator.start_tournament_manually(task.target_id)
+    return True
+
+
+class TournamentPipeline:
+    def __init__(
+        self,
+        *,
+        concurrency: int,
+        max_attempts: int,
+        retry_seconds: float,
+        window: int = 1024,
+    ) -> None:
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.retries = 0
+        self._recent: deque[TournamentTask] = deque(maxlen=window)
+        # Shared by overlapping process() calls (the scheduler starts one per batch)
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def _attempt(
+        self, session_factory: async_sessionmaker[AsyncSession], task: TournamentTask
+    ) -> bool:
+        """Run ``task`` once; True when it reached a final outcome."""
+        task.attempts += 1
+        task.started_at = task.started_at or datetime.now(timezone.utc)
+        started = time.perf_counter()
+        try:
+            ran = await run_tournament_task(session_factory, task)
+        except Exception as exc:
+            task.seconds = time.perf_counter() - started
+            task.error = f"{type(exc).__name__}: {exc}"
+            if task.attempts < self.max_attempts:
+                logger.warning(
+                    "Tournament %s: %s attempt %d failed, retrying",
+                    task.tournament_id,
+                    task.event.value,
+                    task.attempts,
+                    exc_info=True,
+                )
+                self.retries += 1
+                return False
+            logger.exception(
+                "Tournament %s: %s failed after %d attempts",
+                task.tournament_id,
+                task.event.value,
+                task.attempts,
+            )
+            task.outcome = TaskOutcome.FAILED
+            self.failed += 1
+        else:
+            task.seconds = time.perf_counter() - started
+            task.error = None
+            if ran:
+                task.outcome = TaskOutcome.DONE
+                self.done += 1
+            else:
+                task.outcome = TaskOutcome.SKIPPED
+                self.skipped += 1
+        task.finished_at = datetime.now(timezone.utc)
+        self._recent.append(task)
+        return True
+
+    async def process(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        tasks: Iterable[TournamentTask],
+    ) -> list[TournamentTask]:
+        """Run every task to a final outcome, ``concurrency`` at a time."""
+        tasks = list(tasks)
+        if not tasks:
+            return tasks
+        queue: asyncio.Queue[TournamentTask] = asyncio.Queue()
+        for task in tasks:
+            queue.put_nowait(task)
+        remaining = len(tasks)
+        finished = asyncio.Event()
+        retrying: set[asyncio.Task] = set()
+
+        async def retry_later(task: TournamentTask) -> None:
+            await asyncio.sleep(self.retry_seconds * 2 ** (task.attempts - 1))
+            queue.put_nowait(task)
+
+        async def worker() -> None:
+            nonlocal remaining
+            while True:
+                task = await queue.get()
+                async with self._slots:
+                    final = await self._attempt(session_factory, task)
+                if final:
+                    remaining -= 1
+                    if not remaining:
+                        finished.set()
+                else:
+                    retry = asyncio.create_task(retry_later(task))
+                    retrying.add(retry)
+                    retry.add_done_callback(retrying.discard)
+
+        workers = [
+            asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(tasks)))
+        ]
+        try:
+            await finished.wait()
+        finally:
+            for pending in (*workers, *retrying):
+                pending.cancel()
+            await asyncio.gather(*workers, *retrying, return_exceptions=True)
+        return tasks
+
+    def snapshot_stats(self) -> dict:
+        recent = [task for task in self._recent if task.outcome is TaskOutcome.DONE]
+        durations = sorted(task.seconds for task in recent)
+
+        def pct(p: float) -> float:
+            if not durations:
+                return 0.0
+            return durations[min(len(durations) - 1, int(p / 100 * len(durations)))] * 1000
+
+        return {
+            "concurrency": self.concurrency,
+            "done": self.done,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "retries": self.retries,
+            "task_p50_ms": pct(50),
+            "task_p99_ms": pct(99),
+            "recent": [
+                {
+                    "tournament_id": task.tournament_id,
+                    "event": task.event.value,
+                    "outcome": task.outcome.value,
+                    "attempts": task.attempts,
+                    "ms": task.seconds * 1000,
+                    "finished_at": task.finished_at,
+                    "error": task.error,
+                }
+                for task in list(self._recent)[-20:]
+            ],
+        }
+
+
+async def process_expired_phases(
+    session_factory: async_sessionmaker[AsyncSession],
+    pipeline: TournamentPipeline | None = None,
+) -> list[TournamentTask]:
+    """Every active phase past its deadline, through the pipeline, now."""
+    async with session_factory() as db:
+        expired = (
+            await db.execute(
+                select(
+                    TournamentPhase.id, TournamentPhase.tournament_id, TournamentPhase.deadline_at
+                )
+                .where(
+                    TournamentPhase.status == PhaseStatus.ACTIVE.value,
+                    TournamentPhase.deadline_at <= func.now(),
+                )
+                .order_by(TournamentPhase.deadline_at)
+            )
+        ).all()
+    return await (pipeline or tournament_pipeline).process(
+        session_factory,
+        [
+            TournamentTask(TournamentEvent.PHASE_DEADLINE, phase_id, tournament_id, deadline_at)
+            for phase_id, tournament_id, deadline_at in expired
+        ],
+    )
+
+
+tournament_pipeline = TournamentPipeline(
+    concurrency=settings.TOURNAMENT_PIPELINE_CONCURRENCY,
+    max_attempts=settings.TOURNAMENT_PIPELINE_MAX_ATTEMPTS,
+    retry_seconds=settings.TOURNAMENT_PIPELINE_RETRY_SECONDS,
+)
@@ -0,0 +1,286 @@
+"""Tournament deadlines and scheduled starts, fired when they are due.
+
+``TournamentScheduler`` keeps every upcoming ``tournament_phases.deadline_at``
+(active phases) and ``tournaments.scheduled_start_at`` (ready tournaments) in
+a min-heap and sleeps until the earliest one, instead of polling the tables
+every hour:
+
+* one process leads: the one holding a session-level advisory lock on a
+  dedicated connection. The others retry every ``retry_seconds`` and take
+  over when the leader's connection goes away;
+* the leader rebuilds the heap from the database when it takes over and
+  every ``resync_seconds``; in between it ``LISTEN``s on
+  ``SCHEDULE_CHANNEL``, where the orchestrator announces (at commit) every
+  tournament whose schedule changed, from whichever worker;
+* due entries are handed to ``tournament_pipeline`` in a background task
+  (concurrently across tournaments, one at a time per tournament, with
+  retries), so the loop keeps firing and reloading while a failing
+  tournament backs off; each is checked against the database first, so a
+  stale heap never eliminates a phase early or twice.
+
+Lag (how late an entry started, against its due time) is kept per entry for
+``snapshot_stats``.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.tournament import Tournament, TournamentStatus
+from app.models.tournament_phase import PhaseStatus, TournamentPhase
+from app.services.tournament_orchestrator import SCHEDULE_CHANNEL
+from app.services.tournament_pipeline import (
+    TaskOutcome,
+    TournamentEvent,
+    TournamentPipeline,
+    TournamentTask,
+    tournament_pipeline,
+)
+
+logger = logging.getLogger(__name__)
+
+_LEADER_LOCK = func.hashtext("tournament_scheduler")
+
+
+class TournamentScheduler:
+    def __init__(
+        self,
+        *,
+        resync_seconds: float,
+        retry_seconds: float,
+        pipeline: TournamentPipeline,
+        window: int = 1024,
+    ) -> None:
+        self.resync_seconds = resync_seconds
+        self.pipeline = pipeline
+        self.retry_seconds = retry_seconds
+        self.is_leader = False
+        self.leader_since: datetime | None = None
+        self.rebuilds = 0
+        self.fired = 0
+        self.skipped = 0
+        self.failed = 0
+        self.last_fired_at: datetime | None = None
+        # (due_at, event, target id, tournament id); an entry is live while
+        # _due still maps (event, target id) to its due_at
+        self._heap: list[tuple[datetime, TournamentEvent, UUID, UUID]] = []
+        self._due: dict[tuple[TournamentEvent, UUID], datetime] = {}
+        self._changed: set[UUID] = set()
+        # Entries handed to the pipeline and not finished yet, and their batches
+        self._inflight: set[tuple[TournamentEvent, UUID]] = set()
+        self._batches: set[asyncio.Task] = set()
+        self._lags: deque[float] = deque(maxlen=window)
+        self._wakeup = asyncio.Event()
+
+    def _push(self, due_at: datetime, event: TournamentEvent, target_id: UUID, tournament_id: UUID) -> None:
+        if self._due.get((event, target_id)) == due_at or (event, target_id) in self._inflight:
+            # Running: its tournament is reloaded when it finishes
+            return
+        self._due[(event, target_id)] = due_at
+        heapq.heappush(self._heap, (due_at, event, target_id, tournament_id))
+
+    def _peek(self) -> tuple[datetime, TournamentEvent, UUID, UUID] | None:
+        """Earliest live entry; stale ones are dropped on the way."""
+        while self._heap:
+            due_at, event, target_id, tournament_id = self._heap[0]
+            if self._due.get((event, target_id)) == due_at:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    def _on_notify(self, _connection, _pid, _channel, payload: str) -> None:
+        try:
+            self._changed.add(UUID(payload))
+        except ValueError:
+            return
+        self._wakeup.set()
+
+    def _upcoming_stmts(self, tournament_ids: set[UUID] | None = None):
+        phases = select(
+            TournamentPhase.deadline_at, TournamentPhase.id, TournamentPhase.tournament_id
+        ).where(
+            TournamentPhase.status == PhaseStatus.ACTIVE.value,
+            TournamentPhase.deadline_at.is_not(None),
+        )
+        starts = select(Tournament.scheduled_start_at, Tournament.id, Tournament.id).where(
+            Tournament.status == TournamentStatus.READY.value,
+            Tournament.scheduled_start_at.is_not(None),
+        )
+        if tournament_ids is not None:
+            phases = phases.where(TournamentPhase.tournament_id.in_(tournament_ids))
+            starts = starts.where(Tournament.id.in_(tournament_ids))
+        return (
+            (TournamentEvent.PHASE_DEADLINE, phases),
+            (TournamentEvent.TOURNAMENT_START, starts),
+        )
+
+    async def _load(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        tournament_ids: set[UUID] | None = None,
+    ) -> None:
+        """Replace the entries of ``tournament_ids`` (all when None) with the database's."""
+        async with session_factory() as db:
+            rows = [
+                (due_at, event, target_id, tournament_id)
+                for event, stmt in self._upcoming_stmts(tournament_ids)
+                for due_at, target_id, tournament_id in (await db.execute(stmt)).all()
+            ]
+        if tournament_ids is None:
+            self._heap, self._due = [], {}
+        else:
+            # Dropped from _due, their heap entries become stale
+            for due_at, event, target_id, tournament_id in self._heap:
+                if tournament_id in tournament_ids:
+                    self._due.pop((event, target_id), None)
+        for row in rows:
+            self._push(*row)
+
+    async def rebuild(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+        """Reload every upcoming deadline and start; return how many are scheduled."""
+        self._changed.clear()
+        await self._load(session_factory)
+        self.rebuilds += 1
+        return len(self._due)
+
+    async def run_due(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+        """Hand every entry due by now to the pipeline; return how many, without waiting."""
+        now = datetime.now(timezone.utc)
+        due = []
+        while (head := self._peek()) is not None and head[0] <= now:
+            heapq.heappop(self._heap)
+            due_at, event, target_id, tournament_id = head
+            del self._due[event, target_id]
+            self._inflight.add((event, target_id))
+            due.append(TournamentTask(event, target_id, tournament_id, due_at))
+        if due:
+            batch = asyncio.create_task(self._fire(session_factory, due))
+            self._batches.add(batch)
+            batch.add_done_callback(self._batches.discard)
+        return len(due)
+
+    async def _fire(
+        self, session_factory: async_sessionmaker[AsyncSession], due: list[TournamentTask]
+    ) -> None:
+        try:
+            await self.pipeline.process(session_factory, due)
+        finally:
+            for task in due:
+                self._inflight.discard((task.event, task.target_id))
+        for task in due:
+            if task.outcome is TaskOutcome.FAILED:
+                # Out of retries: back in the heap, unless the tournament changes meanwhile
+                self.failed += 1
+                self._push(
+                    datetime.now(timezone.utc) + timedelta(seconds=self.retry_seconds),
+                    task.event,
+                    task.target_id,
+                    task.tournament_id,
+                )
+                continue
+            if task.outcome is TaskOutcome.DONE:
+                self.fired += 1
+                self.last_fired_at = task.started_at
+                self._lags.append((task.started_at - task.due_at).total_seconds())
+            else:
+                self.skipped += 1
+            # Whatever the entry did (next phase, completion), reload its tournament
+            self._changed.add(task.tournament_id)
+        self._wakeup.set()
+
+    async def _lead(self, session_factory: async_sessionmaker[AsyncSession], conn: AsyncConnection) -> None:
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.add_listener(SCHEDULE_CHANNEL, self._on_notify)
+        await self.rebuild(session_factory)
+        resync_at = asyncio.get_running_loop().time() + self.resync_seconds
+        while True:
+            self._wakeup.clear()
+            if asyncio.get_running_loop().time() >= resync_at:
+                await self.rebuild(session_factory)
+                resync_at = asyncio.get_running_loop().time() + self.resync_seconds
+            await self.run_due(session_factory)
+            if self._changed:
+                changed, self._changed = self._changed, set()
+                await self._load(session_factory, changed)
+                # A reloaded entry may already be due
+                continue
+            timeout = resync_at - asyncio.get_running_loop().time()
+            head = self._peek()
+            if head is not None:
+                timeout = min(timeout, (head[0] - datetime.now(timezone.utc)).total_seconds())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+            # The lock lives as long as this connection: make sure it still does
+            await conn.execute(select(1))
+
+    async def run(self, session_factory: async_sessionmaker[AsyncSession], engine: AsyncEngine) -> None:
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    # Autocommit: no transaction left open, notifications flow
+                    await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    acquired = (
+                        await conn.execute(select(func.pg_try_advisory_lock(_LEADER_LOCK)))
+                    ).scalar_one()
+                    if acquired:
+                        self.is_leader = True
+                        self.leader_since = datetime.now(timezone.utc)
+                        logger.info("Tournament scheduler: leading")
+                        try:
+                            await self._lead(session_factory, conn)
+                        finally:
+                            self.is_leader = False
+                            # The next leader rebuilds from the database
+                            for batch in self._batches:
+                                batch.cancel()
+                            await asyncio.gather(*self._batches, return_exceptions=True)
+                            self._heap, self._due = [], {}
+                            self._inflight.clear()
+                            # Closing the connection drops the lock and the LISTEN
+                            await conn.invalidate()
+            except Exception:
+                logger.exception("Tournament scheduler lost its database connection")
+            await asyncio.sleep(self.retry_seconds)
+
+    def snapshot_stats(self) -> dict:
+        lags = sorted(self._lags)
+        head = self._peek()
+
+        def pct(p: float) -> float:
+            if not lags:
+                return 0.0
+            return lags[min(len(lags) - 1, int(p / 100 * len(lags)))] * 1000
+
+        return {
+            "is_leader": self.is_leader,
+            "leader_since": self.leader_since if self.is_leader else None,
+            "scheduled": len(self._due),
+            "running": len(self._inflight),
+            "next_due_at": head[0] if head else None,
+            "rebuilds": self.rebuilds,
+            "fired": self.fired,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "last_fired_at": self.last_fired_at,
+            "last_lag_ms": self._lags[-1] * 1000 if self._lags else 0.0,
+            "lag_p50_ms": pct(50),
+            "lag_p99_ms": pct(99),
+            "lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+        }
+
+
+tournament_scheduler = TournamentScheduler(
+    resync_seconds=settings.TOURNAMENT_SCHEDULER_RESYNC_SECONDS,
+    retry_seconds=settings.TOURNAMENT_SCHEDULER_RETRY_SECONDS,
+    pipeline=tournament_pipeline,
+)
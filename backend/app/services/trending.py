@@ -0,0 +1,315 @@
+"""Trending pools: time-decayed activity scores maintained incrementally.
+
+A pool's score is ``sum(weight_i * 2 ** (-(now - t_i) / half_life))`` over its
+likes and ticket sales. Scores are stored *forward-decayed* in log space
+(``score_log = log2(sum(weight_i * 2 ** ((t_i - EPOCH) / half_life)))``): an
+event only adds to its own pool and the ordering between pools does not change
+as time passes, so nothing is ever recomputed in bulk.
+
+Each worker buffers per-pool deltas in memory (``record_*``), flushes them
+additively into ``pool_trending`` and refreshes its in-memory ``RankedIndex``
+from the rows changed since the last refresh. Top-N, pages and single ranks
+are served from that index.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+from uuid import UUID
+
+from sqlalchemy import (
+    Float,
+    case,
+    func,
+    literal,
+    select,
+    text,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.pool import RafflePool
+from app.models.pool_like import PoolLike
+from app.models.pool_trending import PoolTrending
+from app.models.ticket import Ticket
+from app.services.ranking import RankedIndex
+
+logger = logging.getLogger(__name__)
+
+# Changing the epoch or the half-life invalidates stored scores: rebuild them
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+_LN2 = math.log(2)
+# A score this many half-lives below a single event is treated as zero
+_ZERO_HALF_LIVES = 64
+# Rows updated up to this long before the watermark are re-read on refresh
+_REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+def _log2_add(a, b):
+    """SQL ``log2(2**a + 2**b)`` without overflow (``power`` is clamped to avoid underflow errors)."""
+    return func.greatest(a, b) + func.ln(
+        1 + func.power(literal(2.0), func.greatest(-1000, -func.abs(a - b)))
+    ) / _LN2
+
+
+def _log2_sub(a, b, zero):
+    """SQL ``log2(2**a - 2**b)``, or ``zero`` when the result would not be positive."""
+    return case(
+        (
+            a - b > 1e-9,
+            a + func.ln(1 - func.power(literal(2.0), func.greatest(-1000, b - a))) / _LN2,
+        ),
+        else_=zero,
+    )
+
+
+def _deltas(rows: Sequence[tuple[UUID, float]]):
+    # Two array parameters instead of a VALUES list: constant planning cost
+    # and no bind-parameter limit however many pools a flush touches
+    rows = sorted(rows)
+    return (
+        func.unnest(
+            literal([pool_id for pool_id, _ in rows], ARRAY(PG_UUID(as_uuid=True))),
+            literal([score_log for _, score_log in rows], ARRAY(Float)),
+        )
+        .table_valued("pool_id", "score_log")
+        .render_derived(name="trending_delta")
+    )
+
+
+class TrendingEngine:
+    def __init__(
+        self,
+        *,
+        half_life_seconds: float,
+        like_weight: float,
+        ticket_weight: float,
+    ) -> None:
+        self.half_life_seconds = half_life_seconds
+        self.like_weight = like_weight
+        self.ticket_weight = ticket_weight
+        self.index: RankedIndex[UUID] = RankedIndex()
+        # pool_id -> linear delta scaled to 2 ** (t - self._ref)
+        self._pending: dict[UUID, float] = {}
+        self._ref = self.now_units()
+        self._watermark: datetime | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def now_units(self) -> float:
+        """Half-lives elapsed since ``EPOCH``."""
+        return (time.time() - EPOCH.timestamp()) / self.half_life_seconds
+
+    def score(self, score_log: float) -> float:
+        """Current (decayed) score from a stored ``score_log``."""
+        exponent = score_log - self.now_units()
+        return 2.0 ** exponent if exponent > -1000 else 0.0
+
+    # -- ingestion ---------------------------------------------------------
+
+    def units(self, at: datetime) -> float:
+        """Half-lives from ``EPOCH`` to ``at``."""
+        return (at.timestamp() - EPOCH.timestamp()) / self.half_life_seconds
+
+    def record(self, pool_id: UUID, weight: float, at: float | None = None) -> None:
+        """Add ``weight`` as of ``at`` (half-life units, default now)."""
+        if not weight:
+            return
+        now = self.now_units()
+        if now - self._ref > 32:
+            # Keep buffered values in float range if flushes keep failing
+            factor = 2.0 ** (self._ref - now)
+            self._pending = {pid: v * factor for pid, v in self._pending.items()}
+            self._ref = now
+        self._pending[pool_id] = self._pending.get(pool_id, 0.0) + weight * 2.0 ** (
+            (now if at is None else min(at, now)) - self._ref
+        )
+
+    def record_like(self, pool_id: UUID, delta: int, liked_at: datetime) -> None:
+        """``delta`` is +1 for a like and -1 for an unlike; ``liked_at`` is the
+        like's ``created_at``.
+
+        An unlike takes away what the like added when it was made, so the
+        score stays equal to the one ``rebuild_trending_scores`` computes.
+        """
+        self.record(pool_id, self.like_weight * delta, self.units(liked_at))
+
+    def record_tickets(self, pool_id: UUID, count: int) -> None:
+        self.record(pool_id, self.ticket_weight * count)
+
+    async def flush(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+        """Add the buffered deltas to ``pool_trending``; return the pools touched."""
+        if not self._pending:
+            return 0
+        batch, ref = self._pending, self._ref
+        self._pending, self._ref = {}, self.now_units()
+
+        added = [(pid, math.log2(v) + ref) for pid, v in batch.items() if v > 0]
+        removed = [(pid, math.log2(-v) + ref) for pid, v in batch.items() if v < 0]
+        try:
+            async with session_factory() as db:
+                if added:
+                    d = _deltas(added)
+                    stmt = pg_insert(PoolTrending).from_select(
+                        ["pool_id", "score_log"],
+                        # Join drops deltas of pools deleted meanwhile
+                        select(d.c.pool_id, d.c.score_log).join(
+                            RafflePool, RafflePool.pool_id == d.c.pool_id
+                        ),
+                    )
+                    await db.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=[PoolTrending.pool_id],
+                            set_={
+                                "score_log": _log2_add(
+                                    PoolTrending.score_log, stmt.excluded.score_log
+                                ),
+                                "updated_at": func.now(),
+                            },
+                        )
+                    )
+                if removed:
+                    d = _deltas(removed)
+                    await db.execute(
+                        update(PoolTrending)
+                        .where(PoolTrending.pool_id == d.c.pool_id)
+                        .values(
+                            score_log=_log2_sub(
+                                PoolTrending.score_log,
+                                d.c.score_log,
+                                ref - _ZERO_HALF_LIVES,
+                            ),
+                            updated_at=func.now(),
+                        )
+                    )
+                await db.commit()
+        except Exception:
+            logger.exception("Trending flush failed, %d pools kept pending", len(batch))
+            factor = 2.0 ** (ref - self._ref)
+            for pid, v in batch.items():
+                self._pending[pid] = self._pending.get(pid, 0.0) + v * factor
+            return 0
+        return len(batch)
+
+    # -- materialization ---------------------------------------------------
+
+    async def refresh(
+        self, session_factory: async_sessionmaker[AsyncSession], *, full: bool = False
+    ) -> int:
+        """Pull changed scores into the in-memory index; return the rows read.
+
+        ``full`` reloads everything, which also drops deleted pools.
+        """
+        async with self._lock:
+            stmt = select(
+                PoolTrending.pool_id,
+                PoolTrending.score_log,
+                PoolTrending.updated_at,
+            )
+            incremental = not full and self._watermark is not None
+            if incremental:
+                stmt = stmt.where(PoolTrending.updated_at > self._watermark - _REFRESH_OVERLAP)
+            async with session_factory() as db:
+                rows = (await db.execute(stmt)).all()
+
+            items = ((pool_id, (-score_log, pool_id)) for pool_id, score_log, _ in rows)
+            if incremental:
+                self.index.update(items)
+            else:
+                self.index.bulk_load(items)
+                self._loaded_at = time.monotonic()
+            if rows:
+                latest = max(updated_at for *_, updated_at in rows)
+                if self._watermark is None or latest > self._watermark:
+                    self._watermark = latest
+            return len(rows)
+
+    async def run(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        interval_seconds: float,
+        full_reload_seconds: float,
+    ) -> None:
+        await self.refresh(session_factory, full=True)
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.flush(session_factory)
+                full = time.monotonic() - self._loaded_at > full_reload_seconds
+                await self.refresh(session_factory, full=full)
+            except Exception:
+                logger.exception("Trending refresh failed")
+
+    # -- reads ---------------------------------------------------------------
+
+    def top(self, offset: int, limit: int) -> list[tuple[int, UUID, float]]:
+        """``(rank, pool_id, score)`` for ranks ``offset+1 .. offset+limit``."""
+        return [
+            (offset + i + 1, pool_id, self.score(-key[0]))
+            for i, (pool_id, key) in enumerate(self.index.page(offset, limit))
+        ]
+
+    def rank_of(self, pool_id: UUID) -> tuple[int, float] | None:
+        rank = self.index.rank(pool_id)
+        if rank is None:
+            return None
+        return rank + 1, self.score(-self.index.key_of(pool_id)[0])
+
+
+async def rebuild_trending_scores(db: AsyncSession, engine: TrendingEngine) -> int:
+    """Recompute every score from ``pool_like``/``ticket`` history (full scan).
+
+    Only for backfills and half-life changes; the live path is incremental.
+    Unliked pools only lose the likes that no longer exist.
+    """
+    h = engine.half_life_seconds
+    epoch = literal(EPOCH)
+    events = union_all(
+        select(
+            PoolLike.pool_id,
+            literal(engine.like_weight).label("weight"),
+            (func.extract("epoch", PoolLike.created_at - epoch) / h).label("u"),
+        ),
+        select(
+            Ticket.pool_id,
+            literal(engine.ticket_weight).label("weight"),
+            (func.extract("epoch", Ticket.created_at - epoch) / h).label("u"),
+        ),
+    ).subquery("events")
+    peak = func.max(events.c.u).over(partition_by=events.c.pool_id)
+    shifted = select(
+        events.c.pool_id,
+        events.c.weight,
+        events.c.u,
+        peak.label("peak"),
+    ).subquery("shifted")
+    # log-sum-exp around each pool's newest event keeps power() in range
+    score_log = func.max(shifted.c.peak) + func.ln(
+        func.sum(
+            shifted.c.weight
+            * func.power(literal(2.0), func.greatest(-1000, shifted.c.u - shifted.c.peak))
+        )
+    ) / _LN2
+    scores = select(shifted.c.pool_id, score_log).group_by(shifted.c.pool_id)
+
+    await db.execute(text("TRUNCATE pool_trending"))
+    result = await db.execute(
+        pg_insert(PoolTrending).from_select(["pool_id", "score_log"], scores)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+trending_engine = TrendingEngine(
+    half_life_seconds=settings.TRENDING_HALF_LIFE_HOURS * 3600,
+    like_weight=settings.TRENDING_LIKE_WEIGHT,
+    ticket_weight=settings.TRENDING_TICKET_WEIGHT,
+)
@@ -3,15 +3,21 @@ from typing import Sequence
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import func, select
+from sqlalchemy import BigInteger, String, insert, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.pagination import decode_cursor, encode_cursor, parse_cursor_values
 from app.models.wallet import (
     WalletAccount,
     WalletLedgerEntry,
     WalletLedgerDirection,
+    WalletLedgerArchiveEntry,
     WalletLedgerEntryStatus,
     WalletLedgerReason,
+    WalletLedgerRef,
     WalletTopupRequest,
     WalletTopupStatus,
 )
@@ -54,25 +60,79 @@ async def list_wallet_ledger(
     wallet_id: UUID,
     *,
     limit: int = 50,
-    offset: int = 0,
-) -> tuple[Sequence[WalletLedgerEntry], int]:
-    stmt = (
-        select(WalletLedgerEntry)
-        .where(WalletLedgerEntry.wallet_id == wallet_id)
-        .order_by(WalletLedgerEntry.created_at.desc())
-        .offset(offset)
-        .limit(limit)
+    cursor: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    archived: bool = False,
+) -> tuple[Sequence[WalletLedgerEntry], str | None]:
+    """Newest-first page of a wallet's ledger and the cursor of the next one.
+
+    Seeks on ``(created_at, entry_id)`` along ``ix_wallet_ledger_wallet_created_at``,
+    so deep pages cost the same as the first. The ``created_at`` bounds (the
+    optional range and the cursor) prune the monthly partitions that cannot
+    match. ``archived`` reads the months moved to ``wallet_ledger_archive``.
+    The total is not computed here: it is kept on ``wallet_account.ledger_entries``.
+    """
+    entry = WalletLedgerArchiveEntry if archived else WalletLedgerEntry
+    stmt = select(entry).where(entry.wallet_id == wallet_id)
+    if created_from is not None:
+        stmt = stmt.where(entry.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(entry.created_at < created_to)
+    if cursor is not None:
+        last_created_at, last_entry_id = parse_cursor_values(
+            decode_cursor(cursor, 2), datetime.fromisoformat, int
+        )
+        stmt = stmt.where(
+            # Redundant with the row comparison, but prunable
+            entry.created_at <= last_created_at,
+            tuple_(entry.created_at, entry.entry_id) < tuple_(last_created_at, last_entry_id),
+        )
+    stmt = stmt.order_by(entry.created_at.desc(), entry.entry_id.desc()).limit(limit + 1)
+    items = (await db.execute(stmt)).scalars().all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].entry_id)
+    return items, next_cursor
+
+
+async def register_ledger_ref(
+    db: AsyncSession,
+    entry_id: int,
+    *,
+    created_at: datetime | None = None,
+) -> None:
+    """Make a ledger entry referenceable from ``purchase``/``ticket`` rows.
+
+    Their ``wallet_entry_id`` foreign keys target ``wallet_ledger_ref``; the
+    entry is copied there on first use. ``created_at``, when known, limits the
+    lookup to the entry's partition.
+    """
+    source = select(
+        WalletLedgerEntry.entry_id, WalletLedgerEntry.wallet_id, WalletLedgerEntry.created_at
+    ).where(WalletLedgerEntry.entry_id == entry_id)
+    if created_at is not None:
+        source = source.where(WalletLedgerEntry.created_at == created_at)
+    registered = await db.execute(
+        pg_insert(WalletLedgerRef)
+        .from_select(["entry_id", "wallet_id", "created_at"], source)
+        .on_conflict_do_nothing(index_elements=[WalletLedgerRef.entry_id])
+        .returning(WalletLedgerRef.entry_id)
     )
-    result = await db.execute(stmt)
-    items = result.scalars().all()
+    if registered.first() is None and await db.get(WalletLedgerRef, entry_id) is None:
+        raise HTTPException(status_code=400, detail="Wallet ledger entry not found")
 
-    count_stmt = (
-        select(func.count())
-        .select_from(WalletLedgerEntry)
-        .where(WalletLedgerEntry.wallet_id == wallet_id)
-    )
-    total = (await db.execute(count_stmt)).scalar_one()
-    return items, total
+
+_WALLET_TOTALS = (
+    WalletAccount.wallet_id,
+    WalletAccount.balance_cents,
+    WalletAccount.held_cents,
+    WalletAccount.ledger_entries,
+    WalletAccount.ledger_debit_cents,
+    WalletAccount.ledger_credit_cents,
+)
 
 
 async def _create_wallet_entry(
@@ -87,38 +147,99 @@ async def _create_wallet_entry(
     ref_pool_id: UUID | None = None,
     ref_ticket_id: int | None = None,
     ref_external_txn: str | None = None,
+    released_held_cents: int = 0,
     commit: bool = True,
 ) -> WalletLedgerEntry:
+    """Move the balance and append the ledger row in one statement.
+
+    The balance is changed by a conditional ``UPDATE`` on the account row (a
+    debit only matches while the available balance, ``balance_cents -
+    held_cents``, covers it; ``released_held_cents`` is freed from
+    ``held_cents`` by the same update when a hold is captured) and the ledger
+    row is inserted from its ``RETURNING``, so concurrent debits serialize on
+    the row lock and re-check the condition instead of overdrawing. No row
+    back means insufficient funds. The same ``UPDATE`` keeps the account's
+    running ledger totals, so listings never count the ledger.
+    """
     if amount_cents <= 0:
         raise HTTPException(status_code=400, detail="Amount must be greater than zero")
 
-    if direction == WalletLedgerDirection.DEBIT and wallet.balance_cents < amount_cents:
-        raise HTTPException(status_code=400, detail="Saldo insufficiente")
-
     if direction == WalletLedgerDirection.DEBIT:
-        wallet.balance_cents -= amount_cents
+        moved = (
+            update(WalletAccount)
+            .where(
+                WalletAccount.wallet_id == wallet.wallet_id,
+                WalletAccount.balance_cents - WalletAccount.held_cents + released_held_cents
+                >= amount_cents,
+            )
+            .values(
+                balance_cents=WalletAccount.balance_cents - amount_cents,
+                held_cents=WalletAccount.held_cents - released_held_cents,
+                ledger_debit_cents=WalletAccount.ledger_debit_cents + amount_cents,
+            )
+        )
     else:
-        wallet.balance_cents += amount_cents
+        moved = (
+            update(WalletAccount)
+            .where(WalletAccount.wallet_id == wallet.wallet_id)
+            .values(
+                balance_cents=WalletAccount.balance_cents + amount_cents,
+                ledger_credit_cents=WalletAccount.ledger_credit_cents + amount_cents,
+            )
+        )
+    moved = (
+        moved.values(ledger_entries=WalletAccount.ledger_entries + 1)
+        .returning(*_WALLET_TOTALS)
+        .cte("moved")
+    )
 
-    entry = WalletLedgerEntry(
-        wallet_id=wallet.wallet_id,
-        direction=direction.value,
-        amount_cents=amount_cents,
-        reason=reason.value,
-        status=status.value,
-        ref_purchase_id=ref_purchase_id,
-        ref_pool_id=ref_pool_id,
-        ref_ticket_id=ref_ticket_id,
-        ref_external_txn=ref_external_txn,
+    inserted = (
+        insert(WalletLedgerEntry)
+        .from_select(
+            [
+                "wallet_id",
+                "direction",
+                "amount_cents",
+                "reason",
+                "status",
+                "ref_purchase_id",
+                "ref_pool_id",
+                "ref_ticket_id",
+                "ref_external_txn",
+            ],
+            select(
+                moved.c.wallet_id,
+                literal(direction.value),
+                literal(amount_cents),
+                literal(reason.value),
+                literal(status.value),
+                literal(ref_purchase_id, PG_UUID(as_uuid=True)),
+                literal(ref_pool_id, PG_UUID(as_uuid=True)),
+                literal(ref_ticket_id, BigInteger),
+                literal(ref_external_txn, String),
+            ),
+        )
+        .returning(*WalletLedgerEntry.__table__.c)
+        .cte("inserted")
     )
-    db.add(entry)
+    entry_alias = aliased(WalletLedgerEntry, inserted)
+    stmt = select(
+        entry_alias,
+        *(moved.c[column.key] for column in _WALLET_TOTALS[1:]),
+    ).join_from(entry_alias, moved, entry_alias.wallet_id == moved.c.wallet_id)
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        if direction == WalletLedgerDirection.DEBIT:
+            raise HTTPException(status_code=400, detail="Saldo insufficiente")
+        raise HTTPException(status_code=404, detail="Wallet not found")
+
+    entry, *totals = row
+    # Loaded as committed state: the session must not write the balance back
+    for column, value in zip(_WALLET_TOTALS[1:], totals):
+        set_committed_value(wallet, column.key, value)
 
     if commit:
         await db.commit()
-        await db.refresh(entry)
-        await db.refresh(wallet)
-    else:
-        await db.flush()
 
     return entry
 
@@ -133,6 +254,8 @@ async def create_wallet_debit(
     ref_pool_id: UUID | None = None,
     ref_ticket_id: int | None = None,
     ref_external_txn: str | None = None,
+    released_held_cents: int = 0,
+    commit: bool = True,
 ) -> WalletLedgerEntry:
     entry = await _create_wallet_entry(
         db,
@@ -144,6 +267,8 @@ async def create_wallet_debit(
         ref_pool_id=ref_pool_id,
         ref_ticket_id=ref_ticket_id,
         ref_external_txn=ref_external_txn,
+        released_held_cents=released_held_cents,
+        commit=commit,
     )
     return entry
 
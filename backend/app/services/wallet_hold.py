@@ -0,0 +1,367 @@
+"""Wallet holds: reserve funds at checkout, then capture or release them.
+
+A hold moves ``amount_cents`` into ``wallet_account.held_cents`` without
+touching the balance; every debit checks the available balance
+(``balance_cents - held_cents``), so held funds cannot be spent twice.
+
+* reserve: conditional ``UPDATE`` of ``held_cents`` + ``INSERT`` of the hold,
+  one statement;
+* capture: the hold turns CAPTURED, then the wallet is debited by the held
+  amount, which the same debit frees from ``held_cents``;
+* release: the hold turns RELEASED and ``held_cents`` drops, one statement.
+
+Holds left ACTIVE past ``expires_at`` (abandoned checkouts) are released by
+``HoldSweeper`` in set-based batches along ``ix_wallet_hold_active_expires_at``.
+Settling a hold always locks the hold row before the wallet row, and capture
+refuses an expired hold, so a hold is settled exactly once even while being
+swept.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.models.wallet import (
+    WalletAccount,
+    WalletHold,
+    WalletHoldStatus,
+    WalletLedgerEntry,
+    WalletLedgerReason,
+)
+from app.services.wallet import create_wallet_debit
+
+logger = logging.getLogger(__name__)
+
+
+async def get_hold(db: AsyncSession, hold_id: UUID) -> WalletHold | None:
+    return await db.get(WalletHold, hold_id)
+
+
+async def list_active_holds(db: AsyncSession, wallet_id: UUID) -> Sequence[WalletHold]:
+    stmt = (
+        select(WalletHold)
+        .where(
+            WalletHold.wallet_id == wallet_id,
+            WalletHold.status == WalletHoldStatus.ACTIVE.value,
+        )
+        .order_by(WalletHold.created_at.desc())
+    )
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def reserve_hold(
+    db: AsyncSession,
+    wallet: WalletAccount,
+    *,
+    amount_cents: int,
+    ttl_seconds: float | None = None,
+    reason: str = "TICKET_RESERVATION",
+    ref_purchase_id: UUID | None = None,
+    ref_pool_id: UUID | None = None,
+    commit: bool = True,
+) -> WalletHold:
+    if amount_cents <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be greater than zero")
+    ttl = timedelta(seconds=ttl_seconds or settings.WALLET_HOLD_TTL_SECONDS)
+
+    reserved = (
+        update(WalletAccount)
+        .where(
+            WalletAccount.wallet_id == wallet.wallet_id,
+            WalletAccount.balance_cents - WalletAccount.held_cents >= amount_cents,
+        )
+        .values(held_cents=WalletAccount.held_cents + amount_cents)
+        .returning(WalletAccount.wallet_id, WalletAccount.held_cents)
+        .cte("reserved")
+    )
+    inserted = (
+        insert(WalletHold)
+        .from_select(
+            [
+                "hold_id",
+                "wallet_id",
+                "amount_cents",
+                "reason",
+                "status",
+                "ref_purchase_id",
+                "ref_pool_id",
+                "expires_at",
+            ],
+            select(
+                literal(uuid.uuid4(), PG_UUID(as_uuid=True)),
+                reserved.c.wallet_id,
+                literal(amount_cents),
+                literal(reason),
+                literal(WalletHoldStatus.ACTIVE.value),
+                literal(ref_purchase_id, PG_UUID(as_uuid=True)),
+                literal(ref_pool_id, PG_UUID(as_uuid=True)),
+                func.now() + literal(ttl),
+            ),
+        )
+        .returning(*WalletHold.__table__.c)
+        .cte("inserted")
+    )
+    hold_alias = aliased(WalletHold, inserted)
+    row = (
+        await db.execute(
+            select(hold_alias, reserved.c.held_cents).join_from(
+                hold_alias, reserved, hold_alias.wallet_id == reserved.c.wallet_id
+            )
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=400, detail="Saldo insufficiente")
+
+    hold, held_cents = row
+    set_committed_value(wallet, "held_cents", held_cents)
+    if commit:
+        await db.commit()
+    return hold
+
+
+async def _raise_for_unavailable_hold(db: AsyncSession, wallet_id: UUID, hold_id: UUID) -> None:
+    hold = await get_hold(db, hold_id)
+    if hold is None or hold.wallet_id != wallet_id:
+        raise HTTPException(status_code=404, detail="Hold not found")
+    if hold.status != WalletHoldStatus.ACTIVE.value:
+        raise HTTPException(status_code=409, detail=f"Hold already {hold.status.lower()}")
+    raise HTTPException(status_code=409, detail="Hold expired")
+
+
+async def capture_hold(
+    db: AsyncSession,
+    wallet: WalletAccount,
+    hold_id: UUID,
+    *,
+    reason: WalletLedgerReason = WalletLedgerReason.TICKET_PURCHASE,
+    ref_ticket_id: int | None = None,
+    commit: bool = True,
+) -> tuple[WalletHold, WalletLedgerEntry]:
+    """Turn an ACTIVE, unexpired hold into a ledger debit of the held amount."""
+    captured = (
+        await db.execute(
+            update(WalletHold)
+            .where(
+                WalletHold.hold_id == hold_id,
+                WalletHold.wallet_id == wallet.wallet_id,
+                WalletHold.status == WalletHoldStatus.ACTIVE.value,
+                or_(WalletHold.expires_at.is_(None), WalletHold.expires_at > func.now()),
+            )
+            .values(status=WalletHoldStatus.CAPTURED.value, updated_at=func.now())
+            .returning(WalletHold)
+        )
+    ).scalar_one_or_none()
+    if captured is None:
+        await _raise_for_unavailable_hold(db, wallet.wallet_id, hold_id)
+
+    try:
+        # The held amount is already set aside: freeing it in the same update
+        # as the debit keeps the available balance unchanged
+        entry = await create_wallet_debit(
+            db,
+            wallet,
+            amount_cents=captured.amount_cents,
+            reason=reason,
+            ref_purchase_id=captured.ref_purchase_id,
+            ref_pool_id=captured.ref_pool_id,
+            ref_ticket_id=ref_ticket_id,
+            released_held_cents=captured.amount_cents,
+            commit=False,
+        )
+    except HTTPException:
+        await db.rollback()
+        raise
+    if commit:
+        await db.commit()
+    return captured, entry
+
+
+async def release_hold(
+    db: AsyncSession,
+    wallet: WalletAccount,
+    hold_id: UUID,
+    *,
+    commit: bool = True,
+) -> WalletHold:
+    released = (
+        update(WalletHold)
+        .where(
+            WalletHold.hold_id == hold_id,
+            WalletHold.wallet_id == wallet.wallet_id,
+            WalletHold.status == WalletHoldStatus.ACTIVE.value,
+        )
+        .values(status=WalletHoldStatus.RELEASED.value, updated_at=func.now())
+        .returning(*WalletHold.__table__.c)
+        .cte("released")
+    )
+    freed = (
+        update(WalletAccount)
+        .where(WalletAccount.wallet_id == released.c.wallet_id)
+        .values(held_cents=WalletAccount.held_cents - released.c.amount_cents)
+        .returning(WalletAccount.held_cents)
+        .cte("freed")
+    )
+    row = (
+        await db.execute(
+            select(aliased(WalletHold, released), select(freed.c.held_cents).scalar_subquery())
+        )
+    ).first()
+    if row is None:
+        await _raise_for_unavailable_hold(db, wallet.wallet_id, hold_id)
+
+    hold, held_cents = row
+    set_committed_value(wallet, "held_cents", held_cents)
+    if commit:
+        await db.commit()
+    return hold
+
+
+def _release_holds_stmt(selected):
+    """Release the holds picked by ``selected`` (a CTE of ``hold_id``); returns their count."""
+    released = (
+        update(WalletHold)
+        .where(
+            WalletHold.hold_id == selected.c.hold_id,
+            WalletHold.status == WalletHoldStatus.ACTIVE.value,
+        )
+        .values(status=WalletHoldStatus.RELEASED.value, updated_at=func.now())
+        .returning(WalletHold.wallet_id, WalletHold.amount_cents)
+        .cte("released")
+    )
+    per_wallet = (
+        select(
+            released.c.wallet_id,
+            func.sum(released.c.amount_cents).label("amount_cents"),
+            func.count().label("holds"),
+        )
+        .group_by(released.c.wallet_id)
+        .cte("per_wallet")
+    )
+    # One row update per wallet however many of its holds are released. Two
+    # sweepers touching the same wallets may deadlock; Postgres aborts one and
+    # its holds are picked up by the next sweep.
+    freed = (
+        update(WalletAccount)
+        .where(WalletAccount.wallet_id == per_wallet.c.wallet_id)
+        .values(held_cents=WalletAccount.held_cents - per_wallet.c.amount_cents)
+        .returning(per_wallet.c.holds)
+        .cte("freed")
+    )
+    return select(func.coalesce(func.sum(freed.c.holds), 0))
+
+
+def _release_expired_stmt(batch: int):
+    expired = (
+        select(WalletHold.hold_id)
+        .where(
+            WalletHold.status == WalletHoldStatus.ACTIVE.value,
+            WalletHold.expires_at <= func.now(),
+        )
+        .order_by(WalletHold.expires_at)
+        .limit(batch)
+        # Concurrent sweepers (one per worker) split the backlog instead of queueing
+        .with_for_update(skip_locked=True)
+        .cte("expired")
+    )
+    return _release_holds_stmt(expired)
+
+
+async def release_pool_holds(db: AsyncSession, pool_id: UUID, *, commit: bool = True) -> int:
+    """Release every ACTIVE hold taken for a pool (e.g. when it is cancelled)."""
+    pool_holds = (
+        select(WalletHold.hold_id)
+        .where(
+            WalletHold.ref_pool_id == pool_id,
+            WalletHold.status == WalletHoldStatus.ACTIVE.value,
+        )
+        .cte("pool_holds")
+    )
+    released = int((await db.execute(_release_holds_stmt(pool_holds))).scalar_one())
+    if commit:
+        await db.commit()
+    return released
+
+
+class HoldSweeper:
+    """Releases expired ACTIVE holds; keeps latency/throughput figures per sweep."""
+
+    def __init__(self, *, batch: int, interval_seconds: float, window: int = 256) -> None:
+        self.batch = batch
+        self.interval_seconds = interval_seconds
+        self.sweeps = 0
+        self.batches = 0
+        self.holds_released = 0
+        self.last_released = 0
+        self.last_sweep_at: datetime | None = None
+        self._durations: deque[float] = deque(maxlen=window)
+
+    async def sweep_batch(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+        async with session_factory() as db:
+            released = int((await db.execute(_release_expired_stmt(self.batch))).scalar_one())
+            await db.commit()
+        self.batches += 1
+        return released
+
+    async def sweep(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+        """Release every hold expired so far, ``batch`` per transaction."""
+        started = time.perf_counter()
+        released = 0
+        while True:
+            count = await self.sweep_batch(session_factory)
+            released += count
+            if count < self.batch:
+                break
+        self.sweeps += 1
+        self.holds_released += released
+        self.last_released = released
+        self.last_sweep_at = datetime.now(timezone.utc)
+        self._durations.append(time.perf_counter() - started)
+        return released
+
+    async def run(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.sweep(session_factory)
+            except Exception:
+                logger.exception("Wallet hold sweep failed")
+
+    def snapshot_stats(self) -> dict:
+        durations = sorted(self._durations)
+
+        def pct(p: float) -> float:
+            if not durations:
+                return 0.0
+            return durations[min(len(durations) - 1, int(p / 100 * len(durations)))] * 1000
+
+        return {
+            "sweeps": self.sweeps,
+            "batches": self.batches,
+            "batch_size": self.batch,
+            "holds_released": self.holds_released,
+            "last_released": self.last_released,
+            "last_sweep_at": self.last_sweep_at,
+            "last_sweep_ms": self._durations[-1] * 1000 if self._durations else 0.0,
+            "p50_sweep_ms": pct(50),
+            "p99_sweep_ms": pct(99),
+        }
+
+
+hold_sweeper = HoldSweeper(
+    batch=settings.WALLET_HOLD_SWEEP_BATCH,
+    interval_seconds=settings.WALLET_HOLD_SWEEP_SECONDS,
+)
@@ -0,0 +1,240 @@
+"""Monthly partitions of ``wallet_ledger`` and their archive tier.
+
+``wallet_ledger`` is range-partitioned on ``created_at``, one partition per
+UTC month (``wallet_ledger_pYYYYMM``) plus ``wallet_ledger_default`` for rows
+no month covers. ``LedgerPartitioner`` keeps ``ahead`` months ready and moves
+months older than ``archive_after_months`` under ``wallet_ledger_archive``:
+the partition is detached and re-attached as-is, no row is copied, and its
+indexes and vacuum work leave the live table.
+
+A month is archived only once every wallet with posted entries in it has a
+reconciliation checkpoint past its end, so incremental reconciliation never
+needs archived rows.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LIVE_TABLE = "wallet_ledger"
+ARCHIVE_TABLE = "wallet_ledger_archive"
+DEFAULT_PARTITION = "wallet_ledger_default"
+
+
+@dataclass
+class LedgerPartition:
+    name: str
+    lower: datetime
+    upper: datetime
+    archived: bool
+
+
+def month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(lower: datetime) -> str:
+    return f"wallet_ledger_p{lower:%Y%m}"
+
+
+def _bounds(lower: datetime) -> str:
+    return f"FROM ('{lower.isoformat()}') TO ('{add_months(lower, 1).isoformat()}')"
+
+
+async def list_ledger_partitions(db: AsyncSession) -> list[LedgerPartition]:
+    """Monthly partitions of the live ledger and of the archive, oldest first."""
+    rows = await db.execute(
+        text(
+            "SELECT child.relname, parent.relname FROM pg_inherits i "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "WHERE parent.relname IN (:live, :archive) AND child.relname LIKE 'wallet_ledger_p%'"
+        ),
+        {"live": LIVE_TABLE, "archive": ARCHIVE_TABLE},
+    )
+    partitions = []
+    for name, parent in rows.all():
+        lower = datetime.strptime(name[len("wallet_ledger_p") :], "%Y%m").replace(
+            tzinfo=timezone.utc
+        )
+        partitions.append(
+            LedgerPartition(name, lower, add_months(lower, 1), parent == ARCHIVE_TABLE)
+        )
+    return sorted(partitions, key=lambda partition: partition.lower)
+
+
+async def _create_partition(db: AsyncSession, lower: datetime) -> str:
+    """Create the month starting at ``lower``, taking over its rows from the default partition."""
+    name = partition_name(lower)
+    # CREATE + ATTACH instead of CREATE ... PARTITION OF: attaching only takes
+    # SHARE UPDATE EXCLUSIVE on the ledger, so writes keep flowing
+    await db.execute(
+        text(f"CREATE TABLE {name} (LIKE {LIVE_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    )
+    await db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= :lower AND created_at < :upper RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lower": lower, "upper": add_months(lower, 1)},
+    )
+    await db.execute(
+        text(f"ALTER TABLE {LIVE_TABLE} ATTACH PARTITION {name} FOR VALUES {_bounds(lower)}")
+    )
+    return name
+
+
+async def ensure_ledger_partitions(
+    db: AsyncSession,
+    *,
+    ahead: int,
+    now: datetime | None = None,
+) -> list[str]:
+    """Create the current month, the next ``ahead`` ones and any month stranded in the default partition."""
+    if now is None:
+        now = (await db.execute(select(func.now()))).scalar_one()
+    current = month_start(now)
+    wanted = {add_months(current, months) for months in range(ahead + 1)}
+    stranded = await db.execute(
+        text(
+            "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') "
+            f"FROM {DEFAULT_PARTITION}"
+        )
+    )
+    wanted.update(month.replace(tzinfo=timezone.utc) for (month,) in stranded.all())
+
+    existing = {partition.lower: partition for partition in await list_ledger_partitions(db)}
+    created = []
+    for lower in sorted(wanted):
+        if lower in existing:
+            if existing[lower].archived:
+                logger.warning(
+                    "Ledger rows for archived month %s are kept in %s",
+                    partition_name(lower),
+                    DEFAULT_PARTITION,
+                )
+            continue
+        created.append(await _create_partition(db, lower))
+    if created:
+        # Attaching locked the default partition until commit: if the moves
+        # emptied it, give its pages (heap and indexes) back right away
+        emptied = (
+            await db.execute(text(f"SELECT NOT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION})"))
+        ).scalar_one()
+        if emptied:
+            await db.execute(text(f"TRUNCATE {DEFAULT_PARTITION}"))
+    await db.commit()
+    return created
+
+
+async def _has_unreconciled_entries(db: AsyncSession, partition: LedgerPartition) -> bool:
+    return (
+        await db.execute(
+            text(
+                f"SELECT EXISTS (SELECT 1 FROM {partition.name} l "
+                "LEFT JOIN wallet_balance_checkpoint c ON c.wallet_id = l.wallet_id "
+                "WHERE l.status = 'POSTED' "
+                "AND (c.settled_before IS NULL OR c.settled_before < :upper))"
+            ),
+            {"upper": partition.upper},
+        )
+    ).scalar_one()
+
+
+async def archive_ledger_partitions(
+    db: AsyncSession,
+    *,
+    before: datetime,
+    lock_timeout_ms: int = 5000,
+) -> list[str]:
+    """Move the live months ending on or before ``before`` to the archive, oldest first.
+
+    Stops at the first month whose entries are not fully reconciled yet.
+    """
+    archived = []
+    for partition in await list_ledger_partitions(db):
+        if partition.archived or partition.upper > before:
+            continue
+        if await _has_unreconciled_entries(db, partition):
+            logger.info("Ledger month %s not archived: reconciliation behind", partition.name)
+            break
+        # DETACH locks the whole ledger: give up rather than queue writes behind it
+        await db.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+        await db.execute(text(f"ALTER TABLE {LIVE_TABLE} DETACH PARTITION {partition.name}"))
+        await db.execute(
+            text(
+                f"ALTER TABLE {ARCHIVE_TABLE} ATTACH PARTITION {partition.name} "
+                f"FOR VALUES {_bounds(partition.lower)}"
+            )
+        )
+        await db.commit()
+        archived.append(partition.name)
+    await db.rollback()
+    return archived
+
+
+async def restore_ledger_partition(db: AsyncSession, name: str) -> None:
+    """Move an archived month back under the live ledger."""
+    partition = next(
+        (p for p in await list_ledger_partitions(db) if p.name == name and p.archived), None
+    )
+    if partition is None:
+        raise ValueError(f"{name} is not an archived ledger partition")
+    await db.execute(text(f"ALTER TABLE {ARCHIVE_TABLE} DETACH PARTITION {name}"))
+    await db.execute(
+        text(f"ALTER TABLE {LIVE_TABLE} ATTACH PARTITION {name} FOR VALUES {_bounds(partition.lower)}")
+    )
+    await db.commit()
+
+
+class LedgerPartitioner:
+    def __init__(self, *, ahead: int, archive_after_months: int, interval_seconds: float) -> None:
+        self.ahead = ahead
+        self.archive_after_months = archive_after_months
+        self.interval_seconds = interval_seconds
+
+    async def maintain(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        async with session_factory() as db:
+            created = await ensure_ledger_partitions(db, ahead=self.ahead)
+        if created:
+            logger.info("Created ledger partitions %s", ", ".join(created))
+        if self.archive_after_months <= 0:
+            return
+        async with session_factory() as db:
+            now = (await db.execute(select(func.now()))).scalar_one()
+            archived = await archive_ledger_partitions(
+                db, before=add_months(month_start(now), -self.archive_after_months)
+            )
+        if archived:
+            logger.info("Archived ledger partitions %s", ", ".join(archived))
+
+    async def run(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        while True:
+            try:
+                await self.maintain(session_factory)
+            except Exception:
+                logger.exception("Ledger partition maintenance failed")
+            await asyncio.sleep(self.interval_seconds)
+
+
+ledger_partitioner = LedgerPartitioner(
+    ahead=settings.WALLET_LEDGER_PARTITIONS_AHEAD,
+    archive_after_months=settings.WALLET_LEDGER_ARCHIVE_AFTER_MONTHS,
+    interval_seconds=settings.WALLET_LEDGER_MAINTENANCE_SECONDS,
+)
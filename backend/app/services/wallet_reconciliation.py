@@ -0,0 +1,306 @@
+"""Wallet balance reconciliation against the ledger, incremental and resumable.
+
+``wallet_account.balance_cents`` must equal the signed sum (credits minus
+debits) of the wallet's POSTED ledger entries. Summing whole ledgers on every
+check does not scale, so each wallet has a checkpoint: the sum of its entries
+created before ``settled_before``. A run walks the wallets in ``wallet_id``
+order, ``batch`` per transaction, and for each one
+
+* sums only the entries created since its checkpoint (a seek on
+  ``ix_wallet_ledger_wallet_created_at``);
+* compares checkpoint + new entries with ``balance_cents`` in the same
+  snapshot (balance and ledger row are written by one statement, so any
+  difference is real drift);
+* moves the checkpoint to the run's ``settled_before``; idle wallets whose
+  drift did not change keep theirs, so they cost a read but no write.
+
+Entries younger than the settle window stay out of the checkpoint, so a
+transaction that commits late with an older ``created_at`` is still summed
+next time. Status changes of old entries are not tracked: a rebuild
+(``reset_checkpoints``) is needed after rewriting ledger history.
+
+The run row holds the cursor and counters and is locked by every batch, so
+several workers never check the same batch and a killed worker's run is
+resumed where its last committed batch ended.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import (
+    case,
+    delete,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.wallet import (
+    WalletAccount,
+    WalletLedgerDirection,
+    WalletLedgerEntry,
+    WalletLedgerEntryStatus,
+)
+from app.models.wallet_reconciliation import (
+    WalletBalanceCheckpoint,
+    WalletReconciliationRun,
+    WalletReconciliationStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResult:
+    wallets: int
+    entries: int
+    drifted: list[tuple[UUID, int]]
+    last_wallet_id: UUID | None
+
+
+def _batch_stmt(run: WalletReconciliationRun, batch: int):
+    checkpoint = WalletBalanceCheckpoint
+    chunk = select(
+        WalletAccount.wallet_id,
+        WalletAccount.balance_cents,
+        func.coalesce(checkpoint.posted_cents, 0).label("posted_cents"),
+        func.coalesce(checkpoint.posted_entries, 0).label("posted_entries"),
+        checkpoint.settled_before,
+        checkpoint.drift_cents.label("previous_drift_cents"),
+    ).outerjoin(checkpoint, checkpoint.wallet_id == WalletAccount.wallet_id)
+    if run.cursor_wallet_id is not None:
+        chunk = chunk.where(WalletAccount.wallet_id > run.cursor_wallet_id)
+    chunk = chunk.order_by(WalletAccount.wallet_id).limit(batch).cte("chunk")
+
+    signed = case(
+        (
+            WalletLedgerEntry.direction == WalletLedgerDirection.CREDIT.value,
+            WalletLedgerEntry.amount_cents,
+        ),
+        else_=-WalletLedgerEntry.amount_cents,
+    )
+    settled = WalletLedgerEntry.created_at < run.settled_before
+    # LATERAL: one index seek per wallet from its checkpoint, never a ledger scan
+    new_entries = (
+        select(
+            func.coalesce(func.sum(signed).filter(settled), 0).label("settled_cents"),
+            func.count().filter(settled).label("settled_entries"),
+            func.coalesce(func.sum(signed).filter(~settled), 0).label("recent_cents"),
+            func.count().label("entries"),
+        )
+        .where(
+            WalletLedgerEntry.wallet_id == chunk.c.wallet_id,
+            WalletLedgerEntry.created_at
+            >= func.coalesce(
+                chunk.c.settled_before, literal_column("'-infinity'::timestamptz")
+            ),
+            WalletLedgerEntry.status == WalletLedgerEntryStatus.POSTED.value,
+        )
+        .lateral("new_entries")
+    )
+    checked = (
+        select(
+            chunk.c.wallet_id,
+            func.greatest(chunk.c.settled_before, literal(run.settled_before)).label(
+                "settled_before"
+            ),
+            (chunk.c.posted_cents + new_entries.c.settled_cents).label("posted_cents"),
+            (chunk.c.posted_entries + new_entries.c.settled_entries).label("posted_entries"),
+            (
+                chunk.c.balance_cents
+                - chunk.c.posted_cents
+                - new_entries.c.settled_cents
+                - new_entries.c.recent_cents
+            ).label("drift_cents"),
+            new_entries.c.entries,
+            chunk.c.previous_drift_cents,
+        )
+        .select_from(chunk.join(new_entries, true()))
+        .cte("checked")
+    )
+
+    upsert = pg_insert(checkpoint).from_select(
+        ["wallet_id", "settled_before", "posted_cents", "posted_entries", "drift_cents", "run_id"],
+        select(
+            checked.c.wallet_id,
+            checked.c.settled_before,
+            checked.c.posted_cents,
+            checked.c.posted_entries,
+            checked.c.drift_cents,
+            literal(run.run_id, PG_UUID(as_uuid=True)),
+        ).where(
+            # Idle wallets with unchanged drift keep their checkpoint: no write
+            or_(
+                checked.c.entries > 0,
+                checked.c.previous_drift_cents.is_distinct_from(checked.c.drift_cents),
+            )
+        ),
+    )
+    upserted = (
+        upsert.on_conflict_do_update(
+            index_elements=[checkpoint.wallet_id],
+            set_={
+                "settled_before": upsert.excluded.settled_before,
+                "posted_cents": upsert.excluded.posted_cents,
+                "posted_entries": upsert.excluded.posted_entries,
+                "drift_cents": upsert.excluded.drift_cents,
+                "run_id": upsert.excluded.run_id,
+                "checked_at": func.now(),
+            },
+        )
+        .cte("upserted")
+    )
+    return (
+        select(checked.c.wallet_id, checked.c.drift_cents, checked.c.entries)
+        .add_cte(upserted)
+        .order_by(checked.c.wallet_id)
+    )
+
+
+class WalletReconciler:
+    def __init__(self, *, batch: int, settle_seconds: float, interval_seconds: float) -> None:
+        self.batch = batch
+        self.settle_seconds = settle_seconds
+        self.interval_seconds = interval_seconds
+
+    async def _current_run(
+        self, session_factory: async_sessionmaker[AsyncSession]
+    ) -> UUID | None:
+        """The unfinished run to resume, or a new one when the last is old enough."""
+        async with session_factory() as db:
+            run = (
+                await db.execute(
+                    select(WalletReconciliationRun)
+                    .order_by(WalletReconciliationRun.started_at.desc())
+                    .limit(1)
+                )
+            ).scalar_one_or_none()
+            if run is not None and run.finished_at is None:
+                return run.run_id
+            now = (await db.execute(select(func.now()))).scalar_one()
+            if run is not None and now - run.finished_at < timedelta(
+                seconds=self.interval_seconds
+            ):
+                return None
+            run = WalletReconciliationRun(
+                settled_before=now - timedelta(seconds=self.settle_seconds),
+            )
+            db.add(run)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another worker opened the run first (uq_wallet_reconciliation_run_open)
+                return None
+            return run.run_id
+
+    async def run_batch(
+        self, session_factory: async_sessionmaker[AsyncSession], run_id: UUID
+    ) -> BatchResult | None:
+        """Check the next batch of a run; ``None`` if it is finished or owned elsewhere."""
+        async with session_factory() as db:
+            run = (
+                await db.execute(
+                    select(WalletReconciliationRun)
+                    .where(
+                        WalletReconciliationRun.run_id == run_id,
+                        WalletReconciliationRun.finished_at.is_(None),
+                    )
+                    .with_for_update(skip_locked=True)
+                )
+            ).scalar_one_or_none()
+            if run is None:
+                return None
+
+            started = time.perf_counter()
+            rows = (await db.execute(_batch_stmt(run, self.batch))).all()
+            result = BatchResult(
+                wallets=len(rows),
+                entries=sum(entries for *_, entries in rows),
+                drifted=[(wallet_id, drift) for wallet_id, drift, _ in rows if drift],
+                last_wallet_id=rows[-1][0] if rows else run.cursor_wallet_id,
+            )
+
+            run.cursor_wallet_id = result.last_wallet_id
+            run.wallets_checked += result.wallets
+            run.entries_summed += result.entries
+            run.drifted_wallets += len(result.drifted)
+            run.drift_cents_abs += sum(abs(drift) for _, drift in result.drifted)
+            run.active_seconds += time.perf_counter() - started
+            run.updated_at = datetime.now(timezone.utc)
+            if len(rows) < self.batch:
+                run.status = WalletReconciliationStatus.COMPLETED.value
+                run.finished_at = run.updated_at
+            # Checkpoints and cursor commit together: a crash replays at most one batch
+            await db.commit()
+
+        for wallet_id, drift in result.drifted:
+            logger.warning("Wallet %s drifts from its ledger by %d cents", wallet_id, drift)
+        return result
+
+    async def reconcile(self, session_factory: async_sessionmaker[AsyncSession]) -> UUID | None:
+        """Drive the current run to its end; return its id (``None`` if not due)."""
+        run_id = await self._current_run(session_factory)
+        if run_id is None:
+            return None
+        while await self.run_batch(session_factory, run_id) is not None:
+            # Yield between batches so request handlers are not starved
+            await asyncio.sleep(0)
+        return run_id
+
+    async def run(
+        self, session_factory: async_sessionmaker[AsyncSession], poll_seconds: float = 60
+    ) -> None:
+        while True:
+            try:
+                await self.reconcile(session_factory)
+            except Exception:
+                logger.exception("Wallet reconciliation failed, will resume")
+            await asyncio.sleep(min(poll_seconds, self.interval_seconds))
+
+
+async def list_reconciliation_runs(
+    db: AsyncSession, limit: int = 10
+) -> list[WalletReconciliationRun]:
+    stmt = (
+        select(WalletReconciliationRun)
+        .order_by(WalletReconciliationRun.started_at.desc())
+        .limit(limit)
+    )
+    return list((await db.execute(stmt)).scalars().all())
+
+
+async def list_drifted_wallets(
+    db: AsyncSession, limit: int = 100
+) -> list[WalletBalanceCheckpoint]:
+    stmt = (
+        select(WalletBalanceCheckpoint)
+        .where(WalletBalanceCheckpoint.drift_cents != 0)
+        .order_by(func.abs(WalletBalanceCheckpoint.drift_cents).desc())
+        .limit(limit)
+    )
+    return list((await db.execute(stmt)).scalars().all())
+
+
+async def reset_checkpoints(db: AsyncSession) -> None:
+    """Forget every checkpoint: the next run re-sums whole ledgers."""
+    await db.execute(delete(WalletBalanceCheckpoint))
+    await db.commit()
+
+
+wallet_reconciler = WalletReconciler(
+    batch=settings.WALLET_RECONCILE_BATCH,
+    settle_seconds=settings.WALLET_RECONCILE_SETTLE_SECONDS,
+    interval_seconds=settings.WALLET_RECONCILE_INTERVAL_SECONDS,
+)
@@ -0,0 +1,258 @@
+"""Bulk wallet credits for a pool: refunds on cancellation, prize payouts.
+
+Crediting one wallet at a time (``create_wallet_credit``) costs a statement,
+a commit and a refresh per wallet. A settlement credits every wallet of the
+pool with one statement instead:
+
+* ``locked``: the target wallets, row-locked in ``wallet_id`` order so two
+  settlements sharing wallets queue instead of deadlocking;
+* ``claimed``: one ``wallet_settlement`` row per (pool, wallet, reason),
+  ``ON CONFLICT DO NOTHING``, so wallets already settled drop out here and
+  replaying a settlement credits nobody twice;
+* the ledger CREDIT rows and the balance/ledger-total update, both fed from
+  ``claimed``.
+
+Nothing is committed per wallet: the caller's transaction (e.g. the pool
+state change) commits with the credits or not at all.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Mapping
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, func, insert, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.pool import RafflePool
+from app.models.prize import Prize
+from app.models.wallet import (
+    WalletAccount,
+    WalletLedgerArchiveEntry,
+    WalletLedgerDirection,
+    WalletLedgerEntry,
+    WalletLedgerEntryStatus,
+    WalletLedgerReason,
+    WalletSettlement,
+)
+from app.services.cache import pool_cache
+from app.services.wallet_hold import release_pool_holds
+
+logger = logging.getLogger(__name__)
+
+CANCELLABLE_POOL_STATES = ("OPEN", "FULL", "CANCELLED")
+
+
+@dataclass
+class SettlementResult:
+    pool_id: UUID
+    reason: str
+    requested: int
+    settled: int
+    amount_cents: int
+    elapsed_ms: float
+    holds_released: int = 0
+
+    @property
+    def skipped(self) -> int:
+        return self.requested - self.settled
+
+    @property
+    def wallets_per_sec(self) -> float:
+        return self.settled / self.elapsed_ms * 1000 if self.elapsed_ms else 0.0
+
+
+def _settle_stmt(pool_id: UUID, reason: WalletLedgerReason, payouts):
+    """Credit ``payouts`` (``wallet_id``, ``amount_cents``; one row per wallet)."""
+    pool_literal = literal(pool_id, PG_UUID(as_uuid=True))
+    locked = (
+        select(WalletAccount.wallet_id)
+        .where(WalletAccount.wallet_id.in_(select(payouts.c.wallet_id)))
+        .order_by(WalletAccount.wallet_id)
+        .with_for_update(key_share=True)
+        .cte("locked")
+    )
+    claim = pg_insert(WalletSettlement).from_select(
+        ["pool_id", "wallet_id", "reason", "amount_cents"],
+        select(
+            pool_literal,
+            payouts.c.wallet_id,
+            literal(reason.value),
+            payouts.c.amount_cents,
+        )
+        .join(locked, locked.c.wallet_id == payouts.c.wallet_id)
+        .where(payouts.c.amount_cents > 0),
+    )
+    claimed = (
+        claim.on_conflict_do_nothing(
+            index_elements=["pool_id", "wallet_id", "reason"]
+        )
+        .returning(WalletSettlement.wallet_id, WalletSettlement.amount_cents)
+        .cte("claimed")
+    )
+    credited = (
+        insert(WalletLedgerEntry)
+        .from_select(
+            ["wallet_id", "direction", "amount_cents", "reason", "status", "ref_pool_id"],
+            select(
+                claimed.c.wallet_id,
+                literal(WalletLedgerDirection.CREDIT.value),
+                claimed.c.amount_cents,
+                literal(reason.value),
+                literal(WalletLedgerEntryStatus.POSTED.value),
+                pool_literal,
+            ),
+        )
+        .cte("credited")
+    )
+    moved = (
+        update(WalletAccount)
+        .where(WalletAccount.wallet_id == claimed.c.wallet_id)
+        .values(
+            balance_cents=WalletAccount.balance_cents + claimed.c.amount_cents,
+            ledger_entries=WalletAccount.ledger_entries + 1,
+            ledger_credit_cents=WalletAccount.ledger_credit_cents + claimed.c.amount_cents,
+        )
+        .returning(claimed.c.amount_cents)
+        .cte("moved")
+    )
+    return select(
+        select(func.count()).select_from(payouts).scalar_subquery(),
+        func.count(),
+        func.coalesce(func.sum(moved.c.amount_cents), 0),
+    ).select_from(moved).add_cte(credited)
+
+
+async def _settle(
+    db: AsyncSession, pool_id: UUID, reason: WalletLedgerReason, payouts
+) -> SettlementResult:
+    started = time.perf_counter()
+    requested, settled, amount_cents = (
+        await db.execute(_settle_stmt(pool_id, reason, payouts))
+    ).one()
+    result = SettlementResult(
+        pool_id=pool_id,
+        reason=reason.value,
+        requested=requested,
+        settled=settled,
+        amount_cents=int(amount_cents),
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
+    logger.info(
+        "Settled %s of pool %s: %d/%d wallets, %d cents in %.1f ms (%.0f wallets/s)",
+        result.reason,
+        pool_id,
+        result.settled,
+        result.requested,
+        result.amount_cents,
+        result.elapsed_ms,
+        result.wallets_per_sec,
+    )
+    return result
+
+
+async def refund_pool(
+    db: AsyncSession, pool_id: UUID, *, commit: bool = True
+) -> SettlementResult:
+    """Give every wallet back what it paid for the pool's tickets, once.
+
+    Debits are read from the live ledger and from ``wallet_ledger_archive``:
+    a pool cancelled after its oldest purchases were archived is refunded in
+    full (the settlement claim would block a second, corrective run).
+    """
+    debits = union_all(
+        *(
+            select(entry.wallet_id, entry.amount_cents).where(
+                entry.ref_pool_id == pool_id,
+                entry.direction == WalletLedgerDirection.DEBIT.value,
+                entry.reason == WalletLedgerReason.TICKET_PURCHASE.value,
+                entry.status == WalletLedgerEntryStatus.POSTED.value,
+            )
+            for entry in (WalletLedgerEntry, WalletLedgerArchiveEntry)
+        )
+    ).subquery("debits")
+    paid = (
+        select(debits.c.wallet_id, func.sum(debits.c.amount_cents).label("amount_cents"))
+        .group_by(debits.c.wallet_id)
+        .cte("paid")
+    )
+    result = await _settle(db, pool_id, WalletLedgerReason.REFUND, paid)
+    if commit:
+        await db.commit()
+    return result
+
+
+async def settle_prize_payouts(
+    db: AsyncSession,
+    pool_id: UUID,
+    payouts: Mapping[UUID, int],
+    *,
+    commit: bool = True,
+) -> SettlementResult:
+    """Credit prize amounts keyed by ``user_id``, creating missing wallets."""
+    user_ids = list(payouts)
+    users = select(
+        func.unnest(literal(user_ids, ARRAY(PG_UUID(as_uuid=True)))).label("user_id"),
+        func.unnest(literal([payouts[u] for u in user_ids], ARRAY(Integer))).label(
+            "amount_cents"
+        ),
+    ).cte("users")
+    await db.execute(
+        pg_insert(WalletAccount)
+        .from_select(
+            ["wallet_id", "user_id"], select(func.gen_random_uuid(), users.c.user_id)
+        )
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    per_wallet = (
+        select(WalletAccount.wallet_id, func.sum(users.c.amount_cents).label("amount_cents"))
+        .join(users, users.c.user_id == WalletAccount.user_id)
+        .group_by(WalletAccount.wallet_id)
+        .cte("per_wallet")
+    )
+    result = await _settle(db, pool_id, WalletLedgerReason.PRIZE_PAYOUT, per_wallet)
+    if commit:
+        await db.commit()
+    return result
+
+
+async def cancel_pool(
+    db: AsyncSession, pool_id: UUID, *, owner_id: UUID | None = None
+) -> SettlementResult:
+    """Cancel a pool, refund its buyers and release its open holds in one transaction.
+
+    The pool row is locked first: a ticket purchase in flight either commits
+    before (and is refunded) or finds the pool CANCELLED. Cancelling again
+    only settles what a previous run did not. With ``owner_id`` the pool's
+    prize must belong to that user.
+    """
+    pool = (
+        await db.execute(
+            select(RafflePool).where(RafflePool.pool_id == pool_id).with_for_update()
+        )
+    ).scalar_one_or_none()
+    if pool is None:
+        raise HTTPException(status_code=404, detail="Pool not found")
+    if owner_id is not None:
+        prize = await db.get(Prize, pool.prize_id)
+        if prize is None or prize.user_id != owner_id:
+            await db.rollback()
+            raise HTTPException(status_code=403, detail="Not authorized: not owner")
+    if pool.state not in CANCELLABLE_POOL_STATES:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400, detail=f"Pool cannot be cancelled in state {pool.state}"
+        )
+
+    pool.state = "CANCELLED"
+    await db.flush()
+    holds_released = await release_pool_holds(db, pool_id, commit=False)
+    result = await refund_pool(db, pool_id, commit=False)
+    result.holds_released = holds_released
+    await db.commit()
+    pool_cache.invalidate(pool_id)
+    return result
@@ -0,0 +1,148 @@
+"""Checkout: one-shot ``POST /pools/{id}/checkout`` vs the debit → purchase flow.
+
+``--buyers`` users, each with a funded wallet, buy ``--tickets`` entries of a
+hot pool concurrently, in process over ASGI. The current flow is two client
+requests per entry (``POST /wallet/me/ledger/debit``, then ``POST /purchases/``
+with the returned ``wallet_entry_id``, which issues the ticket); the checkout
+is one. Reports end-to-end latency per entry (p50/p99), entries/sec and the
+SQL statements the API ran per entry, then checks seats, tickets and debits
+agree.
+
+    poetry run python -m scripts.bench_checkout --buyers 50 --tickets 20
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import jwt
+from sqlalchemy import event, func, select
+
+from app.core.config import settings
+from app.db.session import engine
+from app.main import app
+from app.models.pool import RafflePool
+from app.models.ticket import Ticket
+from app.models.wallet import WalletAccount
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_pools,
+    seed_users,
+    seed_wallets,
+    stopwatch,
+)
+
+_PRICE_CENTS = 100
+
+
+def _headers(user_id):
+    token = jwt.encode(
+        {"sub": str(user_id), "aud": "authenticated", "exp": int(time.time()) + 3600},
+        settings.SUPABASE_JWT,
+        algorithm="HS256",
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _two_step(client, pool_id, headers) -> None:
+    debit = await client.post(
+        "/api/v1/wallet/me/ledger/debit",
+        json={"amount_cents": _PRICE_CENTS, "reason": "TICKET_PURCHASE", "ref_pool_id": str(pool_id)},
+        headers=headers,
+    )
+    debit.raise_for_status()
+    purchase = await client.post(
+        "/api/v1/purchases/",
+        json={
+            "pool_id": str(pool_id),
+            "amount_cents": _PRICE_CENTS,
+            "status": "CONFIRMED",
+            "wallet_entry_id": debit.json()["entry_id"],
+        },
+        headers=headers,
+    )
+    purchase.raise_for_status()
+
+
+async def _checkout(client, pool_id, headers) -> None:
+    response = await client.post(f"/api/v1/pools/{pool_id}/checkout", headers=headers)
+    response.raise_for_status()
+
+
+async def _run(flow, user_ids, pool_id, tickets: int) -> tuple[list[float], float]:
+    latencies: list[float] = []
+
+    async def buyer(client, user_id):
+        headers = _headers(user_id)
+        for _ in range(tickets):
+            started = time.perf_counter()
+            while True:
+                try:
+                    await flow(client, pool_id, headers)
+                    break
+                except httpx.HTTPStatusError as exc:
+                    # Waiting room: come back when told to
+                    if exc.response.status_code != 429:
+                        raise
+                    await asyncio.sleep(float(exc.response.headers.get("Retry-After", "0.05")))
+            latencies.append(time.perf_counter() - started)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        with stopwatch() as elapsed:
+            await asyncio.gather(*(buyer(client, user_id) for user_id in user_ids))
+    return latencies, elapsed[0]
+
+
+async def main(args: argparse.Namespace) -> None:
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+
+    Session = make_sessionmaker(pool_size=4)
+    entries = args.buyers * args.tickets
+    report: dict[str, object] = {"entries per flow": entries}
+    for label, flow in (("debit + purchase", _two_step), ("checkout", _checkout)):
+        async with Session() as db:
+            user_ids = await seed_users(db, args.buyers)
+            wallet_ids = await seed_wallets(db, user_ids, args.tickets * _PRICE_CENTS)
+            (pool_id,) = await seed_pools(
+                db, user_ids[0], 1, tickets_required=entries, ticket_price_cents=_PRICE_CENTS
+            )
+        statements[0] = 0
+        latencies, elapsed = await _run(flow, user_ids, pool_id, args.tickets)
+        async with Session() as db:
+            sold = await db.scalar(
+                select(RafflePool.tickets_sold).where(RafflePool.pool_id == pool_id)
+            )
+            issued = await db.scalar(
+                select(func.count()).select_from(Ticket).where(Ticket.pool_id == pool_id)
+            )
+            left = await db.scalar(
+                select(func.coalesce(func.sum(WalletAccount.balance_cents), 0)).where(
+                    WalletAccount.wallet_id.in_(wallet_ids)
+                )
+            )
+        report.update(
+            {
+                f"{label}: p50 ms": percentile(latencies, 50) * 1000,
+                f"{label}: p99 ms": percentile(latencies, 99) * 1000,
+                f"{label}: entries/sec": entries / elapsed,
+                f"{label}: SQL statements/entry": statements[0] / entries,
+                f"{label}: seats/tickets/debited": f"{sold}/{issued}/{(entries * _PRICE_CENTS - left) // _PRICE_CENTS}",
+            }
+        )
+
+    print_report(f"checkout: {args.buyers} buyers x {args.tickets} entries", report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buyers", type=int, default=50)
+    parser.add_argument("--tickets", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,207 @@
+"""Accounting exports: streamed CSV / NDJSON vs loading the whole result.
+
+Seeds ``--rows`` ledger entries over the last ``--days`` days, then exports the
+whole range once per format (CSV, NDJSON, gzipped CSV) through
+``stream_export`` and reports rows/sec, output size, time to first chunk and
+how much the process RSS grew. For comparison, the first ``--baseline-rows``
+entries are exported the way a plain list endpoint (``GET /purchases/my``)
+answers: every row loaded as an ORM object, validated and serialized in one go.
+
+    poetry run python -m scripts.bench_exports --rows 10000000
+
+Against a running server (``EXPORT_API_TOKEN`` set on both sides)::
+
+    poetry run python -m scripts.bench_exports --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import func, select, text
+
+from app.core.config import settings
+from app.models.wallet import WalletLedgerEntry
+from app.schemas.wallet import WalletLedgerEntry as WalletLedgerEntrySchema
+from app.services.export import (
+    EXPORT_DATASETS,
+    ExportFormat,
+    build_export_query,
+    stream_export,
+)
+from app.services.wallet_ledger_partitions import ensure_ledger_partitions
+from scripts._bench import make_sessionmaker, print_report, seed_users, seed_wallets, stopwatch
+
+_PAGE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _rss() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * _PAGE
+
+
+class _PeakRss:
+    """Samples the process RSS in the background; ``growth`` is the peak above the start."""
+
+    def __init__(self, interval: float = 0.02) -> None:
+        self.interval = interval
+        self.start = self.peak = 0
+
+    async def _sample(self) -> None:
+        while True:
+            self.peak = max(self.peak, _rss())
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self) -> "_PeakRss":
+        self.start = self.peak = _rss()
+        self._task = asyncio.create_task(self._sample())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._task.cancel()
+        self.peak = max(self.peak, _rss())
+
+    @property
+    def growth_mb(self) -> float:
+        return (self.peak - self.start) / 2**20
+
+
+async def _seed(db, wallet_ids, rows: int, days: int) -> None:
+    per_wallet = rows // len(wallet_ids)
+    seconds = days * 86_400
+    await db.execute(
+        text(
+            "INSERT INTO wallet_ledger (wallet_id, direction, amount_cents, reason, status, created_at) "
+            "SELECT w, 'CREDIT', 100 + n % 900, 'TOPUP', 'POSTED', "
+            "now() - (CAST(n AS bigint) * :seconds / :per_wallet) * interval '1 second' "
+            "FROM unnest(CAST(:wallets AS uuid[])) w, generate_series(1, :per_wallet) n"
+        ),
+        {"wallets": wallet_ids, "per_wallet": per_wallet, "seconds": seconds},
+    )
+    await db.commit()
+
+
+async def _export_in_process(Session, stmt, export_format, compress) -> tuple[int, float]:
+    size, first = 0, None
+    started = time.perf_counter()
+    async for chunk in stream_export(
+        Session,
+        stmt,
+        export_format=export_format,
+        compress=compress,
+        batch_size=settings.EXPORT_BATCH_ROWS,
+    ):
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(chunk)
+    return size, first or 0.0
+
+
+async def _export_over_http(url, token, params, export_format, compress) -> tuple[int, float]:
+    size, first = 0, None
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        async with client.stream(
+            "GET",
+            "/api/v1/exports/wallet-ledger",
+            params={**params, "format": export_format.value, "gzip": str(compress).lower()},
+            headers={"X-Export-Token": token},
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_raw():
+                if first is None:
+                    first = time.perf_counter() - started
+                size += len(chunk)
+    return size, first or 0.0
+
+
+async def _load_everything(Session, created_from, created_to, limit: int) -> int:
+    async with Session() as db:
+        entries = (
+            await db.execute(
+                select(WalletLedgerEntry)
+                .where(
+                    WalletLedgerEntry.created_at >= created_from,
+                    WalletLedgerEntry.created_at < created_to,
+                )
+                .order_by(WalletLedgerEntry.entry_id)
+                .limit(limit)
+            )
+        ).scalars().all()
+        body = json.dumps(
+            [
+                WalletLedgerEntrySchema.model_validate(entry).model_dump(mode="json")
+                for entry in entries
+            ]
+        ).encode()
+    return len(body)
+
+
+async def main(args: argparse.Namespace) -> None:
+    token = args.token or (
+        settings.EXPORT_API_TOKEN.get_secret_value() if settings.EXPORT_API_TOKEN else None
+    )
+    if args.url and token is None:
+        raise SystemExit("Set EXPORT_API_TOKEN or pass --token")
+
+    Session = make_sessionmaker(pool_size=4)
+    created_to = datetime.now(timezone.utc) + timedelta(minutes=1)
+    async with Session() as db:
+        user_ids = await seed_users(db, args.wallets)
+        wallet_ids = await seed_wallets(db, user_ids, 0)
+        created_from = (await db.execute(select(func.now()))).scalar_one() - timedelta(
+            days=args.days
+        )
+        with stopwatch() as seeding:
+            await _seed(db, wallet_ids, args.rows, args.days)
+        await ensure_ledger_partitions(db, ahead=1)
+        await db.execute(text("ANALYZE wallet_ledger"))
+        await db.commit()
+    rows = args.rows // args.wallets * args.wallets
+    # Only this run's rows: other benchmarks may have left entries in the range
+    stmt = build_export_query(
+        EXPORT_DATASETS["wallet-ledger"], created_from=created_from, created_to=created_to
+    ).where(WalletLedgerEntry.wallet_id.in_(wallet_ids))
+
+    report: dict[str, object] = {"rows": rows, "seed s": seeding[0]}
+    params = {"created_from": created_from.isoformat(), "created_to": created_to.isoformat()}
+    for label, export_format, compress in (
+        ("csv", ExportFormat.CSV, False),
+        ("ndjson", ExportFormat.NDJSON, False),
+        ("csv.gz", ExportFormat.CSV, True),
+    ):
+        async with _PeakRss() as rss:
+            with stopwatch() as exporting:
+                if args.url:
+                    size, first = await _export_over_http(
+                        args.url, token, params, export_format, compress
+                    )
+                else:
+                    size, first = await _export_in_process(Session, stmt, export_format, compress)
+        report[f"{label}: rows/sec"] = rows / exporting[0]
+        report[f"{label}: MB"] = size / 2**20
+        report[f"{label}: first chunk ms"] = first * 1000
+        report[f"{label}: RSS growth MB"] = rss.growth_mb
+
+    baseline = min(args.baseline_rows, rows)
+    async with _PeakRss() as rss:
+        with stopwatch() as loading:
+            await _load_everything(Session, created_from, created_to, baseline)
+    report[f"load-all {baseline} rows: rows/sec"] = baseline / loading[0]
+    report[f"load-all {baseline} rows: RSS growth MB"] = rss.growth_mb
+
+    print_report(f"exports: {rows} ledger entries over {args.days} days", report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--wallets", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--baseline-rows", type=int, default=500_000)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--token", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+"""Idempotency keys: duplicate retries of a wallet debit, in-process over ASGI.
+
+``--keys`` debits are each sent ``--duplicates`` times at once with the same
+``Idempotency-Key`` (a client retrying on a flaky network), then replayed once
+more after they completed. Reports how many debits actually hit the ledger
+(must be ``--keys``), the latency of executed vs. replayed requests and the
+cost of the middleware on a request without a key.
+
+    poetry run python -m scripts.bench_idempotency --keys 200 --duplicates 5
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import jwt
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.main import app
+from app.models.wallet import WalletLedgerEntry
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_users,
+    seed_wallets,
+)
+
+
+def _headers(user_id, key=None):
+    token = jwt.encode(
+        {"sub": str(user_id), "aud": "authenticated", "exp": int(time.time()) + 3600},
+        settings.SUPABASE_JWT,
+        algorithm="HS256",
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    if key is not None:
+        headers["Idempotency-Key"] = key
+    return headers
+
+
+async def _debit(client, headers, executed, replayed):
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/v1/wallet/me/ledger/debit",
+        json={"amount_cents": 1, "reason": "ADJUSTMENT"},
+        headers=headers,
+    )
+    elapsed = time.perf_counter() - started
+    (replayed if response.headers.get("idempotent-replayed") else executed).append(elapsed)
+    return response.json()["entry_id"]
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=2)
+    async with Session() as db:
+        (user_id,) = await seed_users(db, 1)
+        (wallet_id,) = await seed_wallets(db, [user_id], 10_000_000)
+
+    executed: list[float] = []
+    replayed: list[float] = []
+    late: list[float] = []
+    plain: list[float] = []
+    run = time.time_ns()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        entry_ids = set()
+        for n in range(args.keys):
+            headers = _headers(user_id, f"bench-{run}-{n}")
+            entry_ids.update(
+                await asyncio.gather(
+                    *(
+                        _debit(client, headers, executed, replayed)
+                        for _ in range(args.duplicates)
+                    )
+                )
+            )
+        for n in range(args.keys):
+            # A late retry, after the first request completed
+            headers = _headers(user_id, f"bench-{run}-{n}")
+            entry_ids.add(await _debit(client, headers, executed, late))
+        for _ in range(args.keys):
+            await _debit(client, _headers(user_id), plain, [])
+
+    async with Session() as db:
+        ledger_rows = (
+            await db.execute(
+                select(func.count())
+                .select_from(WalletLedgerEntry)
+                .where(WalletLedgerEntry.wallet_id == wallet_id)
+            )
+        ).scalar_one()
+    print_report(
+        f"idempotent debits: {args.keys} keys x {args.duplicates + 1} sends",
+        {
+            "requests": len(executed) + len(replayed) + len(late),
+            "executed": len(executed),
+            "replayed": len(replayed) + len(late),
+            "distinct entries returned": len(entry_ids),
+            "ledger rows written (with key)": ledger_rows - args.keys,
+            "executed p50 ms": percentile(executed, 50) * 1000,
+            "executed p99 ms": percentile(executed, 99) * 1000,
+            "waited duplicate p50 ms": percentile(replayed, 50) * 1000,
+            "late replay p50 ms": percentile(late, 50) * 1000,
+            "late replay p99 ms": percentile(late, 99) * 1000,
+            "no key p50 ms": percentile(plain, 50) * 1000,
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=200)
+    parser.add_argument("--duplicates", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,130 @@
+"""Feed rendering benchmark: per-card fan-out vs. the composite pool card read model.
+
+The fan-out mirrors what the mobile feed did per card: four independent
+requests (pool, prize, images, likes), each with its own DB session. The
+composite path renders the whole page with `list_pool_cards`.
+
+    poetry run python -m scripts.bench_pool_cards --pools 2000 --page-sizes 20 50
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event, insert
+
+from app.models.pool_like import PoolLike
+from app.models.prize_image import PrizeImage
+from app.services.pool import get_pool, list_pool_catalog
+from app.services.pool_card import list_pool_cards
+from app.services.pool_like import get_like_status
+from app.services.prize import get_prize
+from app.services.prize_image import list_images
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_pools,
+    seed_users,
+)
+
+
+async def _seed(Session, pools: int):
+    async with Session() as db:
+        (owner_id,) = await seed_users(db, 1)
+        (viewer_id,) = await seed_users(db, 1)
+        pool_ids = await seed_pools(db, owner_id, pools, tickets_required=100)
+        pool_rows = await list_pool_catalog(db, limit=pools)
+        prize_ids = [pool.prize_id for pool in pool_rows[0]]
+        await db.execute(
+            insert(PrizeImage),
+            [
+                {
+                    "prize_id": prize_id,
+                    "bucket": "bench",
+                    "storage_path": f"{prize_id}/{n}.jpg",
+                    "url": f"https://example.invalid/{prize_id}/{n}.jpg",
+                    "is_cover": n == 0,
+                    "sort_order": n,
+                }
+                for prize_id in prize_ids
+                for n in range(3)
+            ],
+        )
+        await db.execute(
+            insert(PoolLike),
+            [{"pool_id": pool_id, "user_id": viewer_id} for pool_id in pool_ids[::3]],
+        )
+        await db.commit()
+    return viewer_id
+
+
+async def _fan_out_card(Session, pool_id, prize_id, viewer_id):
+    async def one(call):
+        async with Session() as db:
+            return await call(db)
+
+    await asyncio.gather(
+        one(lambda db: get_pool(db, pool_id)),
+        one(lambda db: get_prize(db, prize_id)),
+        one(lambda db: list_images(db, prize_id)),
+        one(lambda db: get_like_status(db, pool_id, viewer_id)),
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=args.connections)
+    viewer_id = await _seed(Session, args.pools)
+
+    statements = {"count": 0}
+
+    @event.listens_for(Session.kw["bind"].sync_engine, "before_cursor_execute")
+    def _count(*_):
+        statements["count"] += 1
+
+    for page_size in args.page_sizes:
+        async with Session() as db:
+            page, _ = await list_pool_catalog(db, limit=page_size)
+
+        fan_out, composite = [], []
+        fan_out_stmts = composite_stmts = 0
+        for _ in range(args.rounds):
+            statements["count"] = 0
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    _fan_out_card(Session, pool.pool_id, pool.prize_id, viewer_id)
+                    for pool in page
+                )
+            )
+            fan_out.append(time.perf_counter() - started)
+            fan_out_stmts = statements["count"]
+
+            statements["count"] = 0
+            started = time.perf_counter()
+            async with Session() as db:
+                await list_pool_cards(db, viewer_id, limit=page_size)
+            composite.append(time.perf_counter() - started)
+            composite_stmts = statements["count"]
+
+        print_report(
+            f"feed page of {page_size} cards ({args.rounds} rounds)",
+            {
+                "fan-out requests": page_size * 4,
+                "fan-out SQL statements": fan_out_stmts,
+                "fan-out p50 ms": percentile(fan_out, 50) * 1000,
+                "fan-out p99 ms": percentile(fan_out, 99) * 1000,
+                "composite SQL statements": composite_stmts,
+                "composite p50 ms": percentile(composite, 50) * 1000,
+                "composite p99 ms": percentile(composite, 99) * 1000,
+                "speedup (p50)": percentile(fan_out, 50) / percentile(composite, 50),
+            },
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pools", type=int, default=2000)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[20, 50])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--connections", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+"""Hot-pool like storm: concurrent like/unlike toggles against a single pool.
+
+Every user likes the pool, a share of them double-taps and a share unlikes.
+Reports toggles/sec and per-call latency, flushes the buffered counter and
+verifies that ``raffle_pool.likes`` matches the ``pool_like`` rows.
+
+    poetry run python -m scripts.bench_pool_likes --users 2000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import func, select
+
+from app.models.pool import RafflePool
+from app.models.pool_like import PoolLike
+from app.services.pool_like import like_counter, like_pool, unlike_pool
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_pools,
+    seed_users,
+    stopwatch,
+)
+
+
+async def _user(Session, pool_id, user_id, args, latencies):
+    ops = [like_pool]
+    if random.random() < args.double_tap:
+        ops.append(like_pool)
+    if random.random() < args.unlike:
+        ops.append(unlike_pool)
+    async with Session() as db:
+        for op in ops:
+            started = time.perf_counter()
+            await op(db, pool_id, user_id)
+            latencies.append(time.perf_counter() - started)
+
+
+async def _flusher(Session, interval, stop, flushes):
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        flushes.append(await like_counter.flush(Session))
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=args.connections)
+    async with Session() as db:
+        (owner_id,) = await seed_users(db, 1)
+        (pool_id,) = await seed_pools(db, owner_id, 1, tickets_required=100)
+        user_ids = await seed_users(db, args.users)
+
+    latencies: list[float] = []
+    flushes: list[int] = []
+    stop = asyncio.Event()
+    flusher = asyncio.create_task(_flusher(Session, args.flush_interval, stop, flushes))
+    with stopwatch() as elapsed:
+        await asyncio.gather(
+            *(_user(Session, pool_id, uid, args, latencies) for uid in user_ids)
+        )
+    stop.set()
+    await flusher
+    await like_counter.flush(Session)
+
+    async with Session() as db:
+        counter = (
+            await db.execute(select(RafflePool.likes).where(RafflePool.pool_id == pool_id))
+        ).scalar_one()
+        rows = (
+            await db.execute(
+                select(func.count()).select_from(PoolLike).where(PoolLike.pool_id == pool_id)
+            )
+        ).scalar_one()
+
+    print_report(
+        f"like storm: {args.users} users, 1 pool",
+        {
+            "toggles": len(latencies),
+            "elapsed s": elapsed[0],
+            "toggles/sec": len(latencies) / elapsed[0],
+            "p50 ms": percentile(latencies, 50) * 1000,
+            "p99 ms": percentile(latencies, 99) * 1000,
+            "counter flushes": sum(1 for n in flushes if n),
+            "raffle_pool.likes": counter,
+            "pool_like rows": rows,
+            "consistent": counter == rows,
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--double-tap", type=float, default=0.2)
+    parser.add_argument("--unlike", type=float, default=0.3)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--connections", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,145 @@
+"""Contention benchmark for ticket issuance on a single hot pool.
+
+N concurrent buyers redeem confirmed purchases against the same pool until it
+sells out. Reports issued tickets/sec, per-call latency and verifies that the
+issued ticket numbers are exactly 1..tickets_required.
+
+    poetry run python -m scripts.bench_ticket_issuance --buyers 200 --tickets 5000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.models.pool import RafflePool
+from app.models.purchase import Purchase, PurchaseStatus, PurchaseType
+from app.models.ticket import Ticket
+from app.models.wallet import WalletLedgerEntry
+from app.services.ticket import purchase_ticket_for_pool
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_pools,
+    seed_users,
+    seed_wallets,
+    stopwatch,
+)
+
+
+async def _seed(Session, buyers: int, tickets: int):
+    async with Session() as db:
+        (owner_id,) = await seed_users(db, 1)
+        (pool_id,) = await seed_pools(db, owner_id, 1, tickets_required=tickets)
+        user_ids = await seed_users(db, buyers)
+        wallet_ids = await seed_wallets(db, user_ids, balance_cents=0)
+
+        entries = await db.execute(
+            insert(WalletLedgerEntry).returning(WalletLedgerEntry.entry_id),
+            [
+                {
+                    "wallet_id": wid,
+                    "direction": "DEBIT",
+                    "amount_cents": 100,
+                    "reason": "TICKET_PURCHASE",
+                    "status": "POSTED",
+                }
+                for wid in wallet_ids
+            ],
+        )
+        entry_ids = list(entries.scalars())
+
+        # Oversubscribe by 10% so the sell-out path is exercised as well.
+        per_buyer: dict[uuid.UUID, list[uuid.UUID]] = {uid: [] for uid in user_ids}
+        rows = []
+        for i in range(int(tickets * 1.1)):
+            idx = i % buyers
+            purchase_id = uuid.uuid4()
+            per_buyer[user_ids[idx]].append(purchase_id)
+            rows.append(
+                {
+                    "purchase_id": purchase_id,
+                    "user_id": user_ids[idx],
+                    "pool_id": pool_id,
+                    "wallet_entry_id": entry_ids[idx],
+                    "type": PurchaseType.ENTRY.value,
+                    "amount_cents": 100,
+                    "currency": "EUR",
+                    "status": PurchaseStatus.CONFIRMED.value,
+                }
+            )
+        await db.execute(insert(Purchase), rows)
+        await db.commit()
+    return pool_id, per_buyer
+
+
+async def _buyer(Session, pool_id, user_id, purchase_ids, latencies, outcome):
+    async with Session() as db:
+        for purchase_id in purchase_ids:
+            started = time.perf_counter()
+            try:
+                await purchase_ticket_for_pool(db, pool_id, user_id, purchase_id)
+                outcome["issued"] += 1
+            except HTTPException:
+                await db.rollback()
+                outcome["rejected"] += 1
+                return
+            except IntegrityError:
+                await db.rollback()
+                outcome["collisions"] += 1
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=args.connections)
+    pool_id, per_buyer = await _seed(Session, args.buyers, args.tickets)
+
+    latencies: list[float] = []
+    outcome = {"issued": 0, "rejected": 0, "collisions": 0}
+    with stopwatch() as elapsed:
+        await asyncio.gather(
+            *(
+                _buyer(Session, pool_id, user_id, purchase_ids, latencies, outcome)
+                for user_id, purchase_ids in per_buyer.items()
+            )
+        )
+
+    async with Session() as db:
+        pool = await db.get(RafflePool, pool_id)
+        count, distinct, highest = (
+            await db.execute(
+                select(
+                    func.count(),
+                    func.count(func.distinct(Ticket.ticket_num)),
+                    func.max(Ticket.ticket_num),
+                ).where(Ticket.pool_id == pool_id)
+            )
+        ).one()
+
+    print_report(
+        f"ticket issuance: {args.buyers} buyers, 1 pool, {args.tickets} seats",
+        {
+            "issued": outcome["issued"],
+            "rejected (sold out)": outcome["rejected"],
+            "uq collisions": outcome["collisions"],
+            "elapsed s": elapsed[0],
+            "tickets/sec": outcome["issued"] / elapsed[0],
+            "p50 ms": percentile(latencies, 50) * 1000,
+            "p99 ms": percentile(latencies, 99) * 1000,
+            "pool state": f"{pool.state} ({pool.tickets_sold}/{pool.tickets_required})",
+            "ticket_num 1..N": count == distinct == highest == args.tickets,
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--connections", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,230 @@
+"""Top-up webhooks: a fake payment provider firing signed bursts at the endpoint.
+
+Seeds ``--topups`` CREATED top-ups spread over ``--wallets`` wallets, then
+posts their ``topup.succeeded`` events in signed batches of ``--batch``,
+``--concurrency`` requests at a time, redelivering a ``--redeliver`` share of
+the batches as a real provider does. Waits until the event processor drained
+the queue and reports acknowledgement latency, ingestion lag (received →
+applied) and throughput, then checks every top-up was credited exactly once.
+
+In process (the processor runs inside the script)::
+
+    TOPUP_WEBHOOK_SECRET=bench poetry run python -m scripts.bench_topup_webhooks --topups 20000
+
+Against a running server, sharing its database and secret::
+
+    poetry run python -m scripts.bench_topup_webhooks --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from app.core.config import settings
+from app.main import app
+from app.models.wallet import (
+    WalletAccount,
+    WalletLedgerEntry,
+    WalletTopupEvent,
+    WalletTopupEventStatus,
+    WalletTopupRequest,
+)
+from app.services.topup_webhook import sign_payload, topup_event_processor
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_users,
+    seed_wallets,
+    stopwatch,
+)
+
+
+async def _seed_topups(db, provider, wallet_ids, count: int) -> list[dict]:
+    topups = [
+        {
+            "topup_id": uuid.uuid4(),
+            "wallet_id": wallet_ids[n % len(wallet_ids)],
+            "provider": provider,
+            "amount_cents": 100 * random.randint(1, 50),
+            "status": "CREATED",
+        }
+        for n in range(count)
+    ]
+    for start in range(0, count, 5000):
+        await db.execute(insert(WalletTopupRequest), topups[start : start + 5000])
+    await db.commit()
+    return topups
+
+
+async def _deliver(client, semaphore, secret, provider, events, acks: list[float]) -> int:
+    body = json.dumps({"events": events}).encode()
+    timestamp = str(int(time.time()))
+    headers = {
+        "Content-Type": "application/json",
+        "X-Tickup-Timestamp": timestamp,
+        "X-Tickup-Signature": sign_payload(secret, timestamp, body),
+    }
+    async with semaphore:
+        started = time.perf_counter()
+        response = await client.post(
+            f"/api/v1/webhooks/topups/{provider}", content=body, headers=headers
+        )
+        acks.append(time.perf_counter() - started)
+    response.raise_for_status()
+    return response.json()["duplicates"]
+
+
+async def _wait_drained(Session, provider, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        async with Session() as db:
+            pending = (
+                await db.execute(
+                    select(func.count())
+                    .select_from(WalletTopupEvent)
+                    .where(
+                        WalletTopupEvent.provider == provider,
+                        WalletTopupEvent.status == WalletTopupEventStatus.RECEIVED.value,
+                    )
+                )
+            ).scalar_one()
+        if not pending:
+            return
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"{pending} events still pending after {timeout}s")
+
+
+async def main(args: argparse.Namespace) -> None:
+    secret = args.secret or (
+        settings.TOPUP_WEBHOOK_SECRET.get_secret_value()
+        if settings.TOPUP_WEBHOOK_SECRET
+        else None
+    )
+    if secret is None:
+        raise SystemExit("Set TOPUP_WEBHOOK_SECRET or pass --secret")
+    provider = f"bench-{uuid.uuid4().hex[:8]}"
+
+    Session = make_sessionmaker(pool_size=topup_event_processor.workers + 4)
+    async with Session() as db:
+        user_ids = await seed_users(db, args.wallets)
+        wallet_ids = await seed_wallets(db, user_ids, 0)
+        topups = await _seed_topups(db, provider, wallet_ids, args.topups)
+
+    events = [
+        {
+            "id": f"evt-{topup['topup_id'].hex}",
+            "type": "topup.succeeded",
+            "topup_id": str(topup["topup_id"]),
+            "provider_txn_id": f"txn-{topup['topup_id'].hex}",
+            "amount_cents": topup["amount_cents"],
+        }
+        for topup in topups
+    ]
+    batches = [events[n : n + args.batch] for n in range(0, len(events), args.batch)]
+    batches += random.sample(batches, int(len(batches) * args.redeliver))
+    random.shuffle(batches)
+
+    processor = None
+    if args.url:
+        transport = httpx.AsyncHTTPTransport()
+        base_url = args.url
+    else:
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+        processor = asyncio.create_task(topup_event_processor.run(Session))
+
+    acks: list[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60) as client:
+            with stopwatch() as ingesting:
+                duplicates = sum(
+                    await asyncio.gather(
+                        *(
+                            _deliver(client, semaphore, secret, provider, batch, acks)
+                            for batch in batches
+                        )
+                    )
+                )
+            with stopwatch() as draining:
+                await _wait_drained(Session, provider, args.timeout)
+    finally:
+        if processor is not None:
+            processor.cancel()
+            await asyncio.gather(processor, return_exceptions=True)
+
+    async with Session() as db:
+        lags = [
+            lag.total_seconds()
+            for (lag,) in (
+                await db.execute(
+                    select(WalletTopupEvent.processed_at - WalletTopupEvent.received_at).where(
+                        WalletTopupEvent.provider == provider
+                    )
+                )
+            ).all()
+        ]
+        statuses = dict(
+            (
+                await db.execute(
+                    select(WalletTopupEvent.status, func.count())
+                    .where(WalletTopupEvent.provider == provider)
+                    .group_by(WalletTopupEvent.status)
+                )
+            ).all()
+        )
+        credited, ledger_rows = (
+            await db.execute(
+                select(
+                    func.coalesce(func.sum(WalletAccount.balance_cents), 0),
+                    func.coalesce(func.sum(WalletAccount.ledger_entries), 0),
+                ).where(WalletAccount.wallet_id.in_(wallet_ids))
+            )
+        ).one()
+        ledger_count = (
+            await db.execute(
+                select(func.count())
+                .select_from(WalletLedgerEntry)
+                .where(WalletLedgerEntry.wallet_id.in_(wallet_ids))
+            )
+        ).scalar_one()
+
+    print_report(
+        f"top-up webhooks: {args.topups} events, {len(batches)} deliveries of {args.batch}",
+        {
+            "deliveries": len(batches),
+            "duplicate events acked": duplicates,
+            "ack p50 ms": percentile(acks, 50) * 1000,
+            "ack p99 ms": percentile(acks, 99) * 1000,
+            "ingested events/sec": (len(events) + duplicates) / ingesting[0],
+            "drain after last ack s": draining[0],
+            "applied events/sec": len(events) / (ingesting[0] + draining[0]),
+            "lag p50 ms": percentile(lags, 50) * 1000,
+            "lag p99 ms": percentile(lags, 99) * 1000,
+            "applied": statuses.get(WalletTopupEventStatus.APPLIED.value, 0),
+            "ignored": statuses.get(WalletTopupEventStatus.IGNORED.value, 0),
+            "failed": statuses.get(WalletTopupEventStatus.FAILED.value, 0),
+            "credit mismatch cents": int(credited) - sum(t["amount_cents"] for t in topups),
+            "ledger rows (expected topups)": ledger_count,
+            "ledger counter drift": int(ledger_rows) - ledger_count,
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topups", type=int, default=20_000)
+    parser.add_argument("--wallets", type=int, default=2_000)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--redeliver", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--secret", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,167 @@
+"""Phase elimination: participants loaded and filtered in Python vs one window-function UPDATE.
+
+For every ``--sizes`` entry, seeds a tournament phase with that many
+participants (random scores and times), then resolves it once per rule type
+(``top_percentage``, ``min_score``, ``max_time``, ``combined``) with
+``TournamentOrchestrator.process_phase_elimination``. Up to
+``--baseline-max`` participants the previous implementation runs first on the
+same phase: every participant loaded as an ORM object, the rule applied to the
+list, one UPDATE per participant on flush. Reports seconds per phase, the
+qualified count and whether both picked the same participants.
+
+    poetry run python -m scripts.bench_tournament_elimination --sizes 10000,100000,1000000
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import asc, desc, select, text
+
+from app.models.tournament import Tournament
+from app.models.tournament_participant import TournamentParticipant
+from app.models.tournament_phase import TournamentPhase
+from app.services.tournament_orchestrator import TournamentOrchestrator
+from scripts._bench import make_sessionmaker, print_report, seed_pools, seed_users, stopwatch
+
+RULES = {
+    "top_percentage": {"type": "top_percentage", "value": 50},
+    "min_score": {"type": "min_score", "value": 7000},
+    "max_time": {"type": "max_time", "value": 120},
+    "combined": {"type": "combined", "min_score": 5000, "time_percentage": 25},
+}
+
+
+def _previous_rules(participants, rule):
+    """``_apply_elimination_rules`` as it was, on the loaded participants."""
+    rule_type = rule.get("type")
+    if rule_type == "top_percentage":
+        qualified_count = max(1, int(len(participants) * rule.get("value", 50) / 100))
+        return participants[:qualified_count]
+    elif rule_type == "min_score":
+        return [p for p in participants if p.best_score >= rule.get("value", 0)]
+    elif rule_type == "max_time":
+        return [p for p in participants if p.best_time_seconds <= rule.get("value", float("inf"))]
+    elif rule_type == "combined":
+        score_qualified = [p for p in participants if p.best_score >= rule.get("min_score", 0)]
+        if not score_qualified:
+            return []
+        count = max(1, int(len(score_qualified) * rule.get("time_percentage", 50) / 100))
+        score_qualified.sort(key=lambda p: p.best_time_seconds)
+        return score_qualified[:count]
+    return participants
+
+
+async def _previous_elimination(db, phase_id, rule) -> int:
+    participants = (
+        await db.execute(
+            select(TournamentParticipant)
+            .where(TournamentParticipant.phase_id == phase_id)
+            # id breaks ties the same way the window functions do
+            .order_by(
+                desc(TournamentParticipant.best_score),
+                asc(TournamentParticipant.best_time_seconds),
+                TournamentParticipant.id,
+            )
+        )
+    ).scalars().all()
+    qualified = _previous_rules(participants, rule)
+    # A set instead of the list membership test of the original loop: that one
+    # is quadratic and would not finish at 100k participants
+    qualified_ids = {p.id for p in qualified}
+    for participant in participants:
+        if participant.id in qualified_ids:
+            participant.qualified = True
+            participant.qualified_at = datetime.utcnow()
+        else:
+            participant.qualified = False
+            participant.eliminated_at = datetime.utcnow()
+    await db.commit()
+    return len(qualified)
+
+
+async def _qualified_ids(db, phase_id) -> set:
+    return set(
+        (
+            await db.execute(
+                select(TournamentParticipant.id).where(
+                    TournamentParticipant.phase_id == phase_id,
+                    TournamentParticipant.qualified.is_(True),
+                )
+            )
+        ).scalars()
+    )
+
+
+async def _seed_phase(db, tournament_id, number: int, size: int):
+    phase = TournamentPhase(
+        tournament_id=tournament_id,
+        phase_number=number,
+        game_id=tournament_id,
+        title=f"bench {size}",
+        status="active",
+        participants_count=size,
+    )
+    db.add(phase)
+    await db.flush()
+    # Players are seeded with their participant row, in one statement
+    await db.execute(
+        text(
+            "WITH players AS ("
+            "  INSERT INTO app_user (user_id, nickname) "
+            "  SELECT gen_random_uuid(), 'bench-player' FROM generate_series(1, :size) "
+            "  RETURNING user_id"
+            ") "
+            "INSERT INTO tournament_participants "
+            "(id, tournament_id, phase_id, player_id, qualified, best_score, best_time_seconds, sessions_count) "
+            "SELECT gen_random_uuid(), CAST(:tournament AS uuid), CAST(:phase AS uuid), user_id, false, "
+            "floor(random() * 10000), 30 + floor(random() * 300), 1 + floor(random() * 5) "
+            "FROM players"
+        ),
+        {"size": size, "tournament": tournament_id, "phase": phase.id},
+    )
+    await db.commit()
+    await db.execute(text("ANALYZE tournament_participants"))
+    return phase
+
+
+async def main(args: argparse.Namespace) -> None:
+    sizes = [int(size) for size in args.sizes.split(",")]
+    Session = make_sessionmaker(pool_size=2)
+    async with Session() as db:
+        (owner_id,) = await seed_users(db, 1)
+        (pool_id,) = await seed_pools(db, owner_id, 1, tickets_required=1)
+        tournament = Tournament(pool_id=pool_id, title="bench", total_phases=len(sizes))
+        db.add(tournament)
+        await db.commit()
+
+    for number, size in enumerate(sizes, start=1):
+        async with Session() as db:
+            with stopwatch() as seeding:
+                phase = await _seed_phase(db, tournament.id, number, size)
+        report: dict[str, object] = {"seed s": seeding[0]}
+        for label, rule in RULES.items():
+            expected = None
+            if size <= args.baseline_max:
+                async with Session() as db:
+                    with stopwatch() as previous:
+                        await _previous_elimination(db, phase.id, rule)
+                    expected = await _qualified_ids(db, phase.id)
+                report[f"{label}: python s"] = previous[0]
+            async with Session() as db:
+                phase = await db.get(TournamentPhase, phase.id)
+                phase.elimination_rule = rule
+                with stopwatch() as set_based:
+                    await TournamentOrchestrator(db).process_phase_elimination(phase)
+                qualified = await _qualified_ids(db, phase.id)
+            report[f"{label}: window UPDATE s"] = set_based[0]
+            report[f"{label}: qualified"] = phase.qualified_count
+            if expected is not None:
+                report[f"{label}: same qualified"] = expected == qualified
+        print_report(f"tournament elimination: {size} participants", report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--baseline-max", type=int, default=100_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,250 @@
+"""Live phase leaderboard: in-memory order-statistic index vs SQL, at 1M players.
+
+Seeds one active phase with ``--players`` participants (random bests), then:
+
+* rebuild: how long a worker takes to load the phase on start;
+* SQL: top-100 (ORDER BY on the rank index) and a player's rank (COUNT of
+  the players ahead) straight from ``tournament_participants``;
+* live: ``--rate`` results/sec for ``--seconds`` through ``record_result``,
+  with a top-100 read and a rank lookup every 10 ms, while the flush +
+  refresh cycle of ``run`` goes on every ``--interval`` seconds. Reports latencies, the rate
+  sustained and the flush cost;
+* checks: ranks of sampled players against SQL after the last flush, and a
+  fresh rebuild (a restart) returning the same top-100.
+
+    poetry run python -m scripts.bench_tournament_leaderboard --players 1000000 --rate 10000
+"""
+import argparse
+import asyncio
+import random
+import resource
+import time
+
+from sqlalchemy import and_, func, or_, select, text
+
+from app.models.tournament import TournamentStatus
+from app.models.tournament_participant import TournamentParticipant as P
+from app.models.tournament_phase import PhaseStatus
+from app.services.tournament_leaderboard import TournamentLeaderboards
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_pools,
+    seed_users,
+    stopwatch,
+)
+
+
+async def _seed(db, players: int):
+    (owner_id,) = await seed_users(db, 1)
+    (pool_id,) = await seed_pools(db, owner_id, 1, tickets_required=players)
+    tournament_id, phase_id = (
+        await db.execute(
+            text(
+                "WITH t AS ("
+                "  INSERT INTO tournaments (id, pool_id, title, status, total_phases, current_phase) "
+                "  VALUES (gen_random_uuid(), :pool, 'bench', :tournament_status, 1, 1) RETURNING id"
+                ") "
+                "INSERT INTO tournament_phases "
+                "(id, tournament_id, phase_number, game_id, title, duration_hours, status, "
+                " started_at, deadline_at, participants_count, qualified_count) "
+                "SELECT gen_random_uuid(), id, 1, id, 'bench', 72, :phase_status, now(), "
+                "now() + interval '72 hours', :players, 0 FROM t "
+                "RETURNING tournament_id, id"
+            ),
+            {
+                "pool": pool_id,
+                "players": players,
+                "tournament_status": TournamentStatus.ACTIVE.value,
+                "phase_status": PhaseStatus.ACTIVE.value,
+            },
+        )
+    ).one()
+    await db.execute(
+        text(
+            "WITH u AS ("
+            "  INSERT INTO app_user (user_id, nickname) "
+            "  SELECT gen_random_uuid(), 'bench-player' FROM generate_series(1, :players) "
+            "  RETURNING user_id"
+            ") "
+            "INSERT INTO tournament_participants "
+            "(id, tournament_id, phase_id, player_id, qualified, best_score, best_time_seconds, "
+            " sessions_count, last_played_at) "
+            "SELECT gen_random_uuid(), :tournament, :phase, user_id, false, "
+            "floor(random() * 100000), 30 + floor(random() * 600), 1, "
+            "now() - interval '1 hour' FROM u"
+        ),
+        {"players": players, "tournament": tournament_id, "phase": phase_id},
+    )
+    await db.commit()
+    await db.execute(text("ANALYZE tournament_participants"))
+    return tournament_id, phase_id
+
+
+async def _sql_rank(db, phase_id, player_id) -> int:
+    """1-based rank from the table: players ahead on (score desc, time asc, player_id)."""
+    score, time_seconds = (
+        await db.execute(
+            select(P.best_score, P.best_time_seconds).where(
+                P.phase_id == phase_id, P.player_id == player_id
+            )
+        )
+    ).one()
+    ahead = await db.scalar(
+        select(func.count()).where(
+            P.phase_id == phase_id,
+            or_(
+                P.best_score > score,
+                and_(P.best_score == score, P.best_time_seconds < time_seconds),
+                and_(
+                    P.best_score == score,
+                    P.best_time_seconds == time_seconds,
+                    P.player_id < player_id,
+                ),
+            ),
+        )
+    )
+    return ahead + 1
+
+
+async def _sql_top(db, phase_id, limit: int) -> list:
+    return (
+        await db.execute(
+            select(P.player_id, P.best_score, P.best_time_seconds)
+            .where(P.phase_id == phase_id)
+            .order_by(
+                P.best_score.desc().nulls_last(),
+                P.best_time_seconds.asc().nulls_last(),
+                P.player_id,
+            )
+            .limit(limit)
+        )
+    ).all()
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=4)
+    async with Session() as db:
+        with stopwatch() as seeding:
+            tournament_id, phase_id = await _seed(db, args.players)
+
+    leaderboards = TournamentLeaderboards()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with stopwatch() as rebuild:
+        await leaderboards.refresh(Session, full=True)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    index = leaderboards.phases[phase_id]
+    player_ids = [player_id for player_id, _ in index.items()]
+
+    sql_top, sql_rank = [], []
+    async with Session() as db:
+        for _ in range(args.samples):
+            with stopwatch() as took:
+                await _sql_top(db, phase_id, 100)
+            sql_top.append(took[0])
+            with stopwatch() as took:
+                await _sql_rank(db, phase_id, random.choice(player_ids))
+            sql_rank.append(took[0])
+
+    updates, tops, ranks, flushes, refreshes = [], [], [], [], []
+
+    async def cycle() -> None:
+        # What run() does in the app, in its own task
+        while True:
+            await asyncio.sleep(args.interval)
+            with stopwatch() as took:
+                await leaderboards.flush(Session)
+            flushes.append(took[0])
+            with stopwatch() as took:
+                await leaderboards.refresh(Session)
+            refreshes.append(took[0])
+
+    cycling = asyncio.create_task(cycle())
+    tick = 0.01
+    per_tick = max(1, round(args.rate * tick))
+    started = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - started < args.seconds:
+        for _ in range(per_tick):
+            player_id = random.choice(player_ids)
+            t0 = time.perf_counter()
+            leaderboards.record_result(
+                tournament_id,
+                phase_id,
+                player_id,
+                random.randrange(100_000),
+                30 + random.randrange(600),
+            )
+            updates.append(time.perf_counter() - t0)
+        sent += per_tick
+        with stopwatch() as took:
+            leaderboards.top(tournament_id, phase_id, 0, 100)
+        tops.append(took[0])
+        with stopwatch() as took:
+            leaderboards.rank_of(tournament_id, phase_id, random.choice(player_ids))
+        ranks.append(took[0])
+        # Pace to the target rate; falls behind when a tick overruns
+        await asyncio.sleep(max(0.0, started + sent / args.rate - time.perf_counter()))
+    elapsed = time.perf_counter() - started
+    cycling.cancel()
+    await asyncio.gather(cycling, return_exceptions=True)
+    with stopwatch() as last_flush:
+        await leaderboards.flush(Session)
+
+    mismatched = 0
+    async with Session() as db:
+        for player_id in random.sample(player_ids, args.samples):
+            rank, *_ = leaderboards.rank_of(tournament_id, phase_id, player_id)
+            mismatched += rank != await _sql_rank(db, phase_id, player_id)
+        expected_top = [tuple(row) for row in await _sql_top(db, phase_id, 100)]
+
+    restarted = TournamentLeaderboards()
+    with stopwatch() as restart:
+        await restarted.refresh(Session, full=True)
+    restarted_top = [
+        (player_id, score, time_seconds)
+        for _, player_id, score, time_seconds in restarted.top(tournament_id, phase_id, 0, 100)
+    ]
+    live_top = [
+        (player_id, score, time_seconds)
+        for _, player_id, score, time_seconds in leaderboards.top(tournament_id, phase_id, 0, 100)
+    ]
+
+    print_report(
+        f"tournament leaderboard: {args.players} players, {args.rate} results/sec for {args.seconds:g}s",
+        {
+            "seed s": seeding[0],
+            "rebuild s": rebuild[0],
+            "rebuild RSS MB": (rss_after - rss_before) / 1024,
+            "SQL top-100 p50 ms": percentile(sql_top, 50) * 1000,
+            "SQL rank p50 ms": percentile(sql_rank, 50) * 1000,
+            "results/sec sustained": len(updates) / elapsed,
+            "record_result p50 us": percentile(updates, 50) * 1e6,
+            "record_result p99 us": percentile(updates, 99) * 1e6,
+            "top-100 p50 us": percentile(tops, 50) * 1e6,
+            "top-100 p99 us": percentile(tops, 99) * 1e6,
+            "rank p50 us": percentile(ranks, 50) * 1e6,
+            "rank p99 us": percentile(ranks, 99) * 1e6,
+            "flush p50 / max ms": (
+                f"{percentile(flushes, 50) * 1000:,.1f} / {max(flushes, default=0.0) * 1000:,.1f}"
+            ),
+            "refresh p50 / max ms": (
+                f"{percentile(refreshes, 50) * 1000:,.1f} / {max(refreshes, default=0.0) * 1000:,.1f}"
+            ),
+            "last flush ms": last_flush[0] * 1000,
+            f"ranks != SQL (of {args.samples})": mismatched,
+            "top-100 == SQL / restart": f"{live_top == expected_top} / {restarted_top == expected_top}",
+            "restart rebuild s": restart[0],
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=1_000_000)
+    parser.add_argument("--rate", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--samples", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
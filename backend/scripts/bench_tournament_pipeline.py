@@ -0,0 +1,204 @@
+"""Expired phases of many tournaments: one session walking them vs the concurrent pipeline.
+
+Seeds ``--tournaments`` two-phase tournaments whose first phase is already
+past its deadline (``--participants`` players each), then processes them the
+way the hourly job did (one ``AsyncSession``, phase after phase, every commit
+waited for) and again with ``process_expired_phases`` at every
+``--concurrency`` level. Reports phases/sec, per-tournament p50/p99 and the
+whole backlog's duration.
+
+``--faulty`` tournaments of each pipeline run fail (a trigger raises on their
+phase update) for the first ``--fault-seconds``: they go through the retry
+queue while the others proceed, and must all end up processed.
+
+    poetry run python -m scripts.bench_tournament_pipeline --tournaments 1000 --concurrency 1,4,8
+"""
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import func, select, text
+
+from app.models.tournament_phase import PhaseStatus, TournamentPhase
+from app.services.tournament_orchestrator import TournamentOrchestrator
+from app.services.tournament_pipeline import (
+    TaskOutcome,
+    TournamentPipeline,
+    process_expired_phases,
+)
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_pools,
+    seed_users,
+    stopwatch,
+)
+
+_FAULT_DDL = (
+    "CREATE TABLE IF NOT EXISTS bench_tournament_fault (tournament_id uuid PRIMARY KEY)",
+    "CREATE OR REPLACE FUNCTION bench_tournament_fault() RETURNS trigger AS $$ "
+    "BEGIN "
+    "  IF EXISTS (SELECT 1 FROM bench_tournament_fault WHERE tournament_id = NEW.tournament_id) THEN "
+    "    RAISE EXCEPTION 'bench fault for tournament %', NEW.tournament_id; "
+    "  END IF; "
+    "  RETURN NEW; "
+    "END $$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS bench_tournament_fault ON tournament_phases",
+    "CREATE TRIGGER bench_tournament_fault BEFORE UPDATE ON tournament_phases "
+    "FOR EACH ROW EXECUTE FUNCTION bench_tournament_fault()",
+)
+
+
+async def _seed(db, tournaments: int, participants: int) -> list:
+    """Two-phase tournaments on phase 1, expired a minute ago; returns the tournament ids."""
+    (owner_id,) = await seed_users(db, 1)
+    player_ids = await seed_users(db, participants)
+    pool_ids = await seed_pools(db, owner_id, tournaments, tickets_required=participants)
+    tournament_ids = (
+        await db.execute(
+            text(
+                "INSERT INTO tournaments (id, pool_id, title, status, total_phases, current_phase) "
+                "SELECT gen_random_uuid(), p, 'bench', 'active', 2, 1 "
+                "FROM unnest(CAST(:pools AS uuid[])) p "
+                "RETURNING id"
+            ),
+            {"pools": pool_ids},
+        )
+    ).scalars().all()
+    await db.execute(
+        text(
+            "INSERT INTO tournament_phases "
+            "(id, tournament_id, phase_number, game_id, title, duration_hours, elimination_rule, "
+            " status, started_at, deadline_at, participants_count, qualified_count) "
+            "SELECT gen_random_uuid(), t, n, t, 'bench', 1, "
+            "CAST('{\"type\": \"top_percentage\", \"value\": 50}' AS json), "
+            "CASE n WHEN 1 THEN 'active' ELSE 'scheduled' END, "
+            "CASE n WHEN 1 THEN now() - interval '1 hour 1 minute' END, "
+            "CASE n WHEN 1 THEN now() - interval '1 minute' END, :participants, 0 "
+            "FROM unnest(CAST(:tournaments AS uuid[])) t, generate_series(1, 2) n"
+        ),
+        {"tournaments": list(tournament_ids), "participants": participants},
+    )
+    await db.execute(
+        text(
+            "INSERT INTO tournament_participants "
+            "(id, tournament_id, phase_id, player_id, qualified, best_score, best_time_seconds, sessions_count) "
+            "SELECT gen_random_uuid(), ph.tournament_id, ph.id, u, false, "
+            "floor(random() * 10000), 30 + floor(random() * 300), 1 "
+            "FROM tournament_phases ph, unnest(CAST(:players AS uuid[])) u "
+            "WHERE ph.tournament_id = ANY(CAST(:tournaments AS uuid[])) AND ph.phase_number = 1"
+        ),
+        {"players": player_ids, "tournaments": list(tournament_ids)},
+    )
+    await db.commit()
+    return list(tournament_ids)
+
+
+async def _advanced(db, tournament_ids) -> int:
+    """Tournaments whose phase 1 is completed and phase 2 running."""
+    return await db.scalar(
+        select(func.count()).where(
+            TournamentPhase.tournament_id.in_(tournament_ids),
+            TournamentPhase.phase_number == 2,
+            TournamentPhase.status == PhaseStatus.ACTIVE.value,
+        )
+    )
+
+
+async def _one_session(Session, tournament_ids) -> list[float]:
+    """What the hourly job did: every expired phase on one session, in turn."""
+    timings = []
+    async with Session() as db:
+        phases = (
+            await db.execute(
+                select(TournamentPhase).where(
+                    TournamentPhase.tournament_id.in_(tournament_ids),
+                    TournamentPhase.status == PhaseStatus.ACTIVE.value,
+                    TournamentPhase.deadline_at <= func.now(),
+                )
+            )
+        ).scalars().all()
+        orchestrator = TournamentOrchestrator(db)
+        for phase in phases:
+            with stopwatch() as took:
+                await orchestrator.process_expired_phase(phase)
+            timings.append(took[0])
+    return timings
+
+
+async def _clear_faults(Session, delay: float) -> None:
+    await asyncio.sleep(delay)
+    async with Session() as db:
+        await db.execute(text("DELETE FROM bench_tournament_fault"))
+        await db.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    levels = [int(level) for level in args.concurrency.split(",")]
+    # Injected faults would log a traceback per attempt
+    logging.getLogger("app.services.tournament_pipeline").setLevel(logging.CRITICAL)
+    Session = make_sessionmaker(pool_size=max(levels) + 4)
+    async with Session() as db:
+        for statement in _FAULT_DDL:
+            await db.execute(text(statement))
+        await db.commit()
+
+    report: dict[str, object] = {}
+    runs = [("one session", None)] + [(f"pipeline x{level}", level) for level in levels]
+    try:
+        for label, level in runs:
+            async with Session() as db:
+                tournament_ids = await _seed(db, args.tournaments, args.participants)
+                faulty = tournament_ids[: args.faulty] if level else []
+                if faulty:
+                    await db.execute(
+                        text(
+                            "INSERT INTO bench_tournament_fault "
+                            "SELECT unnest(CAST(:ids AS uuid[]))"
+                        ),
+                        {"ids": faulty},
+                    )
+                    await db.commit()
+            if level is None:
+                with stopwatch() as elapsed:
+                    timings = await _one_session(Session, tournament_ids)
+                retries = failed = 0
+            else:
+                pipeline = TournamentPipeline(
+                    concurrency=level, max_attempts=args.max_attempts, retry_seconds=args.retry
+                )
+                clearing = asyncio.create_task(_clear_faults(Session, args.fault_seconds))
+                with stopwatch() as elapsed:
+                    tasks = await process_expired_phases(Session, pipeline)
+                await clearing
+                timings = [t.seconds for t in tasks if t.outcome is TaskOutcome.DONE]
+                retries, failed = pipeline.retries, pipeline.failed
+            async with Session() as db:
+                advanced = await _advanced(db, tournament_ids)
+            report[f"{label}: phases/sec"] = len(timings) / elapsed[0]
+            report[f"{label}: backlog s"] = elapsed[0]
+            report[f"{label}: per tournament p50 ms"] = percentile(timings, 50) * 1000
+            report[f"{label}: per tournament p99 ms"] = percentile(timings, 99) * 1000
+            report[f"{label}: advanced / retries / failed"] = f"{advanced} / {retries} / {failed}"
+    finally:
+        async with Session() as db:
+            await db.execute(text("DROP TRIGGER IF EXISTS bench_tournament_fault ON tournament_phases"))
+            await db.commit()
+
+    print_report(
+        f"tournament pipeline: {args.tournaments} expired phases, {args.participants} players each",
+        report,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tournaments", type=int, default=1000)
+    parser.add_argument("--participants", type=int, default=100)
+    parser.add_argument("--concurrency", default="1,4,8")
+    parser.add_argument("--faulty", type=int, default=20)
+    parser.add_argument("--fault-seconds", type=float, default=2.0)
+    parser.add_argument("--max-attempts", type=int, default=5)
+    parser.add_argument("--retry", type=float, default=0.5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,174 @@
+"""Tournament participants: one ORM object per player vs one INSERT … SELECT.
+
+Seeds a FULL pool with ``--tickets`` tickets bought by ``--players`` users,
+converts it to a three-phase tournament and starts it: phase 1 gets one
+participant per ticket holder (``_create_initial_participants``). After
+random scores, phase 1 expires and its qualified players are carried over to
+phase 2 (``process_expired_phase``). Both steps are timed against the
+previous approach (load the players, ``db.add`` a ``TournamentParticipant``
+each, flush; into phase 3, rolled back), and the participant counts are checked.
+
+    poetry run python -m scripts.bench_tournament_seeding --tickets 50000 --players 20000
+"""
+import argparse
+import asyncio
+import uuid
+
+from sqlalchemy import func, select, text
+
+from app.models.pool import RafflePool
+from app.models.ticket import Ticket
+from app.models.tournament_participant import TournamentParticipant
+from app.models.tournament_phase import PhaseStatus, TournamentPhase
+from app.services.tournament_orchestrator import TournamentOrchestrator
+from scripts._bench import make_sessionmaker, print_report, seed_pools, seed_users, stopwatch
+
+
+async def _seed_full_pool(db, tickets: int, players: int) -> uuid.UUID:
+    (owner_id,) = await seed_users(db, 1)
+    player_ids = await seed_users(db, players)
+    (pool_id,) = await seed_pools(db, owner_id, 1, tickets_required=tickets)
+    # One confirmed purchase per ticket, holders cycling over the players
+    await db.execute(
+        text(
+            "WITH buyers AS ("
+            "  SELECT n, (CAST(:players AS uuid[]))[1 + n % :count] AS user_id "
+            "  FROM generate_series(1, :tickets) n"
+            "), purchases AS ("
+            "  INSERT INTO purchase (purchase_id, user_id, pool_id, type, amount_cents, currency, status) "
+            "  SELECT gen_random_uuid(), user_id, :pool, 'ENTRY', 100, 'EUR', 'CONFIRMED' FROM buyers "
+            "  RETURNING purchase_id, user_id"
+            ") "
+            "INSERT INTO ticket (pool_id, user_id, purchase_id, ticket_num) "
+            "SELECT :pool, user_id, purchase_id, row_number() OVER () FROM purchases"
+        ),
+        {"players": player_ids, "count": players, "tickets": tickets, "pool": pool_id},
+    )
+    pool = await db.get(RafflePool, pool_id)
+    pool.tickets_sold = tickets
+    pool.state = "FULL"
+    await db.commit()
+    return pool_id
+
+
+async def _orm_rows(db, tournament_id, phase_id, players) -> None:
+    """The previous approach: one TournamentParticipant per player, flushed."""
+    for player_id in (await db.execute(players)).scalars().all():
+        db.add(
+            TournamentParticipant(
+                tournament_id=tournament_id,
+                phase_id=phase_id,
+                player_id=player_id,
+                qualified=False,
+                best_score=0,
+                best_time_seconds=None,
+                sessions_count=0,
+            )
+        )
+    await db.flush()
+
+
+async def _participants(db, phase_id) -> int:
+    return await db.scalar(
+        select(func.count()).where(TournamentParticipant.phase_id == phase_id)
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=4)
+    async with Session() as db:
+        with stopwatch() as seeding:
+            pool_id = await _seed_full_pool(db, args.tickets, args.players)
+        holders = await db.scalar(
+            select(func.count(func.distinct(Ticket.user_id))).where(Ticket.pool_id == pool_id)
+        )
+
+        orchestrator = TournamentOrchestrator(db)
+        with stopwatch() as converting:
+            tournament = await orchestrator.convert_pool_to_tournament(
+                str(pool_id),
+                {
+                    "title": "bench",
+                    "phases": [
+                        {"game_id": str(uuid.uuid4()), "duration_hours": 1},
+                        {"game_id": str(uuid.uuid4()), "duration_hours": 1},
+                        {"game_id": str(uuid.uuid4()), "duration_hours": 1},
+                    ],
+                },
+            )
+            await orchestrator.start_tournament_manually(tournament.id)
+        # Ids only: the rollbacks below expire every loaded object
+        tournament_id = tournament.id
+        phase_1_id, phase_2_id, phase_3_id = (
+            await db.execute(
+                select(TournamentPhase.id)
+                .where(TournamentPhase.tournament_id == tournament_id)
+                .order_by(TournamentPhase.phase_number)
+            )
+        ).scalars().all()
+        seeded = await _participants(db, phase_1_id)
+
+        # Same rows again through the ORM, on phase 3 (rolled back)
+        with stopwatch() as orm_seed:
+            await _orm_rows(
+                db,
+                tournament_id,
+                phase_3_id,
+                select(Ticket.user_id).where(Ticket.pool_id == pool_id).distinct(),
+            )
+        await db.rollback()
+
+        await db.execute(
+            text(
+                "UPDATE tournament_participants "
+                "SET best_score = floor(random() * 10000), best_time_seconds = 30 + floor(random() * 300) "
+                "WHERE phase_id = :phase"
+            ),
+            {"phase": phase_1_id},
+        )
+        await db.commit()
+        phase_1 = await db.get(TournamentPhase, phase_1_id)
+        with stopwatch() as carrying:
+            await orchestrator.process_expired_phase(phase_1)
+        phase_1 = await db.get(TournamentPhase, phase_1_id)
+        phase_2 = await db.get(TournamentPhase, phase_2_id)
+        phase_1_qualified, phase_1_count = phase_1.qualified_count, phase_1.participants_count
+        phase_2_count, phase_2_status = phase_2.participants_count, PhaseStatus(phase_2.status)
+        carried = await _participants(db, phase_2_id)
+
+        # The previous carry-over: every qualified row of the tournament, one
+        # object each, on phase 3 (rolled back)
+        with stopwatch() as orm_carry:
+            await _orm_rows(
+                db,
+                tournament_id,
+                phase_3_id,
+                select(TournamentParticipant.player_id).where(
+                    TournamentParticipant.tournament_id == tournament_id,
+                    TournamentParticipant.qualified.is_(True),
+                ),
+            )
+        await db.rollback()
+
+    print_report(
+        f"tournament participants: {args.tickets} tickets, {holders} holders",
+        {
+            "seed s": seeding[0],
+            "ORM seeding (flush) s": orm_seed[0],
+            "convert + start (INSERT … SELECT) s": converting[0],
+            "phase 1 participants / count": f"{seeded} / {phase_1_count}",
+            "ORM carry-over (flush) s": orm_carry[0],
+            "elimination + carry-over s": carrying[0],
+            "phase 1 qualified / phase 2 participants / count": (
+                f"{phase_1_qualified} / {carried} / {phase_2_count}"
+            ),
+            "phase 2 status": phase_2_status.value,
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=50000)
+    parser.add_argument("--players", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,191 @@
+"""Trending ranking: on-the-fly aggregation vs. the incremental engine.
+
+Seeds ``--pools`` pools and ``--likes`` likes (Zipf-like popularity, spread
+over the last 3 days), then measures:
+
+* the naive query a trending tab would run per request (decayed sum over
+  ``pool_like`` grouped by pool);
+* a full recomputation (``rebuild_trending_scores``), only needed for backfills;
+* incremental ingestion (``record_like``), flush and refresh of the engine;
+* top-N, deep pages and single-pool ranks served from the in-memory index.
+
+    poetry run python -m scripts.bench_trending --pools 100000 --likes 10000000
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.services.trending import TrendingEngine, rebuild_trending_scores
+from app.core.config import settings
+from scripts._bench import make_sessionmaker, percentile, print_report, seed_users, stopwatch
+
+
+async def _seed(Session, pools: int, likes: int, users: int, skew: float):
+    # Bulk seeding in SQL: client-side inserts of 10M rows would dominate the run
+    norm = sum(n ** -skew for n in range(1, pools + 1))
+    scale = likes / norm
+    async with Session() as db:
+        (owner_id,) = await seed_users(db, 1)
+        await db.execute(text("DROP TABLE IF EXISTS bench_users, bench_pools"))
+        await db.execute(
+            text(
+                "CREATE UNLOGGED TABLE bench_users AS "
+                "SELECT n, gen_random_uuid() AS user_id FROM generate_series(1, :users) n"
+            ),
+            {"users": users},
+        )
+        await db.execute(
+            text(
+                "INSERT INTO app_user (user_id, nickname) "
+                "SELECT user_id, 'bench-' || n FROM bench_users"
+            )
+        )
+        await db.execute(
+            text(
+                "CREATE UNLOGGED TABLE bench_pools AS "
+                "SELECT n, gen_random_uuid() AS pool_id, gen_random_uuid() AS prize_id, "
+                "       least(:users, greatest(1, floor(:scale / power(n, :skew))))::int AS likes "
+                "FROM generate_series(1, :pools) n"
+            ),
+            {"users": users, "scale": scale, "skew": skew, "pools": pools},
+        )
+        await db.execute(
+            text(
+                "INSERT INTO prize (prize_id, user_id, title, stock) "
+                "SELECT prize_id, :owner, 'bench prize', 1 FROM bench_pools"
+            ),
+            {"owner": owner_id},
+        )
+        await db.execute(
+            text(
+                "INSERT INTO raffle_pool (pool_id, prize_id, ticket_price_cents, "
+                "  tickets_required, tickets_sold, likes, state) "
+                "SELECT pool_id, prize_id, 100, 100, 0, likes, 'OPEN' FROM bench_pools"
+            )
+        )
+        # Distinct (pool, user) pairs: pool n takes `likes` consecutive users from an offset
+        await db.execute(
+            text(
+                "INSERT INTO pool_like (pool_id, user_id, created_at) "
+                "SELECT p.pool_id, u.user_id, now() - random() * interval '72 hours' "
+                "FROM bench_pools p "
+                "CROSS JOIN LATERAL generate_series(0, p.likes - 1) k "
+                "JOIN bench_users u ON u.n = ((p.n * 7919 + k) % :users) + 1"
+            ),
+            {"users": users},
+        )
+        await db.commit()
+        total = (await db.execute(text("SELECT sum(likes) FROM bench_pools"))).scalar_one()
+        pool_ids = list(
+            (await db.execute(text("SELECT pool_id FROM bench_pools ORDER BY n"))).scalars()
+        )
+        await db.execute(text("DROP TABLE bench_users, bench_pools"))
+        await db.commit()
+    async with Session() as db:
+        await db.execute(text("ANALYZE pool_like"))
+    return pool_ids, total
+
+
+NAIVE_TOP = text(
+    "SELECT pool_id, "
+    "       sum(w * power(2.0::float8, -extract(epoch FROM now() - created_at)::float8 / :h)) AS score "
+    "FROM (SELECT pool_id, created_at, CAST(:like_w AS float8) AS w FROM pool_like "
+    "      UNION ALL SELECT pool_id, created_at, CAST(:ticket_w AS float8) FROM ticket) events "
+    "GROUP BY pool_id ORDER BY score DESC, pool_id LIMIT :n"
+)
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=4)
+    engine = TrendingEngine(
+        half_life_seconds=settings.TRENDING_HALF_LIFE_HOURS * 3600,
+        like_weight=settings.TRENDING_LIKE_WEIGHT,
+        ticket_weight=settings.TRENDING_TICKET_WEIGHT,
+    )
+
+    with stopwatch() as seeding:
+        pool_ids, likes = await _seed(Session, args.pools, args.likes, args.users, args.skew)
+    print(f"seeded {len(pool_ids)} pools, {likes} likes in {seeding[0]:.1f}s")
+
+    naive = []
+    async with Session() as db:
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            naive_top = (
+                await db.execute(
+                    NAIVE_TOP,
+                    {
+                        "h": engine.half_life_seconds,
+                        "like_w": engine.like_weight,
+                        "ticket_w": engine.ticket_weight,
+                        "n": 20,
+                    },
+                )
+            ).all()
+            naive.append(time.perf_counter() - started)
+
+    async with Session() as db:
+        with stopwatch() as rebuild:
+            await rebuild_trending_scores(db, engine)
+    with stopwatch() as full_load:
+        await engine.refresh(Session, full=True)
+    same_top = [pool_id for _, pool_id, _ in engine.top(0, 20)] == [r[0] for r in naive_top]
+
+    # Live traffic: Zipf-ish picks over the same pools
+    weights = [n ** -args.skew for n in range(1, len(pool_ids) + 1)]
+    events = random.choices(pool_ids, weights=weights, k=args.events)
+    with stopwatch() as ingest:
+        for pool_id in events:
+            engine.record_like(pool_id, +1, datetime.now(timezone.utc))
+    touched = len(set(events))
+    with stopwatch() as flush:
+        await engine.flush(Session)
+    with stopwatch() as refresh:
+        refreshed = await engine.refresh(Session)
+
+    top, deep, ranks = [], [], []
+    for _ in range(args.rounds * 100):
+        started = time.perf_counter()
+        engine.top(0, 20)
+        top.append(time.perf_counter() - started)
+        offset = random.randrange(len(engine.index))
+        started = time.perf_counter()
+        engine.top(offset, 20)
+        deep.append(time.perf_counter() - started)
+        pool_id = random.choice(pool_ids)
+        started = time.perf_counter()
+        engine.rank_of(pool_id)
+        ranks.append(time.perf_counter() - started)
+
+    print_report(
+        f"trending: {len(pool_ids)} pools, {likes} likes, {args.events} live events",
+        {
+            "naive top-20 p50 ms": percentile(naive, 50) * 1000,
+            "full rebuild s": rebuild[0],
+            "index full load s": full_load[0],
+            "engine top-20 == naive top-20": same_top,
+            "ingest events/sec": args.events / ingest[0],
+            "flush ms": flush[0] * 1000,
+            "pools flushed": touched,
+            "incremental refresh ms": refresh[0] * 1000,
+            "rows refreshed": refreshed,
+            "top-20 p50 us": percentile(top, 50) * 1e6,
+            "random page p50 us": percentile(deep, 50) * 1e6,
+            "rank_of p50 us": percentile(ranks, 50) * 1e6,
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pools", type=int, default=100_000)
+    parser.add_argument("--likes", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--skew", type=float, default=0.7)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,161 @@
+"""Concurrent wallet debits: no overdraft, debits/sec on one wallet and across wallets.
+
+Each wallet is seeded with ``--balance`` cents and hit by ``--workers`` tasks
+that debit ``--amount`` cents until they are refused, so roughly twice the
+balance is requested. Two scenarios:
+
+* hot: all workers on a single wallet (serialized by its row lock);
+* spread: the same number of workers over ``--wallets`` wallets.
+
+For each, the report checks that no balance went negative, that the accepted
+debits are exactly ``balance // amount`` per wallet and that the balance equals
+the seed minus the ledger sum. The read-modify-write path the service used
+before is replayed on the hot wallet for comparison.
+
+    poetry run python -m scripts.bench_wallet_debits --workers 50 --wallets 50
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select, update
+
+from app.models.wallet import (
+    WalletAccount,
+    WalletLedgerDirection,
+    WalletLedgerEntry,
+    WalletLedgerReason,
+)
+from app.services.wallet import create_wallet_debit
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_users,
+    seed_wallets,
+    stopwatch,
+)
+
+
+async def _legacy_debit(db, wallet_id, amount_cents):
+    # Replay of the former check-then-set: balance read in Python, written back absolute
+    balance = (
+        await db.execute(
+            select(WalletAccount.balance_cents).where(WalletAccount.wallet_id == wallet_id)
+        )
+    ).scalar_one()
+    if balance < amount_cents:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Saldo insufficiente")
+    await db.execute(
+        update(WalletAccount)
+        .where(WalletAccount.wallet_id == wallet_id)
+        .values(balance_cents=balance - amount_cents)
+    )
+    await db.execute(
+        insert(WalletLedgerEntry).values(
+            wallet_id=wallet_id,
+            direction=WalletLedgerDirection.DEBIT.value,
+            amount_cents=amount_cents,
+            reason=WalletLedgerReason.ADJUSTMENT.value,
+            status="POSTED",
+        )
+    )
+    await db.commit()
+
+
+async def _worker(Session, wallet_id, amount, latencies, legacy):
+    accepted = 0
+    async with Session() as db:
+        wallet = await db.get(WalletAccount, wallet_id)
+        while True:
+            started = time.perf_counter()
+            try:
+                if legacy:
+                    await _legacy_debit(db, wallet_id, amount)
+                else:
+                    await create_wallet_debit(
+                        db,
+                        wallet,
+                        amount_cents=amount,
+                        reason=WalletLedgerReason.ADJUSTMENT,
+                    )
+            except HTTPException:
+                return accepted
+            latencies.append(time.perf_counter() - started)
+            accepted += 1
+
+
+async def _scenario(Session, wallet_ids, args, *, legacy=False):
+    latencies: list[float] = []
+    with stopwatch() as elapsed:
+        accepted = await asyncio.gather(
+            *(
+                _worker(Session, wallet_ids[i % len(wallet_ids)], args.amount, latencies, legacy)
+                for i in range(args.workers)
+            )
+        )
+    async with Session() as db:
+        balances = dict(
+            (
+                await db.execute(
+                    select(WalletAccount.wallet_id, WalletAccount.balance_cents).where(
+                        WalletAccount.wallet_id.in_(wallet_ids)
+                    )
+                )
+            ).all()
+        )
+        debited = dict(
+            (
+                await db.execute(
+                    select(WalletLedgerEntry.wallet_id, func.sum(WalletLedgerEntry.amount_cents))
+                    .where(WalletLedgerEntry.wallet_id.in_(wallet_ids))
+                    .group_by(WalletLedgerEntry.wallet_id)
+                )
+            ).all()
+        )
+    expected = len(wallet_ids) * (args.balance // args.amount)
+    return {
+        "debits accepted": sum(accepted),
+        "debits expected": expected,
+        "debits/sec": sum(accepted) / elapsed[0],
+        "p50 ms": percentile(latencies, 50) * 1000,
+        "p99 ms": percentile(latencies, 99) * 1000,
+        "min balance": min(balances.values()),
+        "overdrafts": sum(
+            1 for wid in wallet_ids if debited.get(wid, 0) > args.balance
+        ),
+        "ledger matches balance": all(
+            balances[wid] == args.balance - debited.get(wid, 0) for wid in wallet_ids
+        ),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=args.workers)
+    async with Session() as db:
+        user_ids = await seed_users(db, args.wallets + 2)
+        wallet_ids = await seed_wallets(db, user_ids, args.balance)
+    hot, legacy, spread = wallet_ids[0], wallet_ids[1], wallet_ids[2:]
+
+    print_report(
+        f"hot wallet: {args.workers} workers, 1 wallet", await _scenario(Session, [hot], args)
+    )
+    print_report(
+        f"spread: {args.workers} workers, {len(spread)} wallets",
+        await _scenario(Session, spread, args),
+    )
+    print_report(
+        f"legacy read-modify-write: {args.workers} workers, 1 wallet",
+        await _scenario(Session, [legacy], args, legacy=True),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--wallets", type=int, default=50)
+    parser.add_argument("--balance", type=int, default=100_000)
+    parser.add_argument("--amount", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,189 @@
+"""Wallet holds: lifecycle under concurrency and the expiry sweeper on a backlog.
+
+Phase 1: ``--workers`` tasks reserve, capture and release holds on a shared
+set of wallets while the sweeper runs; checks that no wallet's available
+balance went negative.
+
+Phase 2: seeds ``--expired`` abandoned holds (already past ``expires_at``)
+next to ``--active`` live ones and times the sweeper releasing the backlog in
+batches of ``--batch``.
+
+Both phases end by checking ``held_cents`` against the ACTIVE holds of every
+wallet.
+
+    poetry run python -m scripts.bench_wallet_holds --expired 1000000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.models.wallet import WalletAccount
+from app.services.wallet_hold import HoldSweeper, capture_hold, release_hold, reserve_hold
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_users,
+    seed_wallets,
+    stopwatch,
+)
+
+CONSISTENCY = text(
+    "SELECT count(*) FILTER (WHERE w.held_cents <> coalesce(h.held, 0)), "
+    "       count(*) FILTER (WHERE w.balance_cents < w.held_cents) "
+    "FROM wallet_account w "
+    "LEFT JOIN (SELECT wallet_id, sum(amount_cents) AS held FROM wallet_hold "
+    "           WHERE status = 'ACTIVE' GROUP BY wallet_id) h USING (wallet_id)"
+)
+
+
+async def _lifecycle_worker(Session, wallet_ids, ops, latencies, outcomes):
+    async with Session() as db:
+        for _ in range(ops):
+            wallet = await db.get(WalletAccount, random.choice(wallet_ids))
+            started = time.perf_counter()
+            try:
+                hold = await reserve_hold(
+                    db, wallet, amount_cents=random.randint(100, 3000), ttl_seconds=0.5
+                )
+                if random.random() < 0.2:
+                    outcomes["abandoned"] += 1
+                    continue
+                await asyncio.sleep(random.random() * 0.6)
+                if random.random() < 0.6:
+                    await capture_hold(db, wallet, hold.hold_id)
+                    outcomes["captured"] += 1
+                else:
+                    await release_hold(db, wallet, hold.hold_id)
+                    outcomes["released"] += 1
+            except HTTPException as exc:
+                # End the transaction as a request would: a refused conditional
+                # update may still hold the row lock it waited for
+                await db.rollback()
+                outcomes[str(exc.status_code)] += 1
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+
+async def _sweep_loop(Session, sweeper, stop):
+    while not stop.is_set():
+        await sweeper.sweep(Session)
+        await asyncio.sleep(0.1)
+
+
+async def _seed_backlog(Session, wallets: int, expired: int, active: int) -> None:
+    async with Session() as db:
+        await db.execute(
+            text(
+                "CREATE TEMP TABLE bench_wallets AS "
+                "SELECT row_number() OVER () AS n, wallet_id FROM wallet_account"
+            )
+        )
+        await db.execute(
+            text(
+                "INSERT INTO wallet_hold (hold_id, wallet_id, amount_cents, reason, status, expires_at) "
+                "SELECT gen_random_uuid(), b.wallet_id, 1 + k % 50, 'TICKET_RESERVATION', 'ACTIVE', "
+                "       CASE WHEN k <= :expired THEN now() - interval '1 minute' "
+                "            ELSE now() + interval '1 hour' END "
+                "FROM generate_series(1, :total) k "
+                "JOIN bench_wallets b ON b.n = 1 + k % :wallets"
+            ),
+            {"expired": expired, "total": expired + active, "wallets": wallets},
+        )
+        await db.execute(
+            text(
+                "UPDATE wallet_account w SET held_cents = h.held FROM ("
+                "  SELECT wallet_id, sum(amount_cents) AS held FROM wallet_hold "
+                "  WHERE status = 'ACTIVE' GROUP BY wallet_id) h "
+                "WHERE w.wallet_id = h.wallet_id"
+            )
+        )
+        await db.commit()
+    async with Session() as db:
+        await db.execute(text("ANALYZE wallet_hold"))
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=args.workers + 2)
+    async with Session() as db:
+        user_ids = await seed_users(db, args.wallets)
+        wallet_ids = await seed_wallets(db, user_ids, args.balance)
+
+    # Phase 1: concurrent lifecycle with the sweeper running alongside
+    sweeper = HoldSweeper(batch=args.batch, interval_seconds=0.1)
+    latencies: list[float] = []
+    outcomes = {k: 0 for k in ("captured", "released", "abandoned", "400", "409")}
+    stop = asyncio.Event()
+    sweeping = asyncio.create_task(_sweep_loop(Session, sweeper, stop))
+    with stopwatch() as elapsed:
+        await asyncio.gather(
+            *(
+                _lifecycle_worker(Session, wallet_ids[: args.hot_wallets], args.ops, latencies, outcomes)
+                for _ in range(args.workers)
+            )
+        )
+    await asyncio.sleep(0.6)
+    stop.set()
+    await sweeping
+    await sweeper.sweep(Session)
+    async with Session() as db:
+        mismatched, overdrawn = (await db.execute(CONSISTENCY)).one()
+    print_report(
+        f"hold lifecycle: {args.workers} workers on {args.hot_wallets} wallets",
+        {
+            **{f"holds {k}": v for k, v in outcomes.items()},
+            "ops/sec": len(latencies) / elapsed[0],
+            "p50 ms": percentile(latencies, 50) * 1000,
+            "p99 ms": percentile(latencies, 99) * 1000,
+            "abandoned holds swept": sweeper.holds_released,
+            "held_cents mismatches": mismatched,
+            "wallets over-held": overdrawn,
+        },
+    )
+
+    # Phase 2: expired backlog
+    with stopwatch() as seeding:
+        await _seed_backlog(Session, args.wallets, args.expired, args.active)
+    print(f"seeded {args.expired} expired + {args.active} active holds in {seeding[0]:.1f}s")
+    sweeper = HoldSweeper(batch=args.batch, interval_seconds=0)
+    with stopwatch() as swept:
+        released = await sweeper.sweep(Session)
+    with stopwatch() as idle:
+        await sweeper.sweep(Session)
+    async with Session() as db:
+        # Seeded holds skip the balance check, so only the held_cents match counts here
+        mismatched, _ = (await db.execute(CONSISTENCY)).one()
+        active_left = (
+            await db.execute(text("SELECT count(*) FROM wallet_hold WHERE status = 'ACTIVE'"))
+        ).scalar_one()
+    stats = sweeper.snapshot_stats()
+    print_report(
+        f"expiry sweep: {args.expired} expired holds, batch {args.batch}",
+        {
+            "released": released,
+            "sweep s": swept[0],
+            "holds released/sec": released / swept[0],
+            "batches": stats["batches"] - 1,
+            "ms per batch": swept[0] * 1000 / max(1, stats["batches"] - 1),
+            "idle sweep ms": idle[0] * 1000,
+            "active holds left": active_left,
+            "held_cents mismatches": mismatched,
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wallets", type=int, default=10_000)
+    parser.add_argument("--balance", type=int, default=20_000)
+    parser.add_argument("--hot-wallets", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=40)
+    parser.add_argument("--ops", type=int, default=50)
+    parser.add_argument("--expired", type=int, default=1_000_000)
+    parser.add_argument("--active", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+"""Ledger pages: OFFSET + count(*) vs. keyset cursor with the cached totals.
+
+Seeds one wallet with ``--entries`` ledger rows (plus background rows on other
+wallets) and times fetching a page at increasing depths both ways: the old
+``OFFSET`` query with its ``count(*)``, and ``list_wallet_ledger`` seeking from
+the cursor of the previous page.
+
+    poetry run python -m scripts.bench_wallet_ledger --entries 50000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import func, select, text
+
+from app.models.wallet import WalletLedgerEntry
+from app.services.wallet import list_wallet_ledger
+from scripts._bench import make_sessionmaker, percentile, print_report, seed_users, seed_wallets
+
+
+async def _seed(Session, entries: int, others: int) -> object:
+    async with Session() as db:
+        user_ids = await seed_users(db, others + 1)
+        wallet_ids = await seed_wallets(db, user_ids, 0)
+        # One heavy wallet and `others` light ones sharing the index
+        await db.execute(
+            text(
+                "INSERT INTO wallet_ledger (wallet_id, direction, amount_cents, reason, status, created_at) "
+                "SELECT w, 'DEBIT', 100, 'ADJUSTMENT', 'POSTED', now() - n * interval '1 second' "
+                "FROM unnest(CAST(:wallets AS uuid[])) w, generate_series(1, :entries) n "
+                "WHERE w = CAST(:heavy AS uuid) OR n <= 200"
+            ),
+            {"wallets": wallet_ids, "heavy": wallet_ids[0], "entries": entries},
+        )
+        await db.commit()
+        await db.execute(text("ANALYZE wallet_ledger"))
+    return wallet_ids[0]
+
+
+async def _offset_page(db, wallet_id, offset, limit):
+    stmt = (
+        select(WalletLedgerEntry)
+        .where(WalletLedgerEntry.wallet_id == wallet_id)
+        .order_by(WalletLedgerEntry.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    items = (await db.execute(stmt)).scalars().all()
+    total = (
+        await db.execute(
+            select(func.count())
+            .select_from(WalletLedgerEntry)
+            .where(WalletLedgerEntry.wallet_id == wallet_id)
+        )
+    ).scalar_one()
+    return items, total
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=2)
+    wallet_id = await _seed(Session, args.entries, args.others)
+
+    rows: dict[str, object] = {}
+    async with Session() as db:
+        # Walk the whole history with cursors, remembering the cursor of each depth
+        cursors, cursor, pages = {0: None}, None, 0
+        started = time.perf_counter()
+        while True:
+            _, cursor = await list_wallet_ledger(db, wallet_id, limit=args.limit, cursor=cursor)
+            pages += 1
+            if cursor is None:
+                break
+            cursors[pages * args.limit] = cursor
+        rows["full walk (keyset) s"] = time.perf_counter() - started
+        rows["pages"] = pages
+
+        for depth in (0, args.entries // 10, args.entries // 2, args.entries - args.limit):
+            depth -= depth % args.limit
+            offset_t, keyset_t = [], []
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                await _offset_page(db, wallet_id, depth, args.limit)
+                offset_t.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                await list_wallet_ledger(db, wallet_id, limit=args.limit, cursor=cursors[depth])
+                keyset_t.append(time.perf_counter() - started)
+            rows[f"depth {depth}: offset+count p50 ms"] = percentile(offset_t, 50) * 1000
+            rows[f"depth {depth}: keyset p50 ms"] = percentile(keyset_t, 50) * 1000
+
+    print_report(f"wallet ledger: {args.entries} entries, page of {args.limit}", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50_000)
+    parser.add_argument("--others", type=int, default=1_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
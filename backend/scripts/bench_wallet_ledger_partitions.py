@@ -0,0 +1,196 @@
+"""Partitioned ledger: pruned range reads, month creation and archiving.
+
+Seeds ``--months`` months of history, ``--per-day`` entries a day for each of
+``--wallets`` wallets, then times ``list_wallet_ledger`` on the newest page, a
+one-month range in the middle of the history and a cursor page inside it, and
+counts the partitions each plan touches. Reconciles every wallet, archives all
+but the last ``--keep`` months and reports how long the move took and how much
+of the ledger left the live table, then re-checks the balances.
+
+    poetry run python -m scripts.bench_wallet_ledger_partitions --months 24 --wallets 200
+"""
+import argparse
+import asyncio
+import re
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, text
+
+from app.models.wallet import WalletLedgerEntry
+from app.models.wallet_reconciliation import WalletBalanceCheckpoint
+from app.services.wallet import list_wallet_ledger
+from app.services.wallet_ledger_partitions import (
+    add_months,
+    archive_ledger_partitions,
+    ensure_ledger_partitions,
+    list_ledger_partitions,
+    month_start,
+)
+from app.services.wallet_reconciliation import WalletReconciler
+from scripts._bench import (
+    make_sessionmaker,
+    percentile,
+    print_report,
+    seed_users,
+    seed_wallets,
+    stopwatch,
+)
+
+
+async def _seed(db, wallet_ids, months: int, per_day: int) -> None:
+    days = months * 31
+    await db.execute(
+        text(
+            "INSERT INTO wallet_ledger (wallet_id, direction, amount_cents, reason, status, created_at) "
+            "SELECT w, 'CREDIT', 100, 'ADJUSTMENT', 'POSTED', "
+            "now() - d * interval '1 day' - n * interval '1 minute' "
+            "FROM unnest(CAST(:wallets AS uuid[])) w, generate_series(1, :days) d, "
+            "generate_series(1, :per_day) n"
+        ),
+        {"wallets": wallet_ids, "days": days, "per_day": per_day},
+    )
+    total = days * per_day
+    await db.execute(
+        text(
+            "UPDATE wallet_account SET balance_cents = 100 * :total, ledger_entries = :total, "
+            "ledger_credit_cents = 100 * :total WHERE wallet_id = ANY(CAST(:wallets AS uuid[]))"
+        ),
+        {"total": total, "wallets": wallet_ids},
+    )
+    await db.commit()
+
+
+async def _partitions_scanned(db, stmt) -> int:
+    compiled = stmt.compile(db.bind, compile_kwargs={"literal_binds": True})
+    plan = (await db.execute(text(f"EXPLAIN {compiled}"))).scalars().all()
+    scanned = set()
+    for line in plan:
+        scanned.update(re.findall(r" on (wallet_ledger_(?:p\d{6}|default))\b", line))
+    return len(scanned)
+
+
+async def _timed(db, rounds: int, **kwargs) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await list_wallet_ledger(db, **kwargs)
+        timings.append(time.perf_counter() - started)
+    return percentile(timings, 50) * 1000
+
+
+async def _live_bytes(db) -> int:
+    return (
+        await db.execute(
+            text(
+                "SELECT coalesce(sum(pg_total_relation_size(inhrelid)), 0) FROM pg_inherits "
+                "WHERE inhparent = 'wallet_ledger'::regclass"
+            )
+        )
+    ).scalar_one()
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=4)
+    async with Session() as db:
+        user_ids = await seed_users(db, args.wallets)
+        wallet_ids = await seed_wallets(db, user_ids, 0)
+        await ensure_ledger_partitions(db, ahead=1)
+        with stopwatch() as seeding:
+            await _seed(db, wallet_ids, args.months, args.per_day)
+        with stopwatch() as ensuring:
+            created = await ensure_ledger_partitions(db, ahead=1)
+        await db.execute(text("ANALYZE wallet_ledger"))
+
+    wallet_id = wallet_ids[0]
+    now = datetime.now(timezone.utc)
+    middle = add_months(month_start(now), -(args.months // 2))
+    rows: dict[str, object] = {
+        "seeded entries": args.wallets * args.months * 31 * args.per_day,
+        "seed s": seeding[0],
+        "months created after seeding": len(created),
+        "ensure s": ensuring[0],
+    }
+    async with Session() as db:
+        _, cursor = await list_wallet_ledger(
+            db, wallet_id, limit=args.limit, created_from=middle, created_to=add_months(middle, 1)
+        )
+        rows["newest page p50 ms"] = await _timed(db, args.rounds, wallet_id=wallet_id, limit=args.limit)
+        rows["month range page p50 ms"] = await _timed(
+            db,
+            args.rounds,
+            wallet_id=wallet_id,
+            limit=args.limit,
+            created_from=middle,
+            created_to=add_months(middle, 1),
+        )
+        rows["cursor page in range p50 ms"] = await _timed(
+            db,
+            args.rounds,
+            wallet_id=wallet_id,
+            limit=args.limit,
+            cursor=cursor,
+            created_from=middle,
+        )
+        ranged = select(WalletLedgerEntry).where(
+            WalletLedgerEntry.wallet_id == wallet_id,
+            WalletLedgerEntry.created_at >= middle,
+            WalletLedgerEntry.created_at < add_months(middle, 1),
+        )
+        everything = select(WalletLedgerEntry).where(WalletLedgerEntry.wallet_id == wallet_id)
+        rows["partitions (live)"] = len(await list_ledger_partitions(db))
+        rows["partitions scanned: month range"] = await _partitions_scanned(db, ranged)
+        rows["partitions scanned: unbounded"] = await _partitions_scanned(db, everything)
+        live_before = await _live_bytes(db)
+
+    with stopwatch() as reconciling:
+        await WalletReconciler(
+            batch=1000, settle_seconds=0, interval_seconds=0
+        ).reconcile(Session)
+    async with Session() as db:
+        with stopwatch() as archiving:
+            archived = await archive_ledger_partitions(
+                db, before=add_months(month_start(now), -args.keep)
+            )
+        live_after = await _live_bytes(db)
+    with stopwatch() as rereconciling:
+        await WalletReconciler(
+            batch=1000, settle_seconds=0, interval_seconds=0
+        ).reconcile(Session)
+    async with Session() as db:
+        drifted = (
+            await db.execute(
+                select(func.count())
+                .select_from(WalletBalanceCheckpoint)
+                .where(
+                    WalletBalanceCheckpoint.wallet_id.in_(wallet_ids),
+                    WalletBalanceCheckpoint.drift_cents != 0,
+                )
+            )
+        ).scalar_one()
+
+    rows.update(
+        {
+            "reconcile (full) s": reconciling[0],
+            "months archived": len(archived),
+            "archive s": archiving[0],
+            "live ledger MB before": live_before / 2**20,
+            "live ledger MB after": live_after / 2**20,
+            "reconcile after archive s": rereconciling[0],
+            "drifted wallets": drifted,
+        }
+    )
+    print_report(
+        f"partitioned ledger: {args.months} months, {args.wallets} wallets", rows
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--wallets", type=int, default=200)
+    parser.add_argument("--per-day", type=int, default=5)
+    parser.add_argument("--keep", type=int, default=6)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,162 @@
+"""Wallet reconciliation: full recomputation vs. incremental checkpointed runs.
+
+Seeds ``--wallets`` wallets with ``--entries`` ledger rows each on average and
+balances that match, then corrupts ``--drift`` balances. Measures:
+
+* the full recomputation a naive check would run (sum of every ledger);
+* the first reconciliation run, which has no checkpoints and sums everything;
+* an incremental run after new activity on ``--active`` share of the wallets,
+  interrupted after a few batches and resumed by a fresh reconciler.
+
+Both runs must find exactly the corrupted wallets.
+
+    poetry run python -m scripts.bench_wallet_reconciliation --wallets 100000 --entries 20
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.models.wallet_reconciliation import WalletReconciliationRun
+from app.services.wallet_reconciliation import WalletReconciler
+from scripts._bench import make_sessionmaker, print_report, stopwatch
+
+FULL_RECOMPUTE = text(
+    "SELECT count(*) FROM wallet_account w "
+    "LEFT JOIN (SELECT wallet_id, sum(CASE WHEN direction = 'CREDIT' THEN amount_cents "
+    "                                 ELSE -amount_cents END) AS posted "
+    "           FROM wallet_ledger WHERE status = 'POSTED' GROUP BY wallet_id) l "
+    "USING (wallet_id) "
+    "WHERE w.balance_cents <> coalesce(l.posted, 0)"
+)
+
+
+async def _seed(Session, args) -> None:
+    async with Session() as db:
+        await db.execute(text("DROP TABLE IF EXISTS bench_wallets"))
+        await db.execute(
+            text(
+                "CREATE UNLOGGED TABLE bench_wallets AS "
+                "SELECT n, gen_random_uuid() AS user_id, gen_random_uuid() AS wallet_id "
+                "FROM generate_series(1, :wallets) n"
+            ),
+            {"wallets": args.wallets},
+        )
+        await db.execute(
+            text(
+                "INSERT INTO app_user (user_id, nickname) "
+                "SELECT user_id, 'bench-' || n FROM bench_wallets"
+            )
+        )
+        await db.execute(
+            text(
+                "INSERT INTO wallet_account (wallet_id, user_id, balance_cents, currency, status) "
+                "SELECT wallet_id, user_id, 0, 'EUR', 'ACTIVE' FROM bench_wallets"
+            )
+        )
+        # One top-up then debits; an hour old so it is all past the settle window
+        await db.execute(
+            text(
+                "INSERT INTO wallet_ledger (wallet_id, direction, amount_cents, reason, status, created_at) "
+                "SELECT b.wallet_id, CASE WHEN k = 0 THEN 'CREDIT' ELSE 'DEBIT' END, "
+                "       CASE WHEN k = 0 THEN 100000 ELSE 1 + (n * 31 + k) % 500 END, "
+                "       'ADJUSTMENT', 'POSTED', now() - interval '1 hour' + k * interval '1 second' "
+                "FROM bench_wallets b, generate_series(0, (b.n % (2 * :entries))) k"
+            ),
+            {"entries": args.entries},
+        )
+        await db.execute(
+            text(
+                "UPDATE wallet_account w SET balance_cents = l.posted, ledger_entries = l.n "
+                "FROM (SELECT wallet_id, count(*) AS n, sum(CASE WHEN direction = 'CREDIT' "
+                "      THEN amount_cents ELSE -amount_cents END) AS posted "
+                "      FROM wallet_ledger GROUP BY wallet_id) l "
+                "WHERE w.wallet_id = l.wallet_id"
+            )
+        )
+        await db.execute(
+            text(
+                "UPDATE wallet_account SET balance_cents = balance_cents + 7 "
+                "WHERE wallet_id IN (SELECT wallet_id FROM bench_wallets ORDER BY random() LIMIT :drift)"
+            ),
+            {"drift": args.drift},
+        )
+        await db.execute(text("DROP TABLE bench_wallets"))
+        await db.commit()
+    async with Session() as db:
+        await db.execute(text("ANALYZE wallet_account"))
+        await db.execute(text("ANALYZE wallet_ledger"))
+
+
+async def _activity(Session, share: float) -> None:
+    # New entries written like the service does: balance and ledger together
+    async with Session() as db:
+        await db.execute(
+            text(
+                "WITH moved AS ("
+                "  UPDATE wallet_account SET balance_cents = balance_cents - 5 "
+                "  WHERE random() < :share RETURNING wallet_id) "
+                "INSERT INTO wallet_ledger (wallet_id, direction, amount_cents, reason, status) "
+                "SELECT wallet_id, 'DEBIT', 5, 'ADJUSTMENT', 'POSTED' FROM moved"
+            ),
+            {"share": share},
+        )
+        await db.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=2)
+    with stopwatch() as seeding:
+        await _seed(Session, args)
+    async with Session() as db:
+        entries = (await db.execute(text("SELECT count(*) FROM wallet_ledger"))).scalar_one()
+    print(f"seeded {args.wallets} wallets, {entries} ledger entries in {seeding[0]:.1f}s")
+
+    async with Session() as db:
+        with stopwatch() as full:
+            naive_drifted = (await db.execute(FULL_RECOMPUTE)).scalar_one()
+
+    reconciler = WalletReconciler(batch=args.batch, settle_seconds=10, interval_seconds=0)
+    first_id = await reconciler.reconcile(Session)
+
+    await _activity(Session, args.active)
+    second_id = await reconciler._current_run(Session)
+    for _ in range(args.interrupt_after):
+        await reconciler.run_batch(Session, second_id)
+    # "Crash": a fresh reconciler picks the open run up from its cursor
+    resumed_id = await WalletReconciler(
+        batch=args.batch, settle_seconds=10, interval_seconds=0
+    ).reconcile(Session)
+
+    async with Session() as db:
+        first = await db.get(WalletReconciliationRun, first_id)
+        second = await db.get(WalletReconciliationRun, second_id)
+
+    print_report(
+        f"wallet reconciliation: {args.wallets} wallets, {entries} entries, {args.drift} corrupted",
+        {
+            "full recompute s": full[0],
+            "full recompute drifted": naive_drifted,
+            "first run s": first.active_seconds,
+            "first run wallets/sec": first.wallets_per_sec,
+            "first run entries summed": first.entries_summed,
+            "first run drifted": first.drifted_wallets,
+            "incremental run s": second.active_seconds,
+            "incremental run wallets/sec": second.wallets_per_sec,
+            "incremental run entries summed": second.entries_summed,
+            "incremental run drifted": second.drifted_wallets,
+            "resumed same run": resumed_id == second_id,
+            "wallets checked after resume": second.wallets_checked,
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wallets", type=int, default=100_000)
+    parser.add_argument("--entries", type=int, default=20)
+    parser.add_argument("--drift", type=int, default=25)
+    parser.add_argument("--active", type=float, default=0.05)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--interrupt-after", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
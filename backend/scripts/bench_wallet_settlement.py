@@ -0,0 +1,146 @@
+"""Pool settlements: per-wallet credits vs. one set-wise settlement statement.
+
+Seeds two pools whose ``--buyers`` wallets each paid ``--debits`` ticket
+debits, then refunds the first one wallet at a time with
+``create_wallet_credit`` (a statement and a commit per wallet) and cancels the
+second with ``cancel_pool``. Replays the cancellation to check that nothing is
+paid twice, pays out a prize to every buyer with ``settle_prize_payouts`` and
+verifies every wallet got back exactly what it paid.
+
+    poetry run python -m scripts.bench_wallet_settlement --buyers 5000
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import case, func, select, text
+
+from app.models.wallet import WalletAccount, WalletLedgerEntry, WalletLedgerReason
+from app.services.wallet import create_wallet_credit
+from app.services.wallet_settlement import cancel_pool, settle_prize_payouts
+from scripts._bench import (
+    make_sessionmaker,
+    print_report,
+    seed_pools,
+    seed_users,
+    seed_wallets,
+    stopwatch,
+)
+
+
+async def _seed_debits(db, pool_id, wallet_ids, debits: int) -> None:
+    await db.execute(
+        text(
+            "INSERT INTO wallet_ledger (wallet_id, direction, amount_cents, reason, status, ref_pool_id) "
+            "SELECT w, 'DEBIT', 100 * n, 'TICKET_PURCHASE', 'POSTED', CAST(:pool AS uuid) "
+            "FROM unnest(CAST(:wallets AS uuid[])) w, generate_series(1, :debits) n"
+        ),
+        {"pool": pool_id, "wallets": wallet_ids, "debits": debits},
+    )
+    paid = 100 * debits * (debits + 1) // 2
+    await db.execute(
+        text(
+            "UPDATE wallet_account SET balance_cents = balance_cents - :paid, "
+            "ledger_entries = ledger_entries + :debits, "
+            "ledger_debit_cents = ledger_debit_cents + :paid "
+            "WHERE wallet_id = ANY(CAST(:wallets AS uuid[]))"
+        ),
+        {"paid": paid, "debits": debits, "wallets": wallet_ids},
+    )
+    await db.commit()
+
+
+async def _refund_one_by_one(Session, pool_id, wallet_ids) -> None:
+    async with Session() as db:
+        paid = dict(
+            (
+                await db.execute(
+                    select(WalletLedgerEntry.wallet_id, func.sum(WalletLedgerEntry.amount_cents))
+                    .where(WalletLedgerEntry.ref_pool_id == pool_id)
+                    .group_by(WalletLedgerEntry.wallet_id)
+                )
+            ).all()
+        )
+        for wallet_id in wallet_ids:
+            wallet = await db.get(WalletAccount, wallet_id)
+            await create_wallet_credit(
+                db,
+                wallet,
+                amount_cents=paid[wallet_id],
+                reason=WalletLedgerReason.REFUND,
+            )
+
+
+async def _unbalanced_wallets(Session, wallet_ids, start_cents: int) -> int:
+    signed = case(
+        (WalletLedgerEntry.direction == "CREDIT", WalletLedgerEntry.amount_cents),
+        else_=-WalletLedgerEntry.amount_cents,
+    )
+    async with Session() as db:
+        rows = (
+            await db.execute(
+                select(WalletAccount.balance_cents, func.coalesce(func.sum(signed), 0))
+                .outerjoin(WalletLedgerEntry, WalletLedgerEntry.wallet_id == WalletAccount.wallet_id)
+                .where(WalletAccount.wallet_id.in_(wallet_ids))
+                .group_by(WalletAccount.wallet_id)
+            )
+        ).all()
+    return sum(1 for balance, net in rows if balance != start_cents + net)
+
+
+async def main(args: argparse.Namespace) -> None:
+    Session = make_sessionmaker(pool_size=2)
+    async with Session() as db:
+        user_ids = await seed_users(db, 2 * args.buyers + 1)
+        owner, loop_users, bulk_users = (
+            user_ids[0],
+            user_ids[1 : args.buyers + 1],
+            user_ids[args.buyers + 1 :],
+        )
+        loop_pool, bulk_pool = await seed_pools(db, owner, 2, tickets_required=args.buyers)
+        start_cents = 100 * args.debits * (args.debits + 1)
+        loop_wallets = await seed_wallets(db, loop_users, start_cents)
+        bulk_wallets = await seed_wallets(db, bulk_users, start_cents)
+        await _seed_debits(db, loop_pool, loop_wallets, args.debits)
+        await _seed_debits(db, bulk_pool, bulk_wallets, args.debits)
+        await db.execute(text("ANALYZE wallet_ledger"))
+
+    with stopwatch() as looped:
+        await _refund_one_by_one(Session, loop_pool, loop_wallets)
+    async with Session() as db:
+        with stopwatch() as bulk:
+            refund = await cancel_pool(db, bulk_pool)
+    async with Session() as db:
+        replay = await cancel_pool(db, bulk_pool)
+    async with Session() as db:
+        with stopwatch() as paying:
+            payout = await settle_prize_payouts(
+                db, bulk_pool, {user_id: 500 for user_id in bulk_users}
+            )
+
+    print_report(
+        f"refund {args.buyers} wallets ({args.debits} debits each)",
+        {
+            "one by one s": looped[0],
+            "one by one wallets/sec": args.buyers / looped[0],
+            "cancel_pool s": bulk[0],
+            "cancel_pool wallets/sec": refund.settled / bulk[0],
+            "settlement statement ms": refund.elapsed_ms,
+            "speedup": looped[0] / bulk[0],
+            "replay settled": replay.settled,
+            "replay skipped": replay.skipped,
+            "prize payout wallets/sec": payout.settled / paying[0],
+            "unbalanced wallets (loop)": await _unbalanced_wallets(
+                Session, loop_wallets, start_cents
+            ),
+            "unbalanced wallets (bulk)": await _unbalanced_wallets(
+                Session, bulk_wallets, start_cents
+            ),
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buyers", type=int, default=5_000)
+    parser.add_argument("--debits", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,41 @@
+"""Process every tournament phase past its deadline now and print per-tournament timings.
+
+The API workers fire deadlines as they come (app/services/tournament_scheduler.py);
+this is the catch-up for phases left behind, e.g. while no worker was running.
+Tournaments are processed ``--concurrency`` at a time, each in its own
+transaction under a per-tournament lock, failures retried.
+
+    poetry run python -m scripts.process_tournament_deadlines [--concurrency 8]
+"""
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.services.tournament_pipeline import TournamentPipeline, process_expired_phases
+from scripts._bench import stopwatch
+
+
+async def main(args: argparse.Namespace) -> None:
+    pipeline = TournamentPipeline(
+        concurrency=args.concurrency,
+        max_attempts=settings.TOURNAMENT_PIPELINE_MAX_ATTEMPTS,
+        retry_seconds=settings.TOURNAMENT_PIPELINE_RETRY_SECONDS,
+    )
+    with stopwatch() as elapsed:
+        tasks = await process_expired_phases(async_session, pipeline)
+    for task in sorted(tasks, key=lambda task: task.seconds, reverse=True):
+        print(
+            f"{task.tournament_id}  {task.outcome.value:<8} {task.attempts} attempt(s)  "
+            f"{task.seconds * 1000:8.1f} ms  {task.error or ''}"
+        )
+    print(
+        f"{len(tasks)} phases in {elapsed[0]:.2f}s: {pipeline.done} done, "
+        f"{pipeline.skipped} skipped, {pipeline.failed} failed, {pipeline.retries} retries"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=settings.TOURNAMENT_PIPELINE_CONCURRENCY)
+    asyncio.run(main(parser.parse_args()))
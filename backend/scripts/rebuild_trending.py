@@ -0,0 +1,21 @@
+"""Recompute pool_trending from the like/ticket history.
+
+Run once after migration 0005 and after changing TRENDING_HALF_LIFE_HOURS;
+running API workers pick the new scores up on their next full reload.
+
+    poetry run python -m scripts.rebuild_trending
+"""
+import asyncio
+
+from app.db.session import async_session
+from app.services.trending import rebuild_trending_scores, trending_engine
+
+
+async def main() -> None:
+    async with async_session() as db:
+        pools = await rebuild_trending_scores(db, trending_engine)
+    print(f"pool_trending rebuilt: {pools} pools")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""Run (or resume) a wallet reconciliation pass now and print the drifted wallets.
+
+The API workers run the same job in the background every
+WALLET_RECONCILE_INTERVAL_SECONDS; ``--reset`` drops the checkpoints first so
+whole ledgers are re-summed (needed after rewriting ledger history). Archived
+ledger months are not re-summed: restore them first
+(``scripts.wallet_ledger_partitions --restore``).
+
+    poetry run python -m scripts.reconcile_wallets [--reset]
+"""
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.wallet_reconciliation import WalletReconciliationRun
+from app.services.wallet_reconciliation import (
+    WalletReconciler,
+    list_drifted_wallets,
+    reset_checkpoints,
+)
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.reset:
+        async with async_session() as db:
+            await reset_checkpoints(db)
+    reconciler = WalletReconciler(
+        batch=settings.WALLET_RECONCILE_BATCH,
+        settle_seconds=settings.WALLET_RECONCILE_SETTLE_SECONDS,
+        # Always due: start a new pass unless one is open
+        interval_seconds=0,
+    )
+    run_id = await reconciler.reconcile(async_session)
+    async with async_session() as db:
+        run = await db.get(WalletReconciliationRun, run_id)
+        drifted = await list_drifted_wallets(db, args.show)
+    print(
+        f"run {run.run_id}: {run.wallets_checked} wallets, {run.entries_summed} entries, "
+        f"{run.wallets_per_sec:,.0f} wallets/sec, {run.drifted_wallets} drifted"
+    )
+    for checkpoint in drifted:
+        print(f"  {checkpoint.wallet_id}  {checkpoint.drift_cents:+d} cents")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reset", action="store_true")
+    parser.add_argument("--show", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
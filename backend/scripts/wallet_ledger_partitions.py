@@ -0,0 +1,52 @@
+"""Create upcoming ledger partitions, archive or restore months, and list them.
+
+The API workers run ``ensure`` (and ``archive`` when
+WALLET_LEDGER_ARCHIVE_AFTER_MONTHS is set) every
+WALLET_LEDGER_MAINTENANCE_SECONDS; this runs them on demand.
+
+    poetry run python -m scripts.wallet_ledger_partitions [--archive-before 2026-01] [--restore wallet_ledger_p202512]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.services.wallet_ledger_partitions import (
+    archive_ledger_partitions,
+    ensure_ledger_partitions,
+    list_ledger_partitions,
+    restore_ledger_partition,
+)
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with async_session() as db:
+        created = await ensure_ledger_partitions(db, ahead=settings.WALLET_LEDGER_PARTITIONS_AHEAD)
+        if created:
+            print(f"created {', '.join(created)}")
+        if args.archive_before:
+            before = datetime.strptime(args.archive_before, "%Y-%m").replace(tzinfo=timezone.utc)
+            archived = await archive_ledger_partitions(db, before=before)
+            print(f"archived {', '.join(archived) or 'nothing'}")
+        if args.restore:
+            await restore_ledger_partition(db, args.restore)
+            print(f"restored {args.restore}")
+        for partition in await list_ledger_partitions(db):
+            rows = (
+                await db.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE relname = :name"),
+                    {"name": partition.name},
+                )
+            ).scalar_one()
+            tier = "archive" if partition.archived else "live"
+            print(f"  {partition.name}  {tier:<7}  ~{max(rows, 0):,} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--archive-before", metavar="YYYY-MM")
+    parser.add_argument("--restore", metavar="PARTITION")
+    asyncio.run(main(parser.parse_args()))